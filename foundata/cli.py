@@ -9,7 +9,10 @@ import polars as pl
 
 from foundata import config_validator, post_process, verify
 from foundata import filter as flt
-from foundata.run import runner
+
+# Heavy modules (foundata.run pulls in matplotlib, every source loader and
+# rapidfuzz) are imported inside the commands that need them, so lightweight
+# commands start quickly. tests/test_cli.py guards this.
 
 _DEFAULT_CONFIGS_ROOT = Path(__file__).parent.parent / "configs"
 
@@ -50,6 +53,13 @@ def _resolve_out(
     return path
 
 
+def _scan(path: str) -> pl.LazyFrame:
+    """Lazily scan a CSV or Parquet file, chosen by suffix."""
+    if Path(path).suffix == ".parquet":
+        return pl.scan_parquet(path)
+    return pl.scan_csv(path)
+
+
 @click.group()
 def cli():
     """foundata — household travel survey aggregation toolkit."""
@@ -108,10 +118,68 @@ def cli():
     show_default=True,
     help="Whether to filter out consecutive home, work and education activities.",
 )
+@click.option(
+    "--cache/--no-cache",
+    default=True,
+    show_default=True,
+    help="Read raw files through the Parquet cache (see `foundata ingest`).",
+)
+@click.option(
+    "--nts-partitions",
+    default=None,
+    help=(
+        "Load and process NTS one partition at a time to bound memory: "
+        "'year' (per survey year) or N (N household-hash partitions)."
+    ),
+)
+@click.option(
+    "--work-dir",
+    "-w",
+    type=click.Path(file_okay=False),
+    default=None,
+    help=(
+        "Run each source year as a separate task on a pool of workers, "
+        "writing per-task outputs here. Completed tasks are reused."
+    ),
+)
+@click.option(
+    "--workers",
+    "-j",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Workers for --work-dir (default: CPU count).",
+)
+@click.option(
+    "--executor",
+    type=click.Choice(["process", "thread", "serial"]),
+    default="process",
+    show_default=True,
+    help="How --work-dir tasks run: process pool, thread pool or in turn.",
+)
+@click.option(
+    "--resume/--fresh",
+    default=True,
+    show_default=True,
+    help="Skip tasks already completed in --work-dir from unchanged inputs.",
+)
 def run(
-    data_root, output, select, omit, open_only, home_based, filter_consecutive
+    data_root,
+    output,
+    select,
+    omit,
+    open_only,
+    home_based,
+    filter_consecutive,
+    cache,
+    nts_partitions,
+    work_dir,
+    workers,
+    executor,
+    resume,
 ):
     """Run the data processing pipeline end-to-end."""
+    from foundata.run import runner
+
     if open_only:
         if select or omit:
             click.echo(
@@ -121,7 +189,80 @@ def run(
     elif select and omit:
         click.echo("Cannot use both --select and --omit options.", err=True)
         sys.exit(1)
-    runner(data_root, output, select, omit, home_based, filter_consecutive)
+    if nts_partitions is not None and nts_partitions != "year":
+        if not nts_partitions.isdigit() or int(nts_partitions) < 1:
+            raise click.BadParameter(
+                "must be 'year' or a positive integer",
+                param_hint="'--nts-partitions'",
+            )
+        nts_partitions = int(nts_partitions)
+    runner(
+        data_root,
+        output,
+        select,
+        omit,
+        home_based,
+        filter_consecutive,
+        use_cache=cache,
+        nts_partitions=nts_partitions,
+        work_dir=work_dir,
+        workers=workers,
+        executor=executor,
+        resume=resume,
+    )
+
+
+@cli.command("ingest")
+@click.option(
+    "--data-root",
+    "-d",
+    required=True,
+    type=click.Path(exists=True, file_okay=False),
+    help="Base data directory, e.g. ~/Data/foundata",
+)
+@click.option(
+    "--select",
+    "-s",
+    multiple=True,
+    help="Sources to ingest (e.g. --select nhts --select ktdb).",
+)
+@click.option(
+    "--omit", "-x", multiple=True, help="Sources to skip (e.g. --omit nts)."
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Cache directory (default: <data-root>_cache next to the data root).",
+)
+@click.option(
+    "--force", is_flag=True, help="Re-transcode files even if cached."
+)
+def ingest_cmd(data_root, select, omit, cache_dir, force):
+    """Transcode raw survey files to a Parquet cache.
+
+    Each raw CSV/TAB file is parsed once and written as zstd-compressed
+    Parquet. Files are re-transcoded only when their size, mtime and content
+    hash no longer match the cache manifest.
+    """
+    from foundata import ingest, sources
+
+    selected = set(select) if select else set(sources.names())
+    selected -= set(omit)
+    unknown = selected - set(sources.names())
+    if unknown:
+        click.echo(f"Unknown sources: {', '.join(sorted(unknown))}", err=True)
+        sys.exit(1)
+    written = ingest.ingest(
+        data_root,
+        {
+            spec.name: (spec.data_dir, spec.raw_files)
+            for spec in sources.specs(selected)
+        },
+        cache_root=cache_dir,
+        force=force,
+    )
+    click.echo(f"{len(written)} files cached.")
 
 
 @cli.command("validate-config")
@@ -158,13 +299,14 @@ def validate_config(source, all_sources, configs_root):
 @click.argument("attributes_csv", type=click.Path(exists=True))
 @click.argument("trips_csv", type=click.Path(exists=True))
 def validate_table(attributes_csv, trips_csv):
-    """Validate pipeline output CSVs against the template schema.
+    """Validate pipeline output tables against the template schema.
 
     ATTRIBUTES_CSV and TRIPS_CSV are paths to the output files produced by the
-    pipeline (one row per person and one row per trip, respectively).
+    pipeline (one row per person and one row per trip, respectively), as
+    CSV or Parquet. Each table is checked in a single streaming scan.
     """
-    attributes = pl.read_csv(attributes_csv)
-    trips = pl.read_csv(trips_csv)
+    attributes = _scan(attributes_csv)
+    trips = _scan(trips_csv)
     ok = verify.columns(attributes, trips)
     if not ok:
         sys.exit(1)
@@ -218,14 +360,77 @@ def validate_table(attributes_csv, trips_csv):
     help="Column to omit (e.g. --omit vehicles --omit hh_size)",
     show_default=True,
 )
+@click.option(
+    "--fit",
+    "fit_spec",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Fit bins on ATTRIBUTES and write the bin spec to this JSON path.",
+)
+@click.option(
+    "--apply",
+    "apply_spec",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Apply a previously fitted JSON bin spec, streaming the input.",
+)
 @click.pass_context
-def bin_attributes(ctx, attributes, n_bins, method, output, select, omit):
-    """Bin numeric columns of an attributes CSV.
+def bin_attributes(
+    ctx,
+    attributes,
+    n_bins,
+    method,
+    output,
+    select,
+    omit,
+    fit_spec,
+    apply_spec,
+):
+    """Bin numeric columns of an attributes CSV or Parquet file.
 
     Per-column bin counts can be specified as --COLUMN N, e.g.:
 
         foundata bin attributes.csv --default 5 --age 10 --hh_income 3
+
+    Use --fit to save the bins as a JSON spec, and --apply to bin other
+    files (e.g. test splits or new source-years) with the same breaks:
+
+        foundata bin train.csv --fit bins.json --age 10
+        foundata bin test.parquet --apply bins.json
     """
+    if fit_spec and apply_spec:
+        click.echo("Cannot use both --fit and --apply.", err=True)
+        sys.exit(1)
+
+    if apply_spec:
+        ignored = [
+            f"--{name.replace('_', '-')}"
+            for name, value in (("select", select), ("omit", omit))
+            if value
+        ]
+        ignored += [
+            opt
+            for opt, name in (("--default", "n_bins"), ("--method", "method"))
+            if ctx.get_parameter_source(name)
+            != click.core.ParameterSource.DEFAULT
+        ]
+        ignored += [arg for arg in ctx.args if arg.startswith("--")]
+        if ignored:
+            raise click.UsageError(
+                "--apply uses the spec's columns and breaks; it cannot be "
+                f"combined with {', '.join(ignored)}"
+            )
+        spec = post_process.load_bin_spec(apply_spec)
+        out = Path(output) if output else _default_out(attributes, "_binned")
+        out.parent.mkdir(parents=True, exist_ok=True)
+        binned = post_process.apply_bins(_scan(attributes), spec)
+        if out.suffix == ".parquet":
+            binned.sink_parquet(out)
+        else:
+            binned.sink_csv(out)
+        click.echo(f"Wrote {out}")
+        return
+
     per_col_bins = {}
     args = list(ctx.args)
     i = 0
@@ -243,8 +448,8 @@ def bin_attributes(ctx, attributes, n_bins, method, output, select, omit):
                 )
         i += 1
 
-    df = pl.read_csv(attributes)
-    binned = post_process.discretise_numeric(
+    df = _scan(attributes).collect()
+    spec = post_process.fit_bins(
         df,
         n_bins=n_bins,
         method=method,
@@ -252,10 +457,18 @@ def bin_attributes(ctx, attributes, n_bins, method, output, select, omit):
         exclude_cols=omit if omit else None,
         per_col_bins=per_col_bins or None,
     )
+    if fit_spec:
+        post_process.save_bin_spec(spec, fit_spec)
+        click.echo(f"Wrote bin spec for {len(spec)} columns to {fit_spec}")
+        return
+    binned = post_process.apply_bins(df, spec)
 
     out = Path(output) if output else _default_out(attributes, "_binned")
     out.parent.mkdir(parents=True, exist_ok=True)
-    binned.write_csv(out)
+    if out.suffix == ".parquet":
+        binned.write_parquet(out)
+    else:
+        binned.write_csv(out)
     click.echo(f"Wrote {out}")
 
 
@@ -293,6 +506,21 @@ def fill_unknown_cmd(attributes, output):
     click.echo(f"Wrote {out}")
 
 
+@cli.command("summary")
+@click.argument("attributes", type=click.Path(exists=True))
+@click.argument("trips", type=click.Path(exists=True))
+def summary_cmd(attributes, trips):
+    """Print the per-source summary table (as in the README) as markdown.
+
+    Inputs may be CSV or Parquet and are scanned lazily.
+    """
+    from foundata import tables
+
+    click.echo(
+        tables.summary_table(_scan(attributes), _scan(trips), markdown=True)
+    )
+
+
 # ---------------------------------------------------------------------------
 # filter group
 # ---------------------------------------------------------------------------
@@ -626,8 +854,38 @@ def filter_attributes(
     type=int,
     help="Random seed for reproducibility.",
 )
-def split_cmd(inputs, group, split_pct, output, seed):
+@click.option(
+    "--method",
+    type=click.Choice(["shuffle", "hash"]),
+    default="shuffle",
+    show_default=True,
+    help=(
+        "shuffle: exact split from a seeded shuffle of all group values; "
+        "hash: streaming split from a seeded hash of each group value."
+    ),
+)
+@click.option(
+    "--folds",
+    "-k",
+    type=click.IntRange(min=2),
+    default=None,
+    help="Write K folds instead of train/test (requires --method hash).",
+)
+@click.option(
+    "--stratify",
+    multiple=True,
+    help=(
+        "Balance folds within each value of these columns, e.g. "
+        "--stratify source --stratify year (requires --method hash)."
+    ),
+)
+def split_cmd(inputs, group, split_pct, output, seed, method, folds, stratify):
     """Randomly split CSVs into train/test while keeping group entities intact."""
+    if method == "hash":
+        _hash_split(inputs, group, split_pct, output, seed, folds, stratify)
+        return
+    if folds or stratify:
+        raise click.UsageError("--folds and --stratify require --method hash")
     # 1. Read
     dfs = [(path, pl.read_csv(path)) for path in inputs]
     # 2. Validate group column present
@@ -686,3 +944,367 @@ def split_cmd(inputs, group, split_pct, output, seed):
             f"  {Path(path).name:30s} → {len(train_df):>7} train / {len(test_df):>7} test rows"
         )
     click.echo(f"Wrote outputs to {out_dir}")
+
+
+def _hash_split(inputs, group, split_pct, output, seed, folds, stratify):
+    """Streaming hash-based split: one pass over each input."""
+    from foundata import split
+
+    lfs = [(path, _scan(path)) for path in inputs]
+    for path, lf in lfs:
+        if group not in lf.collect_schema().names():
+            raise click.UsageError(
+                f"Group column '{group}' not found in {path}"
+            )
+
+    reference_path, reference = lfs[0]
+    reference_print = split.fingerprint(reference, group, seed)
+    inconsistent = [
+        (path, lf)
+        for path, lf in lfs[1:]
+        if split.fingerprint(lf, group, seed) != reference_print
+    ]
+    if inconsistent:
+        click.echo(
+            f"ERROR: Group values for '{group}' differ across inputs:", err=True
+        )
+        for path, lf in inconsistent:
+            only_ref, only_other = split.group_differences(reference, lf, group)
+            click.echo(f"  {reference_path} vs {path}:", err=True)
+            if only_ref:
+                click.echo(
+                    f"    Only in {reference_path}: {only_ref}", err=True
+                )
+            if only_other:
+                click.echo(f"    Only in {path}: {only_other}", err=True)
+        sys.exit(1)
+
+    test_pct = None if folds else split_pct
+    if stratify:
+        sources = [
+            lf
+            for _, lf in lfs
+            if set(stratify) <= set(lf.collect_schema().names())
+        ]
+        if not sources:
+            raise click.UsageError(
+                f"No input has all stratify columns {list(stratify)}"
+            )
+        assignments = split.stratified_folds(
+            sources[0], group, list(stratify), seed, test_pct, folds
+        ).collect(engine="streaming")
+        sizes = assignments[split.FOLD].value_counts(sort=True)
+        click.echo(
+            f"Split on '{group}' stratified by {', '.join(stratify)}: "
+            + ", ".join(
+                f"fold {f}: {n}"
+                for f, n in sorted(sizes.iter_rows(), key=lambda r: r[0])
+            )
+        )
+    else:
+        expr = split.fold_expr(group, seed, test_pct, folds)
+        click.echo(
+            f"Split on '{group}' by hash of {reference_print[0]} groups into "
+            + (f"{folds} folds" if folds else f"~{split_pct:.0f}% test")
+        )
+
+    out_dir = Path(output) if output else Path(inputs[0]).parent
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sinks = []
+    for path, lf in lfs:
+        stem, suffix = Path(path).stem, Path(path).suffix
+        if stratify:
+            lf = lf.join(assignments.lazy(), on=group, how="inner")
+        else:
+            lf = lf.filter(pl.col(group).is_not_null()).with_columns(expr)
+        if folds:
+            paths = {
+                i: out_dir / f"{stem}_fold{i}{suffix}" for i in range(folds)
+            }
+        else:
+            paths = {
+                0: out_dir / f"{stem}_train{suffix}",
+                1: out_dir / f"{stem}_test{suffix}",
+            }
+        sinks.extend(split.sink_folds(lf, paths))
+    pl.collect_all(sinks)
+    click.echo(f"Wrote outputs to {out_dir}")
+
+
+# ---------------------------------------------------------------------------
+# sample command
+# ---------------------------------------------------------------------------
+
+
+@cli.command("sample")
+@click.argument("inputs", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--group",
+    "-g",
+    default="pid",
+    show_default=True,
+    help="Column to sample on (persons stay intact across inputs).",
+)
+@click.option(
+    "--size", "-n", type=click.IntRange(min=0), help="Number of groups."
+)
+@click.option(
+    "--fraction",
+    "-f",
+    type=click.FloatRange(min=0, max=1, min_open=True),
+    help="Share of groups to sample, e.g. 0.1.",
+)
+@click.option(
+    "--stratify",
+    multiple=True,
+    help="Sample proportionally within each value of these columns (repeatable).",
+)
+@click.option(
+    "--weight",
+    "-w",
+    default=None,
+    help="Weight column; groups are sampled in proportion to it.",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(),
+    default=None,
+    help="Output directory (default: parent dir of first input).",
+)
+@click.option(
+    "--seed",
+    default=42,
+    show_default=True,
+    type=int,
+    help="Random seed for reproducibility.",
+)
+def sample_cmd(inputs, group, size, fraction, stratify, weight, output, seed):
+    """Draw a stratified and/or weighted sample of groups from CSV/Parquet files."""
+    from foundata import sample
+
+    if (size is None) == (fraction is None):
+        raise click.UsageError("Pass exactly one of --size or --fraction")
+
+    lfs = [(path, _scan(path)) for path in inputs]
+    for path, lf in lfs:
+        if group not in lf.collect_schema().names():
+            raise click.UsageError(
+                f"Group column '{group}' not found in {path}"
+            )
+    needed = set(stratify) | ({weight} if weight else set())
+    sources = [
+        lf for _, lf in lfs if needed <= set(lf.collect_schema().names())
+    ]
+    if not sources:
+        raise click.UsageError(f"No input has all columns {sorted(needed)}")
+
+    ids = sample.sample_groups(
+        sources[0],
+        group=group,
+        n=size,
+        fraction=fraction,
+        strata=stratify,
+        weight=weight,
+        seed=seed,
+    ).collect(engine="streaming")
+    click.echo(f"Sampled {ids.height} groups on '{group}'")
+
+    out_dir = Path(output) if output else Path(inputs[0]).parent
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sinks = []
+    for path, lf in lfs:
+        out = out_dir / f"{Path(path).stem}_sample{Path(path).suffix}"
+        sinks.append(sample.sink_sample(lf, ids.lazy(), group, out))
+    pl.collect_all(sinks)
+    click.echo(f"Wrote outputs to {out_dir}")
+
+
+# ---------------------------------------------------------------------------
+# export-raster command
+# ---------------------------------------------------------------------------
+
+
+@cli.command("export-raster")
+@click.argument("activities", type=click.Path(exists=True))
+@click.option(
+    "--trips",
+    "-t",
+    type=click.Path(exists=True),
+    default=None,
+    help="Trips CSV/Parquet, for the modes raster (otherwise all zero).",
+)
+@click.option(
+    "--output",
+    "-o",
+    required=True,
+    type=click.Path(file_okay=False),
+    help="Output directory for the .npy arrays, pid index and metadata.",
+)
+@click.option(
+    "--resolution",
+    "-r",
+    default=10,
+    show_default=True,
+    type=int,
+    help="Time bin width in minutes (must divide 1440).",
+)
+def export_raster(activities, trips, output, resolution):
+    """Export activities as dense (plans x time bins) uint8 .npy arrays."""
+    from foundata import raster
+
+    if resolution <= 0 or 1440 % resolution:
+        raise click.BadParameter(
+            "must divide 1440", param_hint="'--resolution'"
+        )
+    acts = _scan(activities).collect()
+    trips_df = _scan(trips).collect() if trips else None
+    arrays = raster.rasterise(acts, trips_df, resolution, out_dir=output)
+    n, n_bins = arrays["acts"].shape
+    click.echo(f"Wrote {n} plans x {n_bins} bins to {output}")
+
+
+# ---------------------------------------------------------------------------
+# export-shards command
+# ---------------------------------------------------------------------------
+
+
+@cli.command("export-shards")
+@click.option(
+    "--attributes",
+    "-a",
+    required=True,
+    type=click.Path(exists=True),
+    help="Path to attributes CSV/Parquet.",
+)
+@click.option(
+    "--trips",
+    "-t",
+    required=True,
+    type=click.Path(exists=True),
+    help="Path to trips CSV/Parquet.",
+)
+@click.option(
+    "--activities",
+    type=click.Path(exists=True),
+    default=None,
+    help="Optional activities CSV/Parquet, nested alongside trips.",
+)
+@click.option(
+    "--output",
+    "-o",
+    required=True,
+    type=click.Path(file_okay=False),
+    help="Output directory for the shards and manifest.json.",
+)
+@click.option(
+    "--shards", "-n", type=click.IntRange(min=1), help="Number of shards."
+)
+@click.option(
+    "--plans-per-shard",
+    type=click.IntRange(min=1),
+    help="Target plans per shard (instead of --shards).",
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["parquet", "ipc"]),
+    default="parquet",
+    show_default=True,
+    help="Shard file format (ipc = Arrow IPC).",
+)
+@click.option(
+    "--seed",
+    default=42,
+    show_default=True,
+    type=int,
+    help="Seed for pid-to-shard assignment and shuffling.",
+)
+def export_shards_cmd(
+    attributes, trips, activities, output, shards, plans_per_shard, fmt, seed
+):
+    """Export nested per-plan rows (attributes + trips) into hashed shards."""
+    from foundata import shards as shd
+
+    if (shards is None) == (plans_per_shard is None):
+        raise click.UsageError(
+            "Pass exactly one of --shards or --plans-per-shard"
+        )
+    plans = shd.nest_plans(
+        _scan(attributes),
+        _scan(trips),
+        _scan(activities) if activities else None,
+    )
+    manifest = shd.export_shards(
+        plans,
+        output,
+        n_shards=shards,
+        plans_per_shard=plans_per_shard,
+        seed=seed,
+        fmt=fmt,
+    )
+    click.echo(
+        f"Wrote {manifest['plans']} plans to {manifest['n_shards']} shards in {output}"
+    )
+
+
+# ---------------------------------------------------------------------------
+# fingerprint command
+# ---------------------------------------------------------------------------
+
+
+@cli.command("fingerprint")
+@click.option(
+    "--attributes",
+    "-a",
+    required=True,
+    type=click.Path(exists=True),
+    help="Path to attributes CSV/Parquet.",
+)
+@click.option(
+    "--trips",
+    "-t",
+    required=True,
+    type=click.Path(exists=True),
+    help="Path to trips CSV/Parquet.",
+)
+@click.option(
+    "--output",
+    "-o",
+    required=True,
+    type=click.Path(file_okay=False),
+    help="Output directory for sequences.parquet and index.parquet.",
+)
+@click.option(
+    "--resolution",
+    "-r",
+    default=60,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Time bin width in minutes used in sequence keys.",
+)
+@click.option(
+    "--top",
+    default=10,
+    show_default=True,
+    type=int,
+    help="Number of most common sequences to print.",
+)
+def fingerprint_cmd(attributes, trips, output, resolution, top):
+    """Deduplicate plans into unique activity/mode/time sequences."""
+    from foundata import sequences as sq
+
+    seqs, index = sq.build_index(
+        _scan(attributes), _scan(trips), resolution=resolution
+    )
+    out_dir = Path(output)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    seqs.write_parquet(out_dir / "sequences.parquet")
+    index.write_parquet(out_dir / "index.parquet")
+    click.echo(
+        f"{index.height} plans share {seqs.height} unique sequences "
+        f"({seqs.height / max(index.height, 1):.1%})"
+    )
+    for row in seqs.head(top).iter_rows(named=True):
+        click.echo(f"  {row['n_plans']:>8}  {row['key']}")
+    click.echo(f"Wrote {out_dir}")
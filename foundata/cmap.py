@@ -2,12 +2,30 @@ from pathlib import Path
 
 import polars as pl
 
-from .utils import expand_root, get_config_path, sample_to_euro, table_joiner
+from . import files, ingest, sources, weather
+from .times import datetime_to_minutes
+from .utils import (
+    expand_root,
+    get_config_path,
+    sample_to_euro,
+    table_joiner,
+)
 
 USD_TO_EURO = 0.85
 
 SOURCE = "cmap"
 
+# Chicago city-centre coordinates (weather for the whole CMAP metro area)
+CHICAGO = (41.85, -87.65)
+
+CSV_OPTIONS = {"ignore_errors": True}
+RAW_FILES = [
+    ("household.csv", CSV_OPTIONS),
+    ("person.csv", CSV_OPTIONS),
+    ("place.csv", CSV_OPTIONS),
+    ("location.csv", {}),
+]
+
 
 def load(
     data_root: str | Path,
@@ -15,14 +33,16 @@ def load(
     hh_config: dict,
     person_config: dict,
     trips_config: dict,
+    cache_locations: bool = False,
 ) -> tuple[pl.DataFrame, pl.DataFrame]:
     print("Loading CMAP...")
-    rurality = load_rurality(configs_root)
+    locations = load_location_index(
+        data_root, configs_root, cache=cache_locations
+    )
 
     print("loading households...")
     hhs = load_households(data_root, hh_config)
-    hh_locations = load_home_locations(data_root, rurality_table=rurality)
-    hhs = hhs.join(hh_locations, on="hid", how="left")
+    hhs = hhs.join(home_locations(locations), on="hid", how="left")
 
     print("loading persons...")
     persons = load_persons(data_root, person_config)
@@ -30,10 +50,7 @@ def load(
     attributes = table_joiner(hhs, persons, on="hid")
 
     print("loading trips...")
-    rurality_mapping = load_locations(data_root, rurality_table=rurality)
-    trips = load_trips(
-        data_root, trips_config, rurality_mapping=rurality_mapping
-    )
+    trips = load_trips(data_root, trips_config, rurality_mapping=locations)
 
     weather = load_weather()
     attributes = attributes.join(
@@ -55,9 +72,29 @@ def load(
     return attributes, trips
 
 
+def _loader_options(use_cache: bool = False, **_) -> dict:
+    return {"configs_root": get_config_path(), "cache_locations": use_cache}
+
+
+SPEC = sources.SourceSpec(
+    name=SOURCE,
+    data_dir="CMAP",
+    loader=load,
+    configs={
+        "hh_config": "hh_dictionary.yaml",
+        "person_config": "person_dictionary.yaml",
+        "trips_config": "trip_dictionary.yaml",
+    },
+    raw_files=RAW_FILES,
+    options=_loader_options,
+)
+
+
 def load_households(root: str | Path, config: dict) -> pl.DataFrame:
     column_mapping = config["column_mappings"]
-    hhs = pl.read_csv(root / "household.csv", ignore_errors=True)
+    hhs = ingest.read_csv(
+        root / "household.csv", columns=list(column_mapping), **CSV_OPTIONS
+    )
 
     hhs = hhs.select(column_mapping.keys()).rename(column_mapping)
 
@@ -88,7 +125,9 @@ def load_households(root: str | Path, config: dict) -> pl.DataFrame:
 
 def load_persons(root: str | Path, config: dict) -> pl.DataFrame:
     column_mapping = config["column_mappings"]
-    persons = pl.read_csv(root / "person.csv", ignore_errors=True)
+    persons = ingest.read_csv(
+        root / "person.csv", columns=list(column_mapping), **CSV_OPTIONS
+    )
 
     persons = persons.select(column_mapping.keys()).rename(column_mapping)
 
@@ -134,13 +173,8 @@ def load_persons(root: str | Path, config: dict) -> pl.DataFrame:
 
 
 def load_weather() -> pl.DataFrame:
-    """Load daily weather data for Chicago."""
-    csv = get_config_path("cmap", "weather_chicago.csv")
-    return (
-        pl.read_csv(csv)
-        .with_columns(rain=pl.col("precipitation_mm") > 0)
-        .drop("precipitation_mm")
-    )
+    """Load daily weather data for Chicago from the weather store."""
+    return weather.daily(*CHICAGO)
 
 
 def load_rurality(configs_root: Path) -> pl.DataFrame:
@@ -152,111 +186,109 @@ def load_rurality(configs_root: Path) -> pl.DataFrame:
     return mapping
 
 
-def load_locations(
-    root: str | Path, rurality_table: pl.DataFrame
-) -> pl.DataFrame:
-    root = expand_root(root)
-    locations = (
-        pl.read_csv(
-            root / "location.csv",
-            columns=[
-                "sampno",
-                "locno",
-                "state_fips",
-                "county_fips",
-                "tract_fips",
-            ],
-        )
-        .with_columns(
-            pl.col("state_fips").cast(pl.Utf8).str.zfill(2),
-            pl.col("county_fips").cast(pl.Utf8).str.zfill(3),
-            pl.col("tract_fips").cast(pl.Utf8).str.zfill(6),
-        )
-        .with_columns(
-            fips=(
-                pl.col("state_fips")
-                + pl.col("county_fips")
-                + pl.col("tract_fips")
-            ).str.replace_all("-", "0")
-        )
-        .drop(["state_fips", "county_fips", "tract_fips"])
-    )
+def location_index_path(root: str | Path, configs_root: str | Path) -> Path:
+    """Cache path for the location index built from `root`/location.csv.
 
-    locations = (
-        locations.join(
-            rurality_table,
-            left_on="fips",
-            right_on="tractFIPS",
-            how="left",
-            maintain_order="left_right",
-        )
-        .with_columns(hh_zone=pl.col("hh_zone").fill_null("unknown"))
-        .drop("fips")
+    Stored next to the rurality table and keyed on the content hash of
+    both inputs, so a new release or an updated table misses the cache.
+    """
+    cmap_configs = Path(configs_root) / "cmap"
+    digest = (
+        files.file_digest(expand_root(root) / "location.csv")[:12]
+        + files.file_digest(cmap_configs / "RuralSubUrban_T.csv")[:8]
     )
+    return cmap_configs / f"location_index.{digest}.parquet"
 
-    return locations
 
-
-def load_home_locations(
+def build_location_index(
     root: str | Path, rurality_table: pl.DataFrame
 ) -> pl.DataFrame:
+    """Zone and home flag of every (sampno, locno) in location.csv.
+
+    FIPS codes are zero-padded and concatenated into tract ids and joined
+    against the rurality table once; unmatched tracts get "unknown".
+    """
     root = expand_root(root)
-    locations = (
-        pl.read_csv(
+    return (
+        ingest.read_csv(
             root / "location.csv",
             columns=[
                 "sampno",
+                "locno",
                 "state_fips",
                 "county_fips",
                 "tract_fips",
                 "home",
             ],
         )
-        .filter(pl.col("home") == 1)
-        .drop("home")
+        .lazy()
         .with_columns(
-            pl.col("state_fips").cast(pl.Utf8).str.zfill(2),
-            pl.col("county_fips").cast(pl.Utf8).str.zfill(3),
-            pl.col("tract_fips").cast(pl.Utf8).str.zfill(6),
+            fips=pl.concat_str(
+                pl.col("state_fips").cast(pl.Utf8).str.zfill(2),
+                pl.col("county_fips").cast(pl.Utf8).str.zfill(3),
+                pl.col("tract_fips").cast(pl.Utf8).str.zfill(6),
+            ).str.replace_all("-", "0"),
+            home=pl.col("home") == 1,
         )
-        .with_columns(
-            fips=(
-                pl.col("state_fips")
-                + pl.col("county_fips")
-                + pl.col("tract_fips")
-            ).str.replace_all("-", "0")
-        )
-        .drop(["state_fips", "county_fips", "tract_fips"])
-    )
-
-    locations = (
-        locations.join(
-            rurality_table,
+        .join(
+            rurality_table.lazy(),
             left_on="fips",
             right_on="tractFIPS",
             how="left",
             maintain_order="left_right",
         )
-        .with_columns(hh_zone=pl.col("hh_zone").fill_null("unknown"))
-        .drop("fips")
-    ).rename({"sampno": "hid"})
+        .select(
+            "sampno",
+            "locno",
+            pl.col("hh_zone").fill_null("unknown"),
+            "home",
+        )
+        .collect()
+    )
+
 
+def load_location_index(
+    root: str | Path,
+    configs_root: str | Path,
+    rurality_table: pl.DataFrame | None = None,
+    cache: bool = False,
+) -> pl.DataFrame:
+    """Location index shared by the household and trip zone lookups.
+
+    With `cache`, the index is read from (or written to) a Parquet file
+    alongside configs/cmap/RuralSubUrban_T.csv, see `location_index_path`.
+    """
+    path = location_index_path(root, configs_root) if cache else None
+    if path is not None and path.exists():
+        return pl.read_parquet(path)
+    if rurality_table is None:
+        rurality_table = load_rurality(Path(configs_root))
+    index = build_location_index(root, rurality_table)
+    if path is not None:
+        index.write_parquet(path, compression="zstd")
+    return index
+
+
+def home_locations(location_index: pl.DataFrame) -> pl.DataFrame:
+    """Home zone per household from the location index."""
     # some households have more than one location flagged home==1 in the
     # source data (different locno, occasionally different tract); keep a
     # single row per household so the join in load() doesn't duplicate rows
-    locations = locations.unique(
-        subset=["hid"], keep="first", maintain_order=True
+    return (
+        location_index.filter(pl.col("home"))
+        .select(pl.col("sampno").alias("hid"), "hh_zone")
+        .unique(subset=["hid"], keep="first", maintain_order=True)
     )
 
-    return locations
-
 
 def load_trips(
     root: str | Path, config: dict, rurality_mapping: pl.DataFrame | None = None
 ) -> pl.DataFrame:
-    trips = pl.read_csv(root / "place.csv", ignore_errors=True)
-
     column_mapping = config["column_mappings"]
+    trips = ingest.read_csv(
+        root / "place.csv", columns=list(column_mapping), **CSV_OPTIONS
+    )
+
     day_mapping = config["day"]
     mode_mapping = config["mode"]
     act_mapping = config["purpose"]
@@ -305,14 +337,8 @@ def load_trips(
     )
 
     trips = trips.with_columns(
-        tst=(
-            pl.col("tst").dt.hour().cast(pl.Int32) * 60
-            + pl.col("tst").dt.minute()
-        ),
-        tet=(
-            pl.col("tet").dt.hour().cast(pl.Int32) * 60
-            + pl.col("tet").dt.minute()
-        ),
+        tst=datetime_to_minutes(pl.col("tst")),
+        tet=datetime_to_minutes(pl.col("tet")),
     )
 
     # deal with trips that span into next day
@@ -0,0 +1,101 @@
+"""Compiled cache for the YAML config dictionaries and template.
+
+Parsing the ~30 YAML files under `configs/` dominates startup, and some
+(e.g. ODiN, NTS) are large code-to-value maps. Each file is parsed once
+(with the libyaml C loader when available), its value mappings are checked
+against the template with `config_validator`, and the result is pickled to
+`<dir>/.compiled/<stem>.<digest>.pkl`, keyed on a hash of the YAML bytes.
+Later loads of an unchanged file unpickle the compiled dict, which is
+orders of magnitude faster than re-parsing, and skip re-validation; editing
+a YAML changes its digest, so it is recompiled on next load.
+"""
+
+import pickle
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+from foundata.files import atomic_write, file_digest
+
+try:
+    _Loader = yaml.CSafeLoader
+except AttributeError:  # PyYAML built without libyaml
+    _Loader = yaml.SafeLoader
+
+COMPILED_DIR = ".compiled"
+
+# template section that each dictionary's value mappings are checked against
+_SECTIONS = {
+    "hh": "attributes",
+    "person": "attributes",
+    "trip": "trips",
+    "stage": "trips",
+}
+
+
+def compiled_path(path: str | Path, digest: Optional[str] = None) -> Path:
+    """Path of the compiled pickle for a YAML file."""
+    path = Path(path)
+    if digest is None:
+        digest = file_digest(path)
+    return path.parent / COMPILED_DIR / f"{path.stem}.{digest}.pkl"
+
+
+def parse(path: str | Path) -> dict:
+    """Parse a YAML file without the cache."""
+    with open(path) as handle:
+        return yaml.load(handle, Loader=_Loader)
+
+
+def template_section(path: str | Path) -> Optional[str]:
+    """Template section a dictionary maps to, inferred from its file name."""
+    prefix = Path(path).stem.split("_")[0]
+    return _SECTIONS.get(prefix)
+
+
+def validate(config: dict, path: str | Path) -> list[str]:
+    """Template value-mapping errors for a dictionary (empty if unknown)."""
+    from foundata import config_validator, utils
+
+    section = template_section(path)
+    if section is None or not isinstance(config, dict):
+        return []
+    template = utils.get_template_attributes()
+    if section == "trips":
+        template = utils.get_template_trips()
+    return config_validator.validate_value_mappings(config, template)
+
+
+def compile_config(path: str | Path, check: bool = True) -> Path:
+    """Parse, validate and pickle a YAML file; return the compiled path."""
+    path = Path(path)
+    target = compiled_path(path)
+    config = parse(path)
+    if check:
+        for error in validate(config, path):
+            print(f"WARNING: {path.name}: {error}")
+    for stale in target.parent.glob(f"{path.stem}.*.pkl"):
+        if stale != target:  # may have just been written by another task
+            stale.unlink(missing_ok=True)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(target, "wb") as handle:
+        pickle.dump(config, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    return target
+
+
+def load(path: str | Path, check: bool = True) -> dict:
+    """Load a YAML config via its compiled pickle, compiling it if stale.
+
+    Falls back to parsing the YAML directly if the compiled cache cannot
+    be written (e.g. a read-only install) or read back (e.g. removed or
+    half-written by a concurrent task).
+    """
+    target = compiled_path(path)
+    try:
+        if not target.exists():
+            compile_config(path, check=check)
+        with open(target, "rb") as handle:
+            return pickle.load(handle)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return parse(path)
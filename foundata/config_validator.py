@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from foundata import utils
+from foundata import config_cache, utils
 
 PROGRAMMATIC_FIELDS = {"country", "source", "year", "month", "day"}
 
@@ -142,17 +142,17 @@ def validate_source(
     trip_path = source_dir / "trip_dictionary.yaml"
 
     if hh_path.exists():
-        hh_config = utils.load_yaml_config(hh_path)
+        hh_config = config_cache.load(hh_path, check=False)
     else:
         warnings.append(f"Missing hh_dictionary.yaml in {source_dir}")
 
     if person_path.exists():
-        person_config = utils.load_yaml_config(person_path)
+        person_config = config_cache.load(person_path, check=False)
     else:
         warnings.append(f"Missing person_dictionary.yaml in {source_dir}")
 
     if trip_path.exists():
-        trip_config = utils.load_yaml_config(trip_path)
+        trip_config = config_cache.load(trip_path, check=False)
     else:
         warnings.append(f"Missing trip_dictionary.yaml in {source_dir}")
 
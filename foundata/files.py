@@ -0,0 +1,44 @@
+"""File helpers shared by the on-disk caches.
+
+Content digests key cache entries, and cache files are written through a
+temporary sibling unique to the writing process and thread, then renamed
+into place, so concurrent tasks never read or clobber a half-written file.
+"""
+
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+
+def file_digest(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    """blake2b digest of a file's contents, read in chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        while chunk := handle.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tmp_path(path: str | Path) -> Path:
+    """Temporary sibling of `path` unique to this process and thread."""
+    path = Path(path)
+    return path.with_name(
+        f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    )
+
+
+@contextmanager
+def atomic_write(path: str | Path, mode: str = "w") -> Iterator[IO]:
+    """Open a temporary sibling of `path` for writing, and rename it over
+    `path` once the block completes; on error it is removed instead."""
+    tmp = tmp_path(path)
+    try:
+        with open(tmp, mode) as handle:
+            yield handle
+        tmp.replace(path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
@@ -1,11 +1,28 @@
+import threading
 from typing import Optional
 
 import polars as pl
 
 from foundata import utils
 
+# {source: {"trips": n, "midnight": n, "overlap": n}} for every day_wrap
+# call, kept per thread so tasks on a thread pool count their own trips
+_local = threading.local()
 
-def day_wrap(trips: pl.DataFrame) -> pl.DataFrame:
+
+def _day_wraps() -> dict[str, dict[str, int]]:
+    return _local.__dict__.setdefault("day_wraps", {})
+
+
+def _seen(flag: pl.Expr, first: pl.Expr) -> pl.Expr:
+    """True from the first flagged row of each pid onwards, on data where
+    each pid's rows are contiguous (`first` marks each pid's first row)."""
+    total = flag.cast(pl.Int32).cum_sum()
+    before = pl.when(first).then(total - flag.cast(pl.Int32)).forward_fill()
+    return total > before
+
+
+def day_wrap(trips: pl.DataFrame, source: Optional[str] = None) -> pl.DataFrame:
     """
     Look for trips with negative duration or time inconsistencies (overlapping trips).
     If found, add 1440 minutes to the tst and tet of the trip and all subsequent trips of the same pid.
@@ -16,42 +33,70 @@ def day_wrap(trips: pl.DataFrame) -> pl.DataFrame:
     inconsistencies signal corrupt data — downstream filters (e.g.
     `filter.time_consistent`, `filter.feasible_trips`) are responsible for
     catching and dropping those.
+
+    Both corrections are computed in one pass of cumulative flags over
+    pid-contiguous rows (rows are stably grouped by pid first if needed,
+    and returned in their original order). The number of trips shifted by
+    each correction is recorded under `source`, see `day_wrap_counts`.
     """
+    contiguous = trips["pid"].is_sorted()
+    if not contiguous:
+        trips = trips.with_row_index("_row").sort("pid", maintain_order=True)
+
+    pid, tst, tet = pl.col("pid"), pl.col("tst"), pl.col("tet")
+    first = (pid != pid.shift(1)).fill_null(True)
+    day, zero = pl.lit(1440, pl.Int32), pl.lit(0, pl.Int32)
+
     # first consider case where trip end has moved past midnight.
     # This is identified by tet < tst.
-    trips = (
-        trips.with_columns(
-            flag=pl.when(pl.col("tet") < pl.col("tst")).then(1).otherwise(0)
-        )
-        .with_columns(
-            flag=pl.col("flag").cum_sum().over("pid").clip(upper_bound=1)
-        )
-        .with_columns(
-            tst=pl.col("tst")
-            + pl.col("flag").shift(1, fill_value=0).over("pid") * 1440,
-            tet=pl.col("tet") + (pl.col("flag") * 1440),
-        )
-    ).drop("flag")
+    midnight = _seen((tet < tst).fill_null(False), first)
+    after_midnight = midnight.shift(1).fill_null(False) & ~first
+    tst = tst + pl.when(after_midnight).then(day).otherwise(zero)
+    tet = tet + pl.when(midnight).then(day).otherwise(zero)
 
     # also check for case where tst has moved past midnight.
-    trips = (
-        trips.with_columns(
-            flag=pl.when(pl.col("tst") < pl.col("tet").shift(1).over("pid"))
-            .then(1)
-            .otherwise(0)
-        )
-        .with_columns(
-            flag=pl.col("flag").cum_sum().over("pid").clip(upper_bound=1)
-        )
-        .with_columns(
-            tst=pl.col("tst") + (pl.col("flag") * 1440),
-            tet=pl.col("tet") + (pl.col("flag") * 1440),
-        )
-    ).drop("flag")
-
+    overlap = _seen(
+        (tst < pl.when(~first).then(tet.shift(1))).fill_null(False), first
+    )
+    shift = pl.when(overlap).then(day).otherwise(zero)
+
+    trips = trips.with_columns(
+        tst=tst + shift,
+        tet=tet + shift,
+        _midnight=midnight,
+        _overlap=overlap,
+    )
+
+    counts = trips.select(
+        trips=pl.len(),
+        midnight=pl.col("_midnight").sum(),
+        overlap=pl.col("_overlap").sum(),
+    ).row(0, named=True)
+    totals = _day_wraps().setdefault(
+        source or "unknown", dict.fromkeys(counts, 0)
+    )
+    for key, value in counts.items():
+        totals[key] += value
+
+    trips = trips.drop("_midnight", "_overlap")
+    if not contiguous:
+        trips = trips.sort("_row").drop("_row")
     return trips
 
 
+def day_wrap_counts(reset: bool = False) -> dict[str, dict[str, int]]:
+    """Trips seen and shifted by `day_wrap` so far in this thread, by source.
+
+    "midnight" counts trips shifted because a trip ended before it started,
+    "overlap" those shifted because a trip started before the previous one
+    ended. With `reset`, the counts are cleared after reading them.
+    """
+    counts = {source: dict(c) for source, c in _day_wraps().items()}
+    if reset:
+        _day_wraps().clear()
+    return counts
+
+
 def _cast_df(df: pl.DataFrame, template: dict) -> pl.DataFrame:
     for col, cnfg in template.items():
         if col not in df.columns:
@@ -115,14 +160,12 @@ def missing_columns(
     return attributes, trips
 
 
-def unknown_to_null(df: pl.DataFrame) -> pl.DataFrame:
-    """Convert 'unknown' values in string columns to null."""
-    for col in df.columns:
-        if df.schema[col] == pl.String:
-            df = df.with_columns(
-                pl.when(pl.col(col) == "unknown")
-                .then(None)
-                .otherwise(pl.col(col))
-                .alias(col)
-            )
-    return df
+def unknown_to_null(
+    df: pl.DataFrame | pl.LazyFrame,
+) -> pl.DataFrame | pl.LazyFrame:
+    """Convert 'unknown' values in string columns to null.
+
+    All string columns are converted in a single `with_columns`, so this
+    also composes into lazy/streaming queries.
+    """
+    return df.with_columns(pl.col(pl.String).replace("unknown", None))
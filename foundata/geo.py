@@ -0,0 +1,187 @@
+"""Crow-fly distances between zone centroids.
+
+`ZoneDistances` maps zone codes to centroid indices and returns O-D
+distances for whole columns of trips at once. Distances are gathered from a
+precomputed N×N matrix when one is available (e.g. the memory-mapped KTDB
+matrix), and otherwise computed on the fly with vectorised haversine in
+batches, keeping recently used zone pairs in an LRU cache so repeated pairs
+(and repeated calls across survey years) are not recomputed. The cache is
+held as sorted NumPy key/value arrays and probed with `np.searchsorted`, so
+lookups stay vectorised; batches larger than the cache bypass it.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import polars as pl
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine(
+    lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray
+) -> np.ndarray:
+    """Element-wise great-circle distance (km, float32) between points."""
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(x, dtype=np.float64))
+        for x in (lat1, lon1, lat2, lon2)
+    )
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    return distance.astype(np.float32)
+
+
+def haversine_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Return N×N distance matrix (km, float32) for the given lat/lon arrays."""
+    return haversine(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+
+class ZoneDistances:
+    """O-D distance lookups for a fixed set of zone centroids.
+
+    Args:
+        zones: Zone codes, one per centroid.
+        lat: Centroid latitudes, aligned with `zones`.
+        lon: Centroid longitudes, aligned with `zones`.
+        matrix: Optional precomputed N×N distance matrix (km) in `zones`
+            order; distances are gathered from it instead of computed.
+        cache_size: Number of zone pairs kept in the LRU cache.
+        batch_size: Number of uncached pairs computed per numpy batch.
+    """
+
+    def __init__(
+        self,
+        zones: list[str],
+        lat: np.ndarray,
+        lon: np.ndarray,
+        matrix: Optional[np.ndarray] = None,
+        cache_size: int = 1_000_000,
+        batch_size: int = 1_000_000,
+    ):
+        self.zones = list(zones)
+        self.index = {zone: i for i, zone in enumerate(self.zones)}
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        if matrix is not None and matrix.shape != (len(zones), len(zones)):
+            raise ValueError(
+                f"matrix shape {matrix.shape} does not match {len(zones)} zones"
+            )
+        self.matrix = matrix
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        # LRU cache: sorted pair keys, their distances and last-use calls
+        self._keys = np.empty(0, dtype=np.int64)
+        self._values = np.empty(0, dtype=np.float32)
+        self._used = np.empty(0, dtype=np.int64)
+        self._calls = 0
+
+    @classmethod
+    def from_csv(
+        cls,
+        path: str | Path,
+        zone_col: str = "zone",
+        matrix: Optional[np.ndarray] = None,
+        **kwargs,
+    ) -> "ZoneDistances":
+        """Build from a centroid CSV with `zone_col`, `lat` and `lon`."""
+        centroids = pl.read_csv(path, schema_overrides={zone_col: pl.String})
+        return cls(
+            centroids[zone_col].to_list(),
+            centroids["lat"].to_numpy(),
+            centroids["lon"].to_numpy(),
+            matrix=matrix,
+            **kwargs,
+        )
+
+    def fingerprint(self) -> str:
+        """Digest of the zone codes and centroid coordinates, to check a
+        precomputed matrix was built from the same centroids."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update("\n".join(self.zones).encode())
+        digest.update(self.lat.tobytes())
+        digest.update(self.lon.tobytes())
+        return digest.hexdigest()
+
+    def indices(self, zones: pl.Series) -> np.ndarray:
+        """Centroid index of each zone code, -1 where unknown or null."""
+        return (
+            zones.cast(pl.String)
+            .replace_strict(self.index, default=-1, return_dtype=pl.Int32)
+            .fill_null(-1)
+            .to_numpy()
+        )
+
+    def distances(self, ozone: pl.Series, dzone: pl.Series) -> pl.Series:
+        """Distance (km) for each O-D pair; null where either zone is unknown."""
+        o, d = self.indices(ozone), self.indices(dzone)
+        valid = (o >= 0) & (d >= 0)
+        distance = np.full(len(o), np.nan, dtype=np.float32)
+        if self.matrix is not None:
+            distance[valid] = self.matrix[o[valid], d[valid]]
+        else:
+            distance[valid] = self.pair_distances(o[valid], d[valid])
+        return pl.Series("distance", distance).fill_nan(None)
+
+    def pair_distances(self, o: np.ndarray, d: np.ndarray) -> np.ndarray:
+        """Distances between centroid index pairs, via the LRU cache.
+
+        Batches with more pairs than `cache_size` skip the cache: finding
+        their unique pairs costs more than computing every distance.
+        """
+        if len(o) > self.cache_size:
+            return self._compute(o, d)
+        # distance is symmetric, so (a, b) and (b, a) share a cache entry
+        lo, hi = np.minimum(o, d), np.maximum(o, d)
+        keys = lo.astype(np.int64) * len(self.zones) + hi
+        unique, inverse = np.unique(keys, return_inverse=True)
+        self._calls += 1
+
+        pos = np.searchsorted(self._keys, unique)
+        hit = pos < len(self._keys)
+        hit[hit] = self._keys[pos[hit]] == unique[hit]
+        values = np.empty(len(unique), dtype=np.float32)
+        values[hit] = self._values[pos[hit]]
+        self._used[pos[hit]] = self._calls
+
+        missing = np.flatnonzero(~hit)
+        a, b = np.divmod(unique[missing], len(self.zones))
+        values[missing] = self._compute(a, b)
+        self._remember(unique[missing], values[missing])
+        return values[inverse.reshape(-1)]
+
+    def _compute(self, o: np.ndarray, d: np.ndarray) -> np.ndarray:
+        """Haversine distances between index pairs, in numpy batches."""
+        values = np.empty(len(o), dtype=np.float32)
+        for start in range(0, len(o), self.batch_size):
+            a = o[start : start + self.batch_size]
+            b = d[start : start + self.batch_size]
+            values[start : start + len(a)] = haversine(
+                self.lat[a], self.lon[a], self.lat[b], self.lon[b]
+            )
+        return values
+
+    def _remember(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """Add new (sorted, uncached) pairs, evicting the least recently
+        used beyond `cache_size`."""
+        if self.cache_size <= 0 or len(keys) == 0:
+            return
+        keys = np.concatenate([self._keys, keys])
+        values = np.concatenate([self._values, values])
+        used = np.concatenate(
+            [self._used, np.full(len(values) - len(self._used), self._calls)]
+        )
+        if len(keys) > self.cache_size:
+            keep = np.argpartition(-used, self.cache_size - 1)
+            keep = keep[: self.cache_size]
+            keys, values, used = keys[keep], values[keep], used[keep]
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._values, self._used = (
+            keys[order],
+            values[order],
+            used[order],
+        )
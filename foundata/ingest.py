@@ -0,0 +1,334 @@
+"""Parquet cache for raw survey text files.
+
+Raw releases (CSV/TAB) are parsed once and transcoded to zstd-compressed
+Parquet in a cache directory next to the data root (`<data_root>_cache` by
+default). Each cached file is keyed on the raw file's relative path and the
+parse options used to read it, and is considered fresh while the raw
+file's size, mtime and content hash still match the manifest. Files are
+streamed to Parquet, so transcoding never holds a whole table in memory;
+a file that does not parse in full is recorded as uncacheable and read
+from text (projected) instead. Loaders read
+raw files through `read_csv`, which serves projected columns from the
+cache when it is enabled and falls back to parsing the text file
+otherwise, so behaviour is unchanged when no cache is configured (e.g. in
+tests against fixture data).
+"""
+
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import polars as pl
+
+from foundata.files import atomic_write, file_digest, tmp_path
+
+try:
+    import fcntl
+except ImportError:  # Windows: threads are still serialised
+    fcntl = None
+
+CACHE_SUFFIX = "_cache"
+MANIFEST_NAME = "manifest.json"
+
+_data_root: Optional[Path] = None
+_cache_root: Optional[Path] = None
+_manifest_lock = threading.Lock()
+
+
+def cache_root_for(data_root: str | Path) -> Path:
+    """Default cache directory for `data_root`, a sibling named `<name>_cache`."""
+    data_root = Path(data_root).expanduser().resolve()
+    return data_root.parent / f"{data_root.name}{CACHE_SUFFIX}"
+
+
+def enable_cache(
+    data_root: str | Path, cache_root: Optional[str | Path] = None
+) -> Path:
+    """Serve raw files under `data_root` from the Parquet cache.
+
+    Returns the cache directory in use.
+    """
+    global _data_root, _cache_root
+    _data_root = Path(data_root).expanduser().resolve()
+    _cache_root = (
+        Path(cache_root).expanduser().resolve()
+        if cache_root is not None
+        else cache_root_for(_data_root)
+    )
+    return _cache_root
+
+
+def disable_cache() -> None:
+    global _data_root, _cache_root
+    _data_root = None
+    _cache_root = None
+
+
+def _options_key(options: dict) -> str:
+    encoded = json.dumps(options, sort_keys=True, default=str)
+    return hashlib.blake2b(encoded.encode(), digest_size=6).hexdigest()
+
+
+def _load_manifest(cache_root: Path) -> dict:
+    """The cache manifest; empty if missing or unreadable, in which case
+    every file is re-checked and re-transcoded."""
+    path = cache_root / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError) as err:
+        print(f"WARNING: ignoring unreadable cache manifest {path} ({err})")
+        return {}
+
+
+@contextmanager
+def _locked(cache_root: Path) -> Iterator[None]:
+    """Hold the manifest lock, across threads and (where `fcntl` is
+    available) processes sharing the cache."""
+    cache_root.mkdir(parents=True, exist_ok=True)
+    with _manifest_lock, open(cache_root / f"{MANIFEST_NAME}.lock", "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def _save_entry(cache_root: Path, key: str, entry: dict) -> None:
+    """Merge one entry into the manifest on disk.
+
+    The manifest is re-read under the lock, so concurrent tasks caching
+    different files keep each other's entries, and written through a
+    temporary file unique to this writer.
+    """
+    with _locked(cache_root):
+        manifest = _load_manifest(cache_root)
+        manifest[key] = entry
+        with atomic_write(cache_root / MANIFEST_NAME) as handle:
+            json.dump(manifest, handle, indent=2, sort_keys=True)
+
+
+def _cache_key(path: Path, options: dict) -> Optional[tuple[str, Path]]:
+    """Manifest key and cache file path for `path`, or None if the file is
+    not under the cached data root."""
+    if _data_root is None or _cache_root is None:
+        return None
+    try:
+        rel = path.expanduser().resolve().relative_to(_data_root)
+    except ValueError:
+        return None
+    opts = _options_key(options)
+    key = f"{rel.as_posix()}?{opts}"
+    return key, _cache_root / rel.parent / f"{rel.name}.{opts}.parquet"
+
+
+def _is_fresh(path: Path, entry: Optional[dict], cache_path: Path) -> bool:
+    """Check a manifest entry against the raw file.
+
+    Size and mtime are compared first; the content hash is only recomputed
+    when the mtime has moved (e.g. a re-download of an identical release),
+    in which case the entry's mtime is refreshed in place on a match.
+    Entries of uncacheable files (with an "error") have no cache file.
+    """
+    if entry is None:
+        return False
+    if "error" not in entry and not cache_path.exists():
+        return False
+    stat = path.stat()
+    if stat.st_size != entry["size"]:
+        return False
+    if stat.st_mtime_ns == entry["mtime_ns"]:
+        return True
+    if file_digest(path) != entry["digest"]:
+        return False
+    entry["mtime_ns"] = stat.st_mtime_ns
+    return True
+
+
+def ingest_file(
+    path: str | Path, force: bool = False, **options
+) -> Optional[Path]:
+    """Transcode one raw file to the cache, parsing it with `options`.
+
+    Returns the cache file path, or None if caching is not enabled for
+    `path` or the file does not parse in full with `options` (it is then
+    read from text, and not re-tried until it changes). Files whose cache
+    entry is still fresh are skipped unless `force` is set.
+    """
+    path = Path(path)
+    found = _cache_key(path, options)
+    if found is None:
+        return None
+    key, cache_path = found
+    entry = _load_manifest(_cache_root).get(key)
+    mtime_ns = entry["mtime_ns"] if entry else None
+    if not force and _is_fresh(path, entry, cache_path):
+        if entry["mtime_ns"] != mtime_ns:
+            _save_entry(_cache_root, key, entry)
+        return None if "error" in entry else cache_path
+
+    print(f"Ingesting {path} -> {cache_path}")
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = tmp_path(cache_path)
+    stat = path.stat()
+    entry = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "digest": file_digest(path),
+        "options": options,
+    }
+    try:
+        if _scannable(options):
+            # streamed in batches, never materialising the whole table
+            pl.scan_csv(path, **options).sink_parquet(tmp, compression="zstd")
+        else:
+            pl.read_csv(path, **options).write_parquet(tmp, compression="zstd")
+    except pl.exceptions.PolarsError as err:
+        tmp.unlink(missing_ok=True)
+        print(
+            f"WARNING: could not parse all of {path} ({err}); not caching "
+            "it, reading text instead"
+        )
+        _save_entry(_cache_root, key, {**entry, "error": str(err)})
+        return None
+    tmp.replace(cache_path)
+
+    _save_entry(
+        _cache_root,
+        key,
+        {**entry, "cache": cache_path.relative_to(_cache_root).as_posix()},
+    )
+    return cache_path
+
+
+def _cached(path: Path, options: dict) -> Optional[Path]:
+    """Fresh cache file for `path`, or None to read the text file."""
+    if _cache_key(path, options) is None:
+        return None
+    try:
+        return ingest_file(path, **options)
+    except OSError as err:
+        print(f"WARNING: could not cache {path} ({err}), reading text")
+        return None
+
+
+def _scannable(options: dict) -> bool:
+    # scan_csv only decodes utf8; other encodings go through read_csv
+    return options.get("encoding", "utf8") in ("utf8", "utf8-lossy")
+
+
+def scan_csv(
+    path: str | Path,
+    columns: Optional[list[str]] = None,
+    where: Optional[pl.Expr] = None,
+    **options,
+) -> pl.LazyFrame:
+    """Lazy counterpart of `read_csv`, with the same arguments.
+
+    The projection and predicate are applied to a scan of the cached
+    Parquet (or of the text file when it is not cached), so nothing is read
+    until the frame is collected, and several files can be collected
+    together with `pl.collect_all`. Text files in encodings that cannot be
+    scanned are read eagerly (projected when there is no predicate).
+    """
+    path = Path(path)
+    cache_path = _cached(path, options)
+    if cache_path is not None:
+        lazy = pl.scan_parquet(cache_path)
+    elif _scannable(options):
+        lazy = pl.scan_csv(path, **options)
+    elif where is None:
+        return pl.read_csv(path, columns=columns, **options).lazy()
+    else:
+        lazy = pl.read_csv(path, **options).lazy()
+
+    if where is not None:
+        lazy = lazy.filter(where)
+    if columns is not None:
+        names = lazy.collect_schema().names()
+        missing = set(columns) - set(names)
+        if missing:
+            raise pl.exceptions.ColumnNotFoundError(
+                f"{sorted(missing)} not found in {path}"
+            )
+        lazy = lazy.select(c for c in names if c in set(columns))
+    return lazy
+
+
+def read_csv(
+    path: str | Path,
+    columns: Optional[list[str]] = None,
+    where: Optional[pl.Expr] = None,
+    **options,
+) -> pl.DataFrame:
+    """Drop-in for `pl.read_csv` that reads through the Parquet cache.
+
+    `options` are the text parse options (separator, encoding, ...) and
+    form part of the cache key; `columns` is pushed down as a projection
+    into a lazy scan of the cached Parquet (or of the text file when it is
+    not cached), so only the requested columns are decoded. Columns are
+    returned in file order, matching `pl.read_csv(columns=...)`. `where` is
+    an optional row predicate on the raw columns (which need not be in
+    `columns`), pushed down into the scan so only matching rows are
+    materialised, e.g. one partition of a large file.
+    """
+    path = Path(path)
+    if columns is None and where is None and _cache_key(path, options) is None:
+        return pl.read_csv(path, **options)
+    return scan_csv(path, columns=columns, where=where, **options).collect()
+
+
+def read_header(path: str | Path, **options) -> list[str]:
+    """Column names of a raw file, without parsing its rows.
+
+    Served from the cached Parquet schema when the file is cached, so
+    loaders can intersect their column mappings with the file before
+    projecting.
+    """
+    path = Path(path)
+    cache_path = _cached(path, options)
+    if cache_path is not None:
+        return list(pl.read_parquet_schema(cache_path))
+    return pl.read_csv(path, n_rows=0, **options).columns
+
+
+def ingest(
+    data_root: str | Path,
+    raw_files: dict[str, tuple[str, Iterable[tuple[str, dict]]]],
+    cache_root: Optional[str | Path] = None,
+    force: bool = False,
+) -> list[Path]:
+    """Transcode every raw file matched by `raw_files` under `data_root`.
+
+    Args:
+        data_root: Base data directory.
+        raw_files: {source: (subdir, [(glob, parse options), ...])}, e.g.
+            `{"ktdb": ("KTDB", ktdb.RAW_FILES)}`.
+        cache_root: Cache directory (default: `cache_root_for(data_root)`).
+        force: Re-transcode files even if their cache entry is fresh.
+
+    Returns:
+        Paths of the cache files written or confirmed fresh (files that
+        cannot be cached are skipped).
+    """
+    enable_cache(data_root, cache_root)
+    written = []
+    try:
+        for source, (subdir, patterns) in raw_files.items():
+            root = _data_root / subdir
+            if not root.exists():
+                print(f"WARNING: no raw data for {source} at {root}")
+                continue
+            for pattern, options in patterns:
+                for path in sorted(root.glob(pattern)):
+                    if not path.is_file():
+                        continue
+                    cache_path = ingest_file(path, force=force, **options)
+                    if cache_path is not None:
+                        written.append(cache_path)
+    finally:
+        disable_cache()
+    return written
@@ -1,8 +1,10 @@
+import json
 from pathlib import Path
 
+import numpy as np
 import polars as pl
 
-from foundata import fix, utils
+from foundata import fix, geo, ingest, sources, utils, weather
 
 SOURCE = "ktdb"
 KRW_TO_EURO = 0.00058
@@ -17,6 +19,9 @@ SPEEDS = {
     "unknown": 30,
 }
 
+CSV_OPTIONS = {"ignore_errors": True, "encoding": "euc-kr"}
+RAW_FILES = [("*.csv", CSV_OPTIONS)]
+
 
 def load(
     data_root: str | Path, person_config: dict, trips_config: dict
@@ -102,13 +107,25 @@ def load(
     return attributes, trips
 
 
+SPEC = sources.SourceSpec(
+    name=SOURCE,
+    data_dir="KTDB",
+    loader=load,
+    configs={
+        "person_config": "person_dictionary.yaml",
+        "trips_config": "trip_dictionary.yaml",
+    },
+    raw_files=RAW_FILES,
+)
+
+
 def load_persons(root: str | Path, config: dict) -> pl.DataFrame:
     """Load and normalise person records."""
     root = Path(root).expanduser()
     column_mapping = config["column_mappings"]
 
-    data = pl.read_csv(
-        root / "persons.csv", ignore_errors=True, encoding="euc-kr"
+    data = ingest.read_csv(
+        root / "persons.csv", columns=list(column_mapping), **CSV_OPTIONS
     )
     data = data.select(column_mapping.keys()).rename(column_mapping)
 
@@ -262,18 +279,40 @@ def load_centroids() -> dict[str, tuple[float, float]]:
     }
 
 
-def load_distances() -> pl.DataFrame:
-    """Load precomputed zone-to-zone haversine distances (km)."""
-    path = utils.get_config_path("ktdb", "zone_distances.parquet")
-    return pl.read_parquet(path)
+def load_distances() -> geo.ZoneDistances:
+    """Zone-to-zone haversine distances (km) between KTDB zone centroids.
+
+    Gathers from the memory-mapped `zone_distances.npy` (zone order and a
+    centroid fingerprint in `zone_distances.json`) written by
+    scripts/precompute_zone_distances.py when it was built from the current
+    zone_centroids.csv zones and coordinates; otherwise distances are
+    computed on the fly from the centroids.
+    """
+    csv = utils.get_config_path("ktdb", "zone_centroids.csv")
+    distances = geo.ZoneDistances.from_csv(csv)
+
+    path = utils.get_config_path("ktdb", "zone_distances.npy")
+    index_path = path.with_suffix(".json")
+    if path.exists() and index_path.exists():
+        with open(index_path) as f:
+            index = json.load(f)
+        if (
+            index.get("zones") == distances.zones
+            and index.get("centroids") == distances.fingerprint()
+        ):
+            distances.matrix = np.load(path, mmap_mode="r")
+        else:
+            print(f"WARNING: {path} is out of date with {csv}, ignoring it")
+    return distances
 
 
 def load_weather() -> pl.DataFrame:
-    csv = utils.get_config_path("ktdb", "weather_regions.csv")
-    weather = pl.read_csv(csv, schema_overrides={"region_code": pl.String})
-    return weather.with_columns(rain=pl.col("precipitation_mm") > 0).drop(
-        "precipitation_mm"
+    """Daily weather per region centroid, from the weather store."""
+    regions = pl.read_csv(
+        utils.get_config_path("ktdb", "region_centroids.csv"),
+        schema_overrides={"region_code": pl.String},
     )
+    return weather.regional(regions)
 
 
 def load_trips(root: str | Path, config: dict) -> pl.DataFrame:
@@ -286,8 +325,8 @@ def load_trips(root: str | Path, config: dict) -> pl.DataFrame:
     root = Path(root).expanduser()
     column_mapping = config["column_mappings"]
 
-    data = pl.read_csv(
-        root / "trips.csv", ignore_errors=True, encoding="euc-kr"
+    data = ingest.read_csv(
+        root / "trips.csv", columns=list(column_mapping), **CSV_OPTIONS
     )
     data = data.select(column_mapping.keys()).rename(column_mapping)
 
@@ -399,14 +438,9 @@ def load_trips(root: str | Path, config: dict) -> pl.DataFrame:
     )
 
     # Distances
-    dist_df = load_distances()
-
-    data = data.join(
-        dist_df,
-        left_on=["ozone", "dzone"],
-        right_on=["ozone", "dzone"],
-        how="left",
-    ).rename({"distance_km": "distance"})
+    data = data.with_columns(
+        load_distances().distances(data["ozone"], data["dzone"])
+    )
 
     data = data.with_columns(
         distance=pl.when(
@@ -449,7 +483,7 @@ def load_trips(root: str | Path, config: dict) -> pl.DataFrame:
     data = data.sort(["pid", "seq"])
 
     # Handle midnight-crossing trips
-    data = fix.day_wrap(data)
+    data = fix.day_wrap(data, SOURCE)
 
     # calc % of pids with access_egress_distance not null
     perc = (
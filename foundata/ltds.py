@@ -3,14 +3,15 @@ from pathlib import Path
 
 import polars as pl
 
-from foundata import fix
+from foundata import fix, ingest, sources
+from foundata.times import sample_minutes
 from foundata.utils import (
     assign_education_to_escort,
     bounds_from_list,
     check_overlap,
     config_for_year,
     expand_root,
-    fuzzy_loader,
+    fuzzy_scan,
     sample_to_euro,
     table_joiner,
     table_stacker,
@@ -19,9 +20,21 @@ from foundata.utils import (
 GBP_TO_EURO = 1.14
 SOURCE = "ltds"
 
+YEARS = ["LTDS2425", "LTDS2324", "LTDS2223", "LTDS1920"]
+RAW_FILES = [("*/*.csv", {})]
+
+# approximate raw file names, matched fuzzily as they vary between years
+FILES = {
+    "hhs": "Household.csv",
+    "persons": "person.csv",
+    "persons_data": "person data.csv",
+    "trips": "Trip.csv",
+    "stages": "Stage.csv",
+}
+
 
 def load_mapping(path: Path) -> dict:
-    zones = pl.read_csv(path)
+    zones = ingest.read_csv(path)
     mapping = {1: "urban", 2: "suburban", 3: "rural"}
     zones = zones.with_columns(
         pl.col("HIOX").replace_strict(mapping, default="rural")
@@ -51,24 +64,20 @@ def load_years(
         trips_config_year = config_for_year(trips_config, year)
         stages_config_year = config_for_year(stages_config, year)
 
-        hh_columns = list(hh_config_year["column_mappings"].keys())
-        hhs = fuzzy_loader(root, "Household.csv", columns=hh_columns)
-
-        person_columns = list(person_config_year["column_mappings"].keys())
-        persons = fuzzy_loader(root, "person.csv", columns=person_columns)
-
-        person_data_columns = list(
-            person_data_config_year["column_mappings"].keys()
+        # resolve the year's files in one match pass and read only the
+        # mapped columns of each, collecting the scans together
+        scans = fuzzy_scan(
+            root,
+            FILES,
+            hhs=list(hh_config_year["column_mappings"]),
+            persons=list(person_config_year["column_mappings"]),
+            persons_data=list(person_data_config_year["column_mappings"]),
+            trips=list(trips_config_year["column_mappings"]),
+            stages=list(stages_config_year["column_mappings"]),
         )
-        persons_data = fuzzy_loader(
-            root, "person data.csv", columns=person_data_columns
+        hhs, persons, persons_data, trips, stages = pl.collect_all(
+            scans.values()
         )
-
-        trips_columns = list(trips_config_year["column_mappings"].keys())
-        trips = fuzzy_loader(root, "Trip.csv", columns=trips_columns)
-
-        stages_columns = list(stages_config_year["column_mappings"].keys())
-        stages = fuzzy_loader(root, "Stage.csv", columns=stages_columns)
         stages = preprocess_stages(stages, stages_config_year)
 
         zone_mapping = load_mapping(root / "HABORO_T.csv")
@@ -143,6 +152,22 @@ def load_years(
     return attributes, trips
 
 
+SPEC = sources.SourceSpec(
+    name=SOURCE,
+    data_dir="LTDS",
+    loader=load_years,
+    configs={
+        "hh_config": "hh_dictionary.yaml",
+        "person_config": "person_dictionary.yaml",
+        "person_data_config": "person_data_dictionary.yaml",
+        "trips_config": "trip_dictionary.yaml",
+        "stages_config": "stage_dictionary.yaml",
+    },
+    years=YEARS,
+    raw_files=RAW_FILES,
+)
+
+
 def preprocess_hhs(
     hhs: pl.DataFrame, config: dict, year: str, zone_mapping: dict
 ) -> pl.DataFrame:
@@ -264,10 +289,6 @@ def preprocess_persons_data(
     return persons
 
 
-def sample_minute(base: int) -> int:
-    return random.randint(max(1, int(base)), int(base) + 4)
-
-
 def sample_tst(row) -> int:
     """
     Sample a start time for a trip based on constraints;
@@ -447,7 +468,7 @@ def sample_plan_trip_start_times(trips: pl.DataFrame, seed=42) -> pl.DataFrame:
 
 
 def preprocess_trips(
-    trips: pl.DataFrame, config: dict, zone_mapping: dict
+    trips: pl.DataFrame, config: dict, zone_mapping: dict, seed: int = 42
 ) -> pl.DataFrame:
     column_mapping = config["column_mappings"]
     trips = trips.select(column_mapping.keys()).rename(column_mapping)
@@ -472,14 +493,18 @@ def preprocess_trips(
     )
 
     trips = trips.with_columns(
-        pl.col("duration").map_elements(sample_minute)
-    ).with_columns(tst=pl.col("tst") * 60, tet=pl.col("tet") * 60)
+        duration=sample_minutes(
+            trips["duration"], width=5, minimum=1, seed=seed
+        ),
+        tst=pl.col("tst") * 60,
+        tet=pl.col("tet") * 60,
+    )
 
-    trips = fix.day_wrap(trips)
+    trips = fix.day_wrap(trips, SOURCE)
 
     # sample times
     trips = trips.group_by("pid", maintain_order=True).map_groups(
-        lambda g: sample_plan_trip_start_times(g, seed=42)
+        lambda g: sample_plan_trip_start_times(g, seed=seed)
     )
 
     trips = trips.with_columns(
@@ -2,7 +2,8 @@ from pathlib import Path
 
 import polars as pl
 
-from foundata import fix
+from foundata import fix, ingest, sources
+from foundata.times import hhmm_to_minutes
 from foundata.utils import (
     config_for_year,
     expand_root,
@@ -13,6 +14,10 @@ from foundata.utils import (
 USD_TO_EURO = 0.85
 
 SOURCE = "nhts"
+YEARS = [2022, 2017, 2009, 2001]
+
+CSV_OPTIONS = {"ignore_errors": True}
+RAW_FILES = [("*/*.csv", CSV_OPTIONS), ("*/*.CSV", CSV_OPTIONS)]
 
 
 def load(
@@ -40,6 +45,20 @@ def load(
     return attributes, trips
 
 
+SPEC = sources.SourceSpec(
+    name=SOURCE,
+    data_dir="NHTS",
+    loader=load,
+    configs={
+        "hh_config": "hh_dictionary.yaml",
+        "person_config": "person_dictionary.yaml",
+        "trips_config": "trip_dictionary.yaml",
+    },
+    years=YEARS,
+    raw_files=RAW_FILES,
+)
+
+
 def load_households(
     root: str | Path,
     hh_config: dict,
@@ -66,9 +85,9 @@ def load_households(
         column_mapping = year_config["column_mappings"]
 
         path = root / str(year) / name
-        data = pl.read_csv(path, ignore_errors=True)
-
-        select = column_mapping.keys() & set(data.columns)
+        header = ingest.read_header(path, **CSV_OPTIONS)
+        select = [c for c in column_mapping if c in header]
+        data = ingest.read_csv(path, columns=select, **CSV_OPTIONS)
         data = data.select(select).rename(column_mapping, strict=False)
 
         if "date" in data.columns:
@@ -152,11 +171,12 @@ def load_persons(
     persons: list[pl.DataFrame] = []
     for year, name in zip(years, names):
         path = root / str(year) / name
-        data = pl.read_csv(path, ignore_errors=True)
-
         year_config = config_for_year(person_config, year)
 
         column_mapping = year_config["column_mappings"]
+        data = ingest.read_csv(
+            path, columns=list(column_mapping), **CSV_OPTIONS
+        )
 
         data = data.select(column_mapping.keys())
         data = data.rename(column_mapping)
@@ -203,12 +223,6 @@ def load_persons(
     return persons
 
 
-def _hhmm_to_minutes(value: int) -> int:
-    hh = value // 100
-    mm = value % 100
-    return hh * 60 + mm
-
-
 def _preprocess_trips(
     trips: pl.DataFrame, year: int, config: dict
 ) -> pl.DataFrame:
@@ -240,7 +254,7 @@ def _preprocess_trips(
 
     trips = trips.with_columns(
         distance=pl.col("distance") * 1.6,  # convert miles to km
-        tst=pl.col("tst").map_elements(_hhmm_to_minutes),
+        tst=hhmm_to_minutes(pl.col("tst")),
         mode=pl.col("mode").replace_strict(
             mode_mapping, return_dtype=pl.String, default=pl.col("mode")
         ),
@@ -284,7 +298,7 @@ def _preprocess_trips(
         ),
     )
 
-    trips = fix.day_wrap(trips)
+    trips = fix.day_wrap(trips, SOURCE)
 
     return trips
 
@@ -311,7 +325,9 @@ def load_trips(
     for year, name in zip(years, names):
         path = root / str(year) / name
         year_config = config_for_year(trips_config, year)
-        trips = pl.read_csv(path, ignore_errors=True)
+        trips = ingest.read_csv(
+            path, columns=list(year_config["column_mapping"]), **CSV_OPTIONS
+        )
         trips_by_year.append(
             _preprocess_trips(trips, year=year, config=year_config)
         )
@@ -1,8 +1,9 @@
 from pathlib import Path
+from typing import Optional
 
 import polars as pl
 
-from foundata import fix
+from foundata import fix, ingest, sources
 from foundata.utils import (
     check_overlap,
     resolve_activity_chain,
@@ -14,6 +15,23 @@ GBP_TO_EURO = 1.14
 
 SOURCE = "nts"
 
+CSV_OPTIONS = {"separator": "\t"}
+RAW_FILES = [("tab/*.tab", CSV_OPTIONS)]
+
+# raw household key, present in every NTS table; partitions are household
+# sets so each household's persons, days, trips and stages stay together
+HOUSEHOLD_KEY = "HouseholdID"
+HOUSEHOLD_FILE = "household_eul_2002-2024.tab"
+TABLES = (
+    HOUSEHOLD_FILE,
+    "individual_eul_2002-2024.tab",
+    "trip_eul_2002-2024.tab",
+    "stage_eul_2002-2024.tab",
+    "day_eul_2002-2024.tab",
+)
+# partition index column of split tables (see `partitions`)
+PART = "_partition"
+
 
 def load(
     data_root: str | Path,
@@ -22,22 +40,29 @@ def load(
     trips_config: dict,
     stages_config: dict,
     days_config: dict,
+    partition: Optional[pl.Expr | Path] = None,
 ) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Load NTS attributes and trips (person-days as plans).
+
+    `partition` is an optional predicate on the raw tables or a split
+    partition directory (see `partitions`); when given, only that subset
+    of households is read.
+    """
     print("Loading NTS...")
 
-    hhs = load_households(data_root, hh_config)
-    persons = load_persons(data_root, person_config)
+    hhs = load_households(data_root, hh_config, partition)
+    persons = load_persons(data_root, person_config, partition)
     attributes = table_joiner(
         hhs, persons, on="hid", lhs_name="households", rhs_name="persons"
     )
 
     # add transit access/egress distance using stages
-    stages = load_stages(data_root, stages_config)
+    stages = load_stages(data_root, stages_config, partition)
     attributes = calc_transit_access_egress_distance(attributes, stages)
 
-    trips = load_trips(data_root, trips_config)
+    trips = load_trips(data_root, trips_config, partition)
 
-    days = load_days(data_root, days_config)
+    days = load_days(data_root, days_config, partition)
     trips, attributes = split_days(days, trips, attributes)
 
     attributes = attributes.with_columns(
@@ -51,17 +76,154 @@ def load(
     return attributes, trips
 
 
+def partitions(
+    data_root: str | Path,
+    by: str | int = "year",
+    split_dir: Optional[str | Path] = None,
+) -> list[tuple[str, pl.Expr | Path]]:
+    """Household partitions of the raw NTS tables, as (label, partition).
+
+    Args:
+        data_root: NTS data root (containing `tab/`).
+        by: "year" for one partition per survey year (households are
+            assigned by their SurveyYear), or an int n for n partitions by
+            a hash of the household ID.
+        split_dir: Optional directory to split the raw tables into, in one
+            scan per table, so loading a partition reads only its rows.
+
+    Returns:
+        (label, partition) pairs. Without `split_dir`, each partition is a
+        predicate selecting its rows from any raw NTS table, via its
+        HouseholdID column; with it, each is the partition's directory of
+        split tables.
+    """
+    key = pl.col(HOUSEHOLD_KEY)
+    if by == "year":
+        households = ingest.read_csv(
+            Path(data_root) / "tab" / HOUSEHOLD_FILE,
+            **CSV_OPTIONS,
+            columns=[HOUSEHOLD_KEY, "SurveyYear"],
+        )
+        groups = sorted(households.group_by("SurveyYear"), key=lambda g: g[0])
+        labels = [str(year) for (year,), _ in groups]
+        predicates = [
+            key.is_in(group[HOUSEHOLD_KEY].implode()) for _, group in groups
+        ]
+        index = key.replace_strict(
+            households[HOUSEHOLD_KEY],
+            households["SurveyYear"].rank("dense") - 1,
+            default=None,
+        )
+    elif isinstance(by, int) and by > 0:
+        labels = [f"{i + 1}/{by}" for i in range(by)]
+        predicates = [key.cast(pl.String).hash(0) % by == i for i in range(by)]
+        index = key.cast(pl.String).hash(0) % by
+    else:
+        raise ValueError(
+            f"NTS partitions must be 'year' or a positive int: {by}"
+        )
+    if split_dir is None:
+        return list(zip(labels, predicates))
+    split_dir = Path(split_dir)
+    _split(Path(data_root), index.cast(pl.UInt32), len(labels), split_dir)
+    return [
+        (label, split_dir / f"{PART}={i}") for i, label in enumerate(labels)
+    ]
+
+
+def _split(data_root: Path, index: pl.Expr, n: int, split_dir: Path):
+    """Write each raw table's rows to `<split_dir>/<PART>=<index>/<table>/`.
+
+    Each table is scanned once and streamed to every partition's files;
+    rows of households not assigned a partition are dropped. Partitions
+    with no rows in a table get an empty file, so every table can be read
+    from every partition.
+    """
+    for name in TABLES:
+        table = Path(name).stem
+        lazy = (
+            ingest.scan_csv(data_root / "tab" / name, **CSV_OPTIONS)
+            .with_columns(index.alias(PART))
+            .filter(pl.col(PART).is_not_null())
+        )
+        lazy.sink_parquet(
+            pl.PartitionByKey(
+                split_dir,
+                by=PART,
+                include_key=False,
+                file_path=lambda ctx, table=table: (
+                    ctx.hive_dirs() / table / f"{ctx.in_part_idx}.parquet"
+                ),
+            ),
+            mkdir=True,
+        )
+        empty = pl.DataFrame(schema=lazy.drop(PART).collect_schema())
+        for i in range(n):
+            path = split_dir / f"{PART}={i}" / table
+            if not path.exists():
+                path.mkdir(parents=True)
+                empty.write_parquet(path / "0.parquet")
+
+
+def _read_table(
+    root: str | Path,
+    name: str,
+    columns: list[str],
+    partition: Optional[pl.Expr | Path] = None,
+) -> pl.DataFrame:
+    """Columns of a raw NTS table (in file order), or of one partition."""
+    if not isinstance(partition, Path):
+        return ingest.read_csv(
+            Path(root) / "tab" / name,
+            **CSV_OPTIONS,
+            columns=columns,
+            where=partition,
+        )
+    lazy = pl.scan_parquet(partition / Path(name).stem / "*.parquet")
+    names = lazy.collect_schema().names()
+    missing = set(columns) - set(names)
+    if missing:
+        raise pl.exceptions.ColumnNotFoundError(
+            f"{sorted(missing)} not found in {name}"
+        )
+    return lazy.select(c for c in names if c in set(columns)).collect()
+
+
+def _loader_options(partition: Optional[pl.Expr | Path] = None, **_) -> dict:
+    return {"partition": partition}
+
+
+SPEC = sources.SourceSpec(
+    name=SOURCE,
+    data_dir="NTS",
+    loader=load,
+    configs={
+        "hh_config": "hh_dictionary.yaml",
+        "person_config": "person_dictionary.yaml",
+        "trips_config": "trip_dictionary.yaml",
+        "stages_config": "stage_dictionary.yaml",
+        "days_config": "day_dictionary.yaml",
+    },
+    raw_files=RAW_FILES,
+    options=_loader_options,
+    partitions=partitions,
+)
+
+
 def load_households(
-    root: str | Path, config: dict | None = None
+    root: str | Path,
+    config: dict | None = None,
+    partition: Optional[pl.Expr | Path] = None,
 ) -> pl.DataFrame:
     print("loading households...")
 
     columns = config["column_mappings"]
 
-    hhs = pl.read_csv(
-        root / "tab" / "household_eul_2002-2024.tab",
-        separator="\t",
-        columns=list(columns.keys()),
+    hhs = _read_table(
+        root,
+        "household_eul_2002-2024.tab",
+        list(columns.keys()),
+        partition,
     ).rename(columns)
 
     income_config = config["hh_income"]
@@ -90,15 +252,20 @@ def load_households(
     return hhs
 
 
-def load_persons(root: str | Path, config: dict | None = None) -> pl.DataFrame:
+def load_persons(
+    root: str | Path,
+    config: dict | None = None,
+    partition: Optional[pl.Expr | Path] = None,
+) -> pl.DataFrame:
     print("loading persons...")
 
     columns = config["column_mappings"]
 
-    persons = pl.read_csv(
-        root / "tab" / "individual_eul_2002-2024.tab",
-        separator="\t",
-        columns=list(columns.keys()),
+    persons = _read_table(
+        root,
+        "individual_eul_2002-2024.tab",
+        list(columns.keys()),
+        partition,
     ).rename(columns)
 
     persons = persons.with_columns(
@@ -124,15 +291,20 @@ def load_persons(root: str | Path, config: dict | None = None) -> pl.DataFrame:
     return persons
 
 
-def load_trips(root: str | Path, config: dict | None = None) -> pl.DataFrame:
+def load_trips(
+    root: str | Path,
+    config: dict | None = None,
+    partition: Optional[pl.Expr | Path] = None,
+) -> pl.DataFrame:
     print("loading trips...")
 
     columns = config["column_mappings"]
 
-    trips = pl.read_csv(
-        root / "tab" / "trip_eul_2002-2024.tab",
-        separator="\t",
-        columns=list(columns.keys()),
+    trips = _read_table(
+        root,
+        "trip_eul_2002-2024.tab",
+        list(columns.keys()),
+        partition,
     ).rename(columns)
 
     trips = trips.with_columns(
@@ -154,13 +326,18 @@ def load_trips(root: str | Path, config: dict | None = None) -> pl.DataFrame:
     return trips.sort("hid", "pid", "tid")
 
 
-def load_days(root: str | Path, config: dict | None = None) -> pl.DataFrame:
+def load_days(
+    root: str | Path,
+    config: dict | None = None,
+    partition: Optional[pl.Expr | Path] = None,
+) -> pl.DataFrame:
     columns = config["column_mappings"]
 
-    days = pl.read_csv(
-        root / "tab" / "day_eul_2002-2024.tab",
-        separator="\t",
-        columns=list(columns.keys()),
+    days = _read_table(
+        root,
+        "day_eul_2002-2024.tab",
+        list(columns.keys()),
+        partition,
     ).rename(columns)
 
     return days.sort("pid", "did").with_columns(
@@ -168,13 +345,18 @@ def load_days(root: str | Path, config: dict | None = None) -> pl.DataFrame:
     )
 
 
-def load_stages(root: str | Path, config: dict | None = None) -> pl.DataFrame:
+def load_stages(
+    root: str | Path,
+    config: dict | None = None,
+    partition: Optional[pl.Expr | Path] = None,
+) -> pl.DataFrame:
     columns = config["column_mappings"]
 
-    stages = pl.read_csv(
-        root / "tab" / "stage_eul_2002-2024.tab",
-        separator="\t",
-        columns=list(columns.keys()),
+    stages = _read_table(
+        root,
+        "stage_eul_2002-2024.tab",
+        list(columns.keys()),
+        partition,
     ).rename(columns)
 
     stages = stages.with_columns(
@@ -201,7 +383,7 @@ def calc_transit_access_egress_distance(
     n_main_transit_trips = (
         main_transit_stages.select("pid", "tid").unique().shape[0]
     )
-    perc = n_main_transit_trips / n_trips * 100
+    perc = n_main_transit_trips / max(n_trips, 1) * 100
     print(
         f"{n_main_transit_trips} out of {n_trips} ({perc:.2f}%) trips have a main transit stage."
     )
@@ -238,7 +420,7 @@ def calc_transit_access_egress_distance(
     access_egress_distance_nulls = attributes.filter(
         pl.col("access_egress_distance").is_null()
     ).shape[0]
-    perc = access_egress_distance_nulls / attributes.shape[0] * 100
+    perc = access_egress_distance_nulls / max(attributes.shape[0], 1) * 100
     print(
         f"{access_egress_distance_nulls} out of {attributes.shape[0]} ({perc:.2f}%) persons have null access_egress_distance."
     )
@@ -290,6 +472,6 @@ def split_days(
 
     # also
     trips = trips.drop(["tid", "did"])
-    trips = fix.day_wrap(trips)
+    trips = fix.day_wrap(trips, SOURCE)
 
     return trips, attributes
@@ -2,11 +2,12 @@ from pathlib import Path
 
 import polars as pl
 
-from foundata import fix
+from foundata import fix, ingest, sources, weather
 from foundata.utils import (
     bounds_from_list,
     config_for_year,
     expand_root,
+    get_config_path,
     sample_to_euro,
     table_joiner,
 )
@@ -21,8 +22,14 @@ DATA_FILES = {
     2023: "ODiN2023_Databestand.csv",  # tab-separated despite .csv
     2024: "ODiN2024_DANS_Databestand_v2.0.csv",  # tab-separated despite .csv
 }
+YEARS = list(DATA_FILES)
 HM_TO_KM = 0.1  # hectometres → kilometres
 
+CSV_OPTIONS = {"separator": "\t", "infer_schema_length": 0}
+RAW_FILES = [
+    (f"{year}/{name}", CSV_OPTIONS) for year, name in DATA_FILES.items()
+]
+
 
 def load(
     data_root: str | Path,
@@ -91,13 +98,32 @@ def load(
     return attributes, trips
 
 
+def _loader_options(**_) -> dict:
+    return {"configs_root": get_config_path()}
+
+
+SPEC = sources.SourceSpec(
+    name=SOURCE,
+    data_dir="ODIN",
+    loader=load,
+    configs={
+        "hh_config": "hh_dictionary.yaml",
+        "person_config": "person_dictionary.yaml",
+        "trips_config": "trip_dictionary.yaml",
+    },
+    years=YEARS,
+    raw_files=RAW_FILES,
+    options=_loader_options,
+)
+
+
 def load_households(root: str | Path, config: dict, year: int) -> pl.DataFrame:
     root = expand_root(root)
     year_config = config_for_year(config, year)
     column_mapping = year_config["column_mappings"]
 
     path = root / str(year) / DATA_FILES[year]
-    data = pl.read_csv(path, separator="\t", infer_schema_length=0)
+    data = ingest.read_csv(path, **CSV_OPTIONS)
     # OP == "1" marks the first (and only unique) row per respondent
     data = data.filter(pl.col("OP") == "1")
     data = data.select(column_mapping.keys()).rename(column_mapping)
@@ -147,7 +173,7 @@ def load_persons(root: str | Path, config: dict, year: int) -> pl.DataFrame:
     column_mapping = year_config["column_mappings"]
 
     path = root / str(year) / DATA_FILES[year]
-    data = pl.read_csv(path, separator="\t", infer_schema_length=0)
+    data = ingest.read_csv(path, **CSV_OPTIONS)
     data = data.filter(pl.col("OP") == "1")
     data = data.select(column_mapping.keys()).rename(column_mapping)
 
@@ -207,11 +233,12 @@ def load_persons(root: str | Path, config: dict, year: int) -> pl.DataFrame:
 
 
 def load_weather(configs_root: Path) -> pl.DataFrame:
-    csv = Path(configs_root) / "odin" / "weather_regions.csv"
-    weather = pl.read_csv(csv, schema_overrides={"region_code": pl.String})
-    return weather.with_columns(rain=pl.col("precipitation_mm") > 0).drop(
-        "precipitation_mm"
+    """Daily weather per gemeente centroid, from the weather store."""
+    regions = pl.read_csv(
+        Path(configs_root) / "odin" / "regions.csv",
+        schema_overrides={"region_code": pl.String},
     )
+    return weather.regional(regions)
 
 
 def load_gemeente_zone(configs_root: Path) -> pl.DataFrame:
@@ -258,7 +285,7 @@ def load_trips(
     column_mapping = year_config["column_mappings"]
 
     path = root / str(year) / DATA_FILES[year]
-    data = pl.read_csv(path, separator="\t", infer_schema_length=0)
+    data = ingest.read_csv(path, **CSV_OPTIONS)
     # Verpl == "1" selects regular (non-series, non-professional-truck) trips
     data = data.filter(pl.col("Verpl") == "1")
 
@@ -331,7 +358,7 @@ def load_trips(
     data = resolve_activity_chain(data)
 
     data = data.with_columns(hid=pl.col("pid"))
-    return fix.day_wrap(data)
+    return fix.day_wrap(data, SOURCE)
 
 
 def resolve_activity_chain(data: pl.DataFrame) -> pl.DataFrame:
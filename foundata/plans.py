@@ -0,0 +1,99 @@
+"""Plan-centric representation: one row per plan with nested trips.
+
+The flat tables hold one row per trip, so per-plan logic (first and last
+activity, chaining, consecutive merging) needs a `(pid, seq)` sort plus a
+window or join. Here each plan is one row of attributes plus a `trips`
+column holding that plan's trips as a `list[struct]` ordered by `seq`.
+Per-plan predicates and transforms become list expressions evaluated row by
+row, with no sort and no join, and the whole plan set is a single
+self-contained frame (e.g. one Parquet file).
+
+    plans = to_plans(attributes, trips)
+    plans = plans.filter(home_based(), activity_consistent())
+    plans = plans.with_columns(merge_consecutive(["home", "work"]))
+    attributes, trips = from_plans(plans)
+"""
+
+from typing import Optional
+
+import polars as pl
+
+TRIPS = "trips"
+
+Frame = pl.DataFrame | pl.LazyFrame
+
+
+def nest(lf: Frame, name: str, on: str = "pid", order: str = "seq") -> Frame:
+    """Collapse rows into one `list[struct]` column `name` per `on` value."""
+    return (
+        lf.sort(on, order)
+        .group_by(on, maintain_order=True)
+        .agg(pl.struct(pl.exclude(on)).alias(name))
+    )
+
+
+def to_plans(
+    attributes: Optional[Frame], trips: Frame, on: str = "pid"
+) -> Frame:
+    """Nest trips into a `trips` column on attributes, one row per plan.
+
+    Plans without trips get an empty list. If `attributes` is None, the
+    result has just `on` and `trips`, one row per plan that has trips.
+    """
+    nested = nest(trips, TRIPS, on)
+    if attributes is None:
+        return nested
+    plans = attributes.join(nested, on=on, how="left", maintain_order="left")
+    dtype = plans.collect_schema()[TRIPS]
+    return plans.with_columns(pl.col(TRIPS).fill_null(pl.lit([], dtype)))
+
+
+def from_plans(plans: Frame, on: str = "pid") -> tuple[Frame, Frame]:
+    """Split nested plans back into (attributes, trips) tables."""
+    attributes = plans.drop(TRIPS)
+    trips = (
+        plans.select(on, TRIPS).explode(TRIPS).drop_nulls(TRIPS).unnest(TRIPS)
+    )
+    return attributes, trips
+
+
+def _field(name: str) -> pl.Expr:
+    return pl.element().struct.field(name)
+
+
+def n_trips() -> pl.Expr:
+    """Number of trips in each plan."""
+    return pl.col(TRIPS).list.len().alias("n_trips")
+
+
+def home_based() -> pl.Expr:
+    """True unless the first or last activity is known not to be home, as
+    in `filter.home_based` (plans without trips are kept)."""
+    trips = pl.col(TRIPS)
+    first = trips.list.first().struct.field("oact")
+    last = trips.list.last().struct.field("dact")
+    away = (first != "home") | (last != "home")
+    return (~away).fill_null(True).alias("home_based")
+
+
+def activity_consistent() -> pl.Expr:
+    """True where each trip's oact equals the previous trip's dact, as in
+    `filter.activity_consistency` (pairs with a null are not checked)."""
+    broken = (_field("dact").shift(1) != _field("oact")).fill_null(False)
+    return (~pl.col(TRIPS).list.eval(broken).list.any()).alias(
+        "activity_consistent"
+    )
+
+
+def merge_consecutive(
+    non_consecutive_types: list[str] = ["home", "work", "education"],
+) -> pl.Expr:
+    """Drop trips that split one activity in two, as in
+    `utils.combine_consecutive_acts`, returning the new `trips` column."""
+    dact = _field("dact")
+    redundant = (
+        (_field("oact") == dact) | (dact == dact.shift(1))
+    ) & dact.is_in(non_consecutive_types)
+    return pl.col(TRIPS).list.eval(
+        pl.element().filter(~redundant.fill_null(False))
+    )
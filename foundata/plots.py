@@ -9,7 +9,7 @@ import polars as pl
 from matplotlib.lines import Line2D
 from matplotlib.patches import Patch
 
-from foundata import post_process
+from foundata import post_process, sample
 
 
 def numeric_hist_grid(
@@ -46,7 +46,9 @@ def numeric_hist_grid(
         )
 
     if df.height > max_sample:
-        df_plot = df.sample(n=max_sample, shuffle=True)
+        # stratified, so small sources are not crowded out of the sample
+        n_groups = max(df.select(pl.col(on).drop_nulls().n_unique()).item(), 1)
+        df_plot = sample.per_group(df, on, max(max_sample // n_groups, 1))
     else:
         df_plot = df
 
@@ -471,14 +473,7 @@ def _stratified_sample(
     small share of the total — making that category look absent from that
     source when it isn't. Sampling within each group avoids that.
     """
-    groups = df.select(pl.col(on)).drop_nulls().unique().to_series().to_list()
-    parts = []
-    for g in groups:
-        sub = df.filter(pl.col(on) == g)
-        if sub.height > max_per_group:
-            sub = sub.sample(n=max_per_group, shuffle=True)
-        parts.append(sub)
-    return pl.concat(parts, how="vertical") if parts else df.head(0)
+    return sample.per_group(df, on, max_per_group)
 
 
 def categorical_bar_grid(
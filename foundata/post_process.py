@@ -1,3 +1,5 @@
+import json
+from pathlib import Path
 from typing import Optional
 
 import polars as pl
@@ -217,39 +219,26 @@ def _bin_labels(breaks: list[float]) -> list[str]:
     return result
 
 
-def fill_nulls(df: pl.DataFrame, fill_value: str = "unknown") -> pl.DataFrame:
-    # fill null strings with "fill value"
-    string_cols = [col for col in df.columns if df[col].dtype == pl.String]
-    df = df.with_columns(
-        [pl.col(col).fill_null(fill_value).alias(col) for col in string_cols]
-    )
-    # fill empty string cells as well
-    for col in string_cols:
-        df = df.with_columns(
-            pl.when(pl.col(col) == "")
-            .then(pl.lit(fill_value))
-            .otherwise(pl.col(col))
-            .alias(col)
-        )
-    # fill null numeric values with -1
-    numeric_cols = [col for col in df.columns if df[col].dtype.is_numeric()]
-    df = df.with_columns(
-        [pl.col(col).fill_null(-1).alias(col) for col in numeric_cols]
-    )
-    # cast any remaining nullable types (Boolean, Date, etc.) to String and fill
-    other_cols = [col for col in df.columns if df[col].null_count() > 0]
-    if other_cols:
-        df = df.with_columns(
-            [
-                pl.col(col).cast(pl.String).fill_null(fill_value)
-                for col in other_cols
-            ]
-        )
-    # assert there are no missing values left
-    assert df.null_count().sum_horizontal().sum() == 0, (
-        "There are still null values in the DataFrame"
+def fill_nulls(
+    df: pl.DataFrame | pl.LazyFrame, fill_value: str = "unknown"
+) -> pl.DataFrame | pl.LazyFrame:
+    """Fill all missing values in a single batched `with_columns`.
+
+    Null or empty strings become `fill_value` and null numerics become -1.
+    Other scalar columns (Boolean, Date, ...) that contain nulls are cast
+    to String and filled with `fill_value`; those without nulls keep their
+    dtype. Nested (List, Struct) columns have no string form to fill, so
+    are left as they are. Works lazily as well as eagerly; a LazyFrame is
+    scanned once for the null counts of its other scalar columns.
+    """
+    other = ~(cs.string() | cs.numeric() | cs.nested())
+    counts = df.lazy().select(other.null_count()).collect()
+    with_nulls = [s.name for s in counts if s.item()]
+    return df.with_columns(
+        cs.string().replace("", fill_value).fill_null(fill_value),
+        cs.numeric().fill_null(-1),
+        pl.col(with_nulls).cast(pl.String).fill_null(fill_value),
     )
-    return df
 
 
 def fill_unknown(df: pl.DataFrame) -> tuple[pl.DataFrame, dict[str, dict]]:
@@ -317,26 +306,29 @@ def fill_unknown(df: pl.DataFrame) -> tuple[pl.DataFrame, dict[str, dict]]:
     return df, stats
 
 
-def discretise_numeric(
-    df: pl.DataFrame,
+def fit_bins(
+    df: pl.DataFrame | pl.LazyFrame,
     n_bins: int = 5,
     method: str = "quantile",
     cols: list[str] | None = None,
     exclude_cols: list[str] | None = None,
     per_col_bins: dict[str, int] | None = None,
-) -> pl.DataFrame:
-    """Discretise numeric columns into labelled string bins.
+) -> dict[str, dict[str, list]]:
+    """Compute bin breaks for numeric columns in a single aggregation.
+
+    All break points (quantiles, or min/max for uniform bins) and distinct
+    counts for all selected columns are computed in one pass over `df`.
 
     Args:
-        df: Input DataFrame.
+        df: Input DataFrame or LazyFrame.
         n_bins: Default number of bins.
         method: "quantile" (equal-frequency) or "uniform" (equal-width).
         cols: Columns to discretise. If None, all numeric columns are used.
         exclude_cols: Columns to exclude from discretisation.
         per_col_bins: Per-column bin count overrides (take precedence over n_bins).
     Returns:
-        DataFrame with selected numeric columns replaced by string bin labels.
-        Null values are preserved as null.
+        Bin spec {column: {"breaks": [...], "labels": [...]}}, applied with
+        `apply_bins`. Columns with fewer than two distinct values are left out.
     """
     if method not in ("quantile", "uniform"):
         raise ValueError(
@@ -345,32 +337,117 @@ def discretise_numeric(
 
     if cols is not None and exclude_cols is not None:
         raise ValueError("Cannot specify both cols and exclude_cols")
+    lazy = df.lazy()
     if cols is None:
-        cols = df.select(cs.numeric()).columns
+        cols = lazy.select(cs.numeric()).collect_schema().names()
     if exclude_cols is not None:
         cols = [col for col in cols if col not in exclude_cols]
+    if not cols:
+        return {}
 
-    exprs = []
+    def n_for(col: str) -> int:
+        return per_col_bins.get(col, n_bins) if per_col_bins else n_bins
+
+    aggs = []
     for col in cols:
-        non_null = df[col].drop_nulls()
-        if non_null.len() == 0 or non_null.n_unique() < 2:
+        aggs.append(pl.col(col).drop_nulls().n_unique().alias(f"{col}:n"))
+        if method == "quantile":
+            n = n_for(col)
+            aggs.extend(
+                pl.col(col).quantile(i / n).cast(pl.Float64).alias(f"{col}:{i}")
+                for i in range(1, n)
+            )
+        else:
+            aggs.append(pl.col(col).min().cast(pl.Float64).alias(f"{col}:min"))
+            aggs.append(pl.col(col).max().cast(pl.Float64).alias(f"{col}:max"))
+    stats = lazy.select(aggs).collect().row(0, named=True)
+
+    spec = {}
+    for col in cols:
+        if stats[f"{col}:n"] < 2:
             continue
-        n = per_col_bins.get(col, n_bins) if per_col_bins else n_bins
+        n = n_for(col)
         if method == "quantile":
-            quantiles = [i / n for i in range(1, n)]
-            breaks = sorted({float(non_null.quantile(q)) for q in quantiles})
+            breaks = sorted({stats[f"{col}:{i}"] for i in range(1, n)})
             if not breaks:
                 continue
-            labels = _bin_labels(breaks)
-            exprs.append(pl.col(col).cut(breaks, labels=labels).cast(pl.String))
         else:  # uniform
-            min_val = float(non_null.min())
-            max_val = float(non_null.max())
+            min_val, max_val = stats[f"{col}:min"], stats[f"{col}:max"]
             step = (max_val - min_val) / n
             breaks = [min_val + i * step for i in range(1, n)]
-            labels = _bin_labels(breaks)
-            exprs.append(pl.col(col).cut(breaks, labels=labels).cast(pl.String))
+        spec[col] = {"breaks": breaks, "labels": _bin_labels(breaks)}
+    return spec
+
+
+def apply_bins(
+    df: pl.DataFrame | pl.LazyFrame, spec: dict[str, dict[str, list]]
+) -> pl.DataFrame | pl.LazyFrame:
+    """Replace the columns in a bin spec (see `fit_bins`) by their bin labels.
 
+    Columns in the spec that are missing from `df` are skipped. Works on
+    LazyFrames, so a spec fitted once can be applied to other splits or
+    new data without recomputing breaks. Null values are preserved as null.
+    """
+    columns = df.collect_schema().names()
+    exprs = [
+        pl.col(col).cut(bins["breaks"], labels=bins["labels"]).cast(pl.String)
+        for col, bins in spec.items()
+        if col in columns
+    ]
     if not exprs:
         return df
     return df.with_columns(exprs)
+
+
+def save_bin_spec(spec: dict[str, dict[str, list]], path: str | Path) -> None:
+    """Write a bin spec (see `fit_bins`) as JSON."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(spec, f, indent=2, ensure_ascii=False)
+
+
+def load_bin_spec(path: str | Path) -> dict[str, dict[str, list]]:
+    """Read a JSON bin spec written by `save_bin_spec`."""
+    with open(path) as f:
+        spec = json.load(f)
+    for col, bins in spec.items():
+        breaks, labels = bins.get("breaks"), bins.get("labels")
+        if not breaks or labels is None or len(labels) != len(breaks) + 1:
+            raise ValueError(
+                f"Invalid bin spec for column {col!r} in {path}: expected "
+                "'breaks' and one more 'labels' than breaks"
+            )
+    return spec
+
+
+def discretise_numeric(
+    df: pl.DataFrame,
+    n_bins: int = 5,
+    method: str = "quantile",
+    cols: list[str] | None = None,
+    exclude_cols: list[str] | None = None,
+    per_col_bins: dict[str, int] | None = None,
+    spec: dict[str, dict[str, list]] | None = None,
+) -> pl.DataFrame:
+    """Discretise numeric columns into labelled string bins.
+
+    Equivalent to `apply_bins(df, fit_bins(df, ...))`, or to
+    `apply_bins(df, spec)` when a previously fitted spec is given.
+
+    Args:
+        df: Input DataFrame.
+        n_bins: Default number of bins.
+        method: "quantile" (equal-frequency) or "uniform" (equal-width).
+        cols: Columns to discretise. If None, all numeric columns are used.
+        exclude_cols: Columns to exclude from discretisation.
+        per_col_bins: Per-column bin count overrides (take precedence over n_bins).
+        spec: Bin spec from `fit_bins`/`load_bin_spec`; if given, breaks are
+            not recomputed and the other binning arguments are ignored.
+    Returns:
+        DataFrame with selected numeric columns replaced by string bin labels.
+        Null values are preserved as null.
+    """
+    if spec is None:
+        spec = fit_bins(df, n_bins, method, cols, exclude_cols, per_col_bins)
+    return apply_bins(df, spec)
@@ -3,12 +3,27 @@ from typing import Optional
 
 import polars as pl
 
+from . import ingest, sources
 from .fix import day_wrap
-from .utils import config_for_year, sample_to_euro, table_joiner
+from .utils import (
+    config_for_year,
+    get_config_path,
+    sample_to_euro,
+    table_joiner,
+)
 
 AUD_TO_EURO = 0.6
 
 SOURCE = "qhts"
+YEARS = ["2019-22", "2022-25"]
+
+HH_OPTIONS = {"null_values": "Missing/Refused"}
+TRIPS_OPTIONS = {"null_values": "Missing"}
+RAW_FILES = [
+    ("*/1_QTS_HOUSEHOLDS.csv", HH_OPTIONS),
+    ("*/2_QTS_PERSONS.csv", {}),
+    ("*/5_QTS_TRIPS.csv", TRIPS_OPTIONS),
+]
 
 
 def load_years(
@@ -36,27 +51,27 @@ def load_years(
         person_columns = list(person_config_year["column_mappings"].keys())
         trips_columns = list(trips_config_year["column_mappings"].keys())
 
-        hhs = pl.read_csv(
+        hhs = ingest.read_csv(
             data_root / year / "1_QTS_HOUSEHOLDS.csv",
             columns=hh_columns,
-            null_values="Missing/Refused",
+            **HH_OPTIONS,
         )
         hhs = preprocess_households(hhs, hh_config_year, year=year)
 
-        persons = pl.read_csv(
+        persons = ingest.read_csv(
             data_root / year / "2_QTS_PERSONS.csv", columns=person_columns
         )
         persons = preprocess_persons(persons, person_config_year, year=year)
 
         attributes = table_joiner(hhs, persons, on="hid")
 
-        trips = pl.read_csv(
+        trips = ingest.read_csv(
             data_root / year / "5_QTS_TRIPS.csv",
             columns=trips_columns,
-            null_values="Missing",
+            **TRIPS_OPTIONS,
         )
         trips = preprocess_trips(trips, trips_config_year, year=year)
-        trips = day_wrap(trips)
+        trips = day_wrap(trips, SOURCE)
 
         if zones_mapping is not None:
             trips = (
@@ -102,6 +117,29 @@ def load_years(
     return attributes, trips
 
 
+def _loader_options(**_) -> dict:
+    return {
+        "zones_mapping": load_zone_mapping(
+            get_config_path(SOURCE, "sa1-correspondence-file.csv")
+        )
+    }
+
+
+SPEC = sources.SourceSpec(
+    name=SOURCE,
+    data_dir="QHTS",
+    loader=load_years,
+    configs={
+        "hh_config": "hh_dictionary.yaml",
+        "person_config": "person_dictionary.yaml",
+        "trips_config": "trip_dictionary.yaml",
+    },
+    years=YEARS,
+    raw_files=RAW_FILES,
+    options=_loader_options,
+)
+
+
 def preprocess_households(
     hhs: pl.DataFrame, config: dict, year: str
 ) -> pl.DataFrame:
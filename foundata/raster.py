@@ -0,0 +1,202 @@
+"""Fixed-resolution activity rasters for model training.
+
+Plans are written as dense `uint8` arrays of shape (n_plans, 1440 /
+resolution), one row per pid, where each column is a time bin of
+`resolution` minutes:
+
+    acts.npy   activity type at the start of each bin (0 while travelling)
+    zones.npy  activity zone at the start of each bin (0 while travelling)
+    modes.npy  trip mode at the start of each bin (0 while at an activity)
+    pids.parquet  row -> pid index
+    raster.json   resolution and the code -> label vocabulary of each array
+
+Codes are 1-based indices into the template's allowed set for the field,
+with 0 reserved for "nothing" and for values outside the set. The arrays
+are standard `.npy` files, so training code can open them with
+`numpy.load(path, mmap_mode="r")` (or `load_raster`) and slice batches
+without copying or regrouping rows.
+"""
+
+import json
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import polars as pl
+
+from foundata import utils
+
+DAY = 1440
+ARRAYS = ("acts", "zones", "modes")
+
+
+def vocabularies() -> dict[str, list[str]]:
+    """Label vocabulary of each raster, from the template's allowed sets."""
+    trips = utils.get_template_trips()
+    return {
+        "acts": list(trips["dact"]["set"]),
+        "zones": list(trips["dzone"]["set"]),
+        "modes": list(trips["mode"]["set"]),
+    }
+
+
+def encode(values: pl.Series, vocabulary: list[str]) -> np.ndarray:
+    """1-based uint8 codes of `values` in `vocabulary`; 0 if absent or null."""
+    codes = {label: i + 1 for i, label in enumerate(vocabulary)}
+    return (
+        values.cast(pl.String)
+        .replace_strict(codes, default=0, return_dtype=pl.UInt8)
+        .fill_null(0)
+        .to_numpy()
+    )
+
+
+def time_bins(
+    start: pl.Series, end: pl.Series, resolution: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """First and one-past-last bin whose start time lies in [start, end).
+
+    Times are clipped to the day, so day-wrapped ends fill to midnight.
+    """
+    start = start.fill_null(0).clip(0, DAY).to_numpy().astype(np.int64)
+    end = end.fill_null(0).clip(0, DAY).to_numpy().astype(np.int64)
+    first = -(-start // resolution)  # ceil
+    last = np.maximum(-(-end // resolution), first)
+    return first, last
+
+
+def paint(
+    out: np.ndarray,
+    rows: np.ndarray,
+    first: np.ndarray,
+    last: np.ndarray,
+    codes: np.ndarray,
+    chunk_size: int = 1_000_000,
+) -> None:
+    """Write `codes[i]` into `out[rows[i], first[i]:last[i]]` for every i.
+
+    Intervals are expanded to cells with numpy in chunks of roughly
+    `chunk_size` cells, so memory stays bounded for large exports. Later
+    intervals overwrite earlier ones where they overlap.
+    """
+    lengths = last - first
+    keep = lengths > 0
+    rows, first, lengths, codes = (
+        rows[keep],
+        first[keep],
+        lengths[keep],
+        codes[keep],
+    )
+    cells = np.cumsum(lengths)
+    start = 0
+    while start < len(rows):
+        limit = (cells[start - 1] if start else 0) + chunk_size
+        stop = max(int(np.searchsorted(cells, limit, side="right")), start + 1)
+        n = lengths[start:stop]
+        offsets = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        out[
+            np.repeat(rows[start:stop], n),
+            np.repeat(first[start:stop], n) + offsets,
+        ] = np.repeat(codes[start:stop], n)
+        start = stop
+
+
+def rasterise(
+    activities: pl.DataFrame,
+    trips: Optional[pl.DataFrame] = None,
+    resolution: int = 10,
+    out_dir: Optional[str | Path] = None,
+) -> dict[str, np.ndarray]:
+    """Rasterise plans to acts/zones/modes arrays.
+
+    Args:
+        activities: Output of `post_process.trips_to_activities`, with
+            pid, act, zone, start and end.
+        trips: Optional trips with pid, mode, tst and tet; without them the
+            modes raster is all zeros.
+        resolution: Bin width in minutes; must divide 1440.
+        out_dir: If given, arrays are written there as `.npy` memmaps
+            (with the pid index and vocabulary) instead of held in memory.
+
+    Returns:
+        Dict of the arrays by name (memmaps when `out_dir` is given), plus
+        "pids", the pid of each row.
+    """
+    if resolution <= 0 or DAY % resolution:
+        raise ValueError(f"resolution must divide {DAY}, got {resolution}")
+    n_bins = DAY // resolution
+    vocab = vocabularies()
+
+    pids = activities.select(pl.col("pid").unique().sort())
+    row_of = pids.with_row_index("row")
+    n = pids.height
+
+    if out_dir is not None:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            name: np.lib.format.open_memmap(
+                out_dir / f"{name}.npy",
+                mode="w+",
+                dtype=np.uint8,
+                shape=(n, n_bins),
+            )
+            for name in ARRAYS
+        }  # new memmaps are zero-filled
+    else:
+        arrays = {
+            name: np.zeros((n, n_bins), dtype=np.uint8) for name in ARRAYS
+        }
+
+    acts = activities.join(row_of, on="pid", how="left").sort("row", "start")
+    rows = acts["row"].to_numpy().astype(np.int64)
+    first, last = time_bins(acts["start"], acts["end"], resolution)
+    paint(arrays["acts"], rows, first, last, encode(acts["act"], vocab["acts"]))
+    paint(
+        arrays["zones"], rows, first, last, encode(acts["zone"], vocab["zones"])
+    )
+
+    if trips is not None:
+        legs = trips.join(row_of, on="pid", how="inner").sort("row", "tst")
+        rows = legs["row"].to_numpy().astype(np.int64)
+        first, last = time_bins(legs["tst"], legs["tet"], resolution)
+        paint(
+            arrays["modes"],
+            rows,
+            first,
+            last,
+            encode(legs["mode"], vocab["modes"]),
+        )
+
+    if out_dir is not None:
+        for array in arrays.values():
+            array.flush()
+        pids.write_parquet(out_dir / "pids.parquet")
+        with open(out_dir / "raster.json", "w") as f:
+            json.dump(
+                {"resolution": resolution, "n_plans": n, "vocab": vocab},
+                f,
+                indent=2,
+            )
+
+    arrays["pids"] = pids["pid"].to_numpy()
+    return arrays
+
+
+def load_raster(path: str | Path, mmap_mode: str = "r") -> dict:
+    """Open an exported raster directory without reading the arrays.
+
+    Returns:
+        Dict with the memory-mapped arrays by name, "pids" (Series) and
+        "meta" (the contents of raster.json).
+    """
+    path = Path(path)
+    with open(path / "raster.json") as f:
+        meta = json.load(f)
+    raster = {
+        name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode)
+        for name in ARRAYS
+    }
+    raster["pids"] = pl.read_parquet(path / "pids.parquet")["pid"]
+    raster["meta"] = meta
+    return raster
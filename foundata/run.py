@@ -1,37 +1,38 @@
 #!/usr/bin/env python3
 """Run the full foundata pipeline and save outputs."""
 
+import json
+import shutil
+import tempfile
+from functools import partial
 from pathlib import Path
+from typing import Optional
 
 import polars as pl
 
 from foundata import (
     anomaly,
-    cmap,
+    config_cache,
     filter,
     fix,
-    ktdb,
-    ltds,
-    nhts,
-    nts,
-    odin,
+    ingest,
     plots,
     post_process,
-    qhts,
+    sources,
     tables,
+    tasks,
     utils,
     verify,
-    vista,
 )
 
-CONFIGS_ROOT = Path(__file__).resolve().parent.parent / "configs"
+CONFIGS_ROOT = sources.CONFIGS_ROOT
 
 
 def print_markdown_table(title: str, table: str):
     print(f"\n### {title}\n\n{table}\n")
 
 
-def process_source(attributes, trips, source_name):
+def process_source(attributes, trips, source_name, norm_weights=True):
     attributes = utils.compute_avg_speed(attributes, trips)
     attributes = utils.split_employment_type(attributes)
     attributes = utils.correct_child_employment(attributes)
@@ -46,7 +47,8 @@ def process_source(attributes, trips, source_name):
     attributes, trips = filter.columns(attributes, trips)
     attributes, trips = fix.fix_types(attributes, trips)
     attributes = fix.unknown_to_null(attributes)
-    attributes = utils.norm_weights(attributes)
+    if norm_weights:
+        attributes = utils.norm_weights(attributes)
     attributes, trips = filter.trips_on_attribute_pids(attributes, trips)
     attributes, trips = filter.activity_consistency(attributes, trips)
     trips = filter.trips_on_endings(trips, time_limit=1440)
@@ -60,6 +62,172 @@ def process_source(attributes, trips, source_name):
     return attributes, trips
 
 
+def load_source(
+    source: str,
+    data_root: Path,
+    years: Optional[list] = None,
+    use_cache: bool = False,
+    partition: Optional[pl.Expr] = None,
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Load one registered source's raw attributes and trips.
+
+    Args:
+        source: Source name, e.g. "nhts" (see `foundata.sources`).
+        data_root: Base data directory.
+        years: Years to load for multi-year sources (default: all).
+        use_cache: Whether raw files are read through the Parquet cache
+            (CMAP also caches its location index).
+        partition: Household predicate for partitioned sources (see
+            `SourceSpec.partitions`).
+    """
+    return sources.get(source).load(
+        data_root, years=years, use_cache=use_cache, partition=partition
+    )
+
+
+def process_all(
+    source: str,
+    data_root: Path,
+    use_cache: bool = False,
+    partitions: Optional[dict[str, str | int]] = None,
+    spill_dir: Optional[Path] = None,
+) -> tuple[pl.LazyFrame, pl.LazyFrame]:
+    """Load and process every year of a source in this process.
+
+    `partitions` maps sources to how to partition them (e.g.
+    {"nts": "year"}) for sources with `SourceSpec.partitions`. The raw
+    tables are then split into `spill_dir` in one scan each, and each
+    partition is loaded and processed on its own and written back to
+    `spill_dir`, so at most one partition is held in memory. The returned
+    frames scan the processed partitions, so `spill_dir` must outlive them.
+    """
+    spec = sources.get(source)
+    by = (partitions or {}).get(source)
+    if spec.partitions is None or by is None:
+        attributes, trips = spec.load(data_root, use_cache=use_cache)
+        attributes, trips = process_source(attributes, trips, source.upper())
+        return attributes.lazy(), trips.lazy()
+    if spill_dir is None:
+        raise ValueError(f"Partitioned {source} requires a spill_dir")
+
+    spill = Path(spill_dir) / source
+    spill.mkdir(parents=True, exist_ok=True)
+    parts = spec.partitions(data_root / spec.data_dir, by, spill / "raw")
+    for i, (label, partition) in enumerate(parts):
+        print(f"{source.upper()} partition {label}")
+        attributes, trips = spec.load(
+            data_root, use_cache=use_cache, partition=partition
+        )
+        attributes, trips = process_source(
+            attributes,
+            trips,
+            f"{source.upper()} {label}",
+            norm_weights=False,
+        )
+        attributes.write_parquet(spill / f"attributes_{i}.parquet")
+        trips.write_parquet(spill / f"trips_{i}.parquet")
+        del attributes, trips
+    shutil.rmtree(spill / "raw", ignore_errors=True)
+    attributes, trips = (
+        pl.scan_parquet(
+            [spill / f"{name}_{i}.parquet" for i in range(len(parts))]
+        )
+        for name in ("attributes", "trips")
+    )
+    return utils.norm_weights(attributes), trips
+
+
+def source_tasks(
+    source: str,
+    data_root: Path,
+    partitions: Optional[dict[str, str | int]] = None,
+) -> list[tasks.Task]:
+    """One task per year of a source (or per partition, see `process_all`)."""
+    spec = sources.get(source)
+    by = (partitions or {}).get(source)
+    if spec.years is not None:
+        return [tasks.Task(source, year) for year in spec.years]
+    if spec.partitions is not None and by is not None:
+        return [
+            tasks.Task(source, label)
+            for label, _ in spec.partitions(data_root / spec.data_dir, by)
+        ]
+    return [tasks.Task(source)]
+
+
+def task_inputs(data_root: Path, task: tasks.Task) -> list[Path]:
+    """Config files of the task's source, the output template and its
+    year's raw data directory."""
+    spec = sources.get(task.source)
+    configs = [
+        path
+        for path in spec.config_dir.rglob("*")
+        if path.is_file() and config_cache.COMPILED_DIR not in path.parts
+    ]
+    configs.append(utils.template())
+    raw = data_root / spec.data_dir
+    if spec.years is not None and (raw / str(task.year)).is_dir():
+        raw = raw / str(task.year)
+    return configs + [raw]
+
+
+def run_task(
+    data_root: Path,
+    use_cache: bool,
+    partitions: Optional[dict[str, str | int]],
+    task: tasks.Task,
+) -> tuple[pl.DataFrame, pl.DataFrame, dict]:
+    """Load and process one task's data; weights are normalised on merge.
+
+    Returns (attributes, trips, meta), with the files the task resolved by
+    fuzzy matching and its `fix.day_wrap` counts in meta.
+    """
+    # workers are reused across tasks
+    utils.resolved_files(reset=True)
+    fix.day_wrap_counts(reset=True)
+    if use_cache:
+        ingest.enable_cache(data_root)
+    spec = sources.get(task.source)
+    if spec.years is None and task.year is not None:
+        by = partitions[task.source]
+        partition = dict(spec.partitions(data_root / spec.data_dir, by))
+        attributes, trips = spec.load(
+            data_root, use_cache=use_cache, partition=partition[task.year]
+        )
+    else:
+        years = None if task.year is None else [task.year]
+        attributes, trips = spec.load(
+            data_root, years=years, use_cache=use_cache
+        )
+    attributes, trips = process_source(
+        attributes, trips, task.name, norm_weights=False
+    )
+    meta = {
+        "resolved_files": utils.resolved_files(),
+        "day_wrap": fix.day_wrap_counts(),
+    }
+    return attributes, trips, meta
+
+
+def write_manifest(
+    path: Path,
+    data_root: Path,
+    sources: list[str],
+    resolved: dict,
+    day_wraps: dict,
+) -> None:
+    """Record what a run read and corrected: sources, fuzzily resolved raw
+    files and `fix.day_wrap` counts by source."""
+    manifest = {
+        "data_root": str(data_root),
+        "sources": sources,
+        "resolved_files": resolved,
+        "day_wrap": day_wraps,
+    }
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
 def runner(
     data_root: str,
     output: str,
@@ -67,249 +235,102 @@ def runner(
     omit: list[str],
     home_based: bool = False,
     fix_consecutive: bool = False,
+    use_cache: bool = False,
+    nts_partitions: str | int | None = None,
+    work_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    executor: str = "process",
+    resume: bool = True,
 ):
     data_root = Path(data_root).expanduser()
     output = Path(output).expanduser()
     output.mkdir(exist_ok=True, parents=True)
 
-    sources = {"ltds", "vista", "qhts", "cmap", "nhts", "nts", "ktdb", "odin"}
+    selected = set(sources.names())
     if select:
-        sources = set(select)
+        selected = set(select)
     if omit:
-        sources -= set(omit)
-    if not sources:
+        selected -= set(omit)
+    if not selected:
         print("No sources selected. Exiting.")
         return
+    ordered = [spec.name for spec in sources.specs(selected)]
+    partitions = None if nts_partitions is None else {"nts": nts_partitions}
+
+    print(f"Selected sources: {', '.join(ordered)}")
 
-    print(f"Selected sources: {', '.join(sources)}")
+    if use_cache:
+        cache_root = ingest.enable_cache(data_root)
+        print(f"Reading raw files through cache at {cache_root}")
 
     all_attributes = []
     all_trips = []
-
-    # ------------------------------------------------------------------
-    # KTDB
-    # ------------------------------------------------------------------
-    if "ktdb" in sources:
-        person_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "ktdb" / "person_dictionary.yaml"
-        )
-        trips_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "ktdb" / "trip_dictionary.yaml"
-        )
-
-        attributes, trips = ktdb.load(
-            data_root=data_root / "KTDB",
-            person_config=person_config,
-            trips_config=trips_config,
-        )
-        attributes, trips = process_source(attributes, trips, "KTDB")
-        all_attributes.append(attributes)
-        all_trips.append(trips)
-
-    # ------------------------------------------------------------------
-    # LTDS
-    # ------------------------------------------------------------------
-    if "ltds" in sources:
-        hh_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "ltds" / "hh_dictionary.yaml"
-        )
-        person_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "ltds" / "person_dictionary.yaml"
-        )
-        person_data_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "ltds" / "person_data_dictionary.yaml"
-        )
-        trips_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "ltds" / "trip_dictionary.yaml"
-        )
-        stages_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "ltds" / "stage_dictionary.yaml"
-        )
-
-        attributes, trips = ltds.load_years(
-            years=["LTDS2425", "LTDS2324", "LTDS2223", "LTDS1920"],
-            data_root=data_root / "LTDS",
-            hh_config=hh_config,
-            person_config=person_config,
-            person_data_config=person_data_config,
-            trips_config=trips_config,
-            stages_config=stages_config,
-        )
-        attributes, trips = process_source(attributes, trips, "LTDS")
-        all_attributes.append(attributes)
-        all_trips.append(trips)
-
-    # ------------------------------------------------------------------
-    # VISTA
-    # ------------------------------------------------------------------
-    if "vista" in sources:
-        hh_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "vista" / "hh_dictionary.yaml"
-        )
-        person_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "vista" / "person_dictionary.yaml"
-        )
-        trips_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "vista" / "trip_dictionary.yaml"
-        )
-
-        attributes, trips = vista.load_years(
-            years=["2012-2020", "2022-2023", "2023-2024"],
-            data_root=data_root / "VISTA",
-            hh_config=hh_config,
-            person_config=person_config,
-            trips_config=trips_config,
-        )
-        attributes, trips = process_source(attributes, trips, "VISTA")
-        all_attributes.append(attributes)
-        all_trips.append(trips)
-
-    # ------------------------------------------------------------------
-    # QHTS
-    # ------------------------------------------------------------------
-    if "qhts" in sources:
-        hh_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "qhts" / "hh_dictionary.yaml"
-        )
-        person_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "qhts" / "person_dictionary.yaml"
-        )
-        trips_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "qhts" / "trip_dictionary.yaml"
-        )
-        zone_mapping = qhts.load_zone_mapping(
-            CONFIGS_ROOT / "qhts" / "sa1-correspondence-file.csv"
-        )
-
-        attributes, trips = qhts.load_years(
-            data_root=data_root / "QHTS",
-            years=["2019-22", "2022-25"],
-            hh_config=hh_config,
-            person_config=person_config,
-            trips_config=trips_config,
-            zones_mapping=zone_mapping,
-        )
-        attributes, trips = process_source(attributes, trips, "QHTS")
-        all_attributes.append(attributes)
-        all_trips.append(trips)
-
-    # ------------------------------------------------------------------
-    # CMAP
-    # ------------------------------------------------------------------
-    if "cmap" in sources:
-        hh_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "cmap" / "hh_dictionary.yaml"
-        )
-        person_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "cmap" / "person_dictionary.yaml"
-        )
-        trips_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "cmap" / "trip_dictionary.yaml"
-        )
-
-        attributes, trips = cmap.load(
-            data_root=data_root / "CMAP",
-            configs_root=CONFIGS_ROOT,
-            hh_config=hh_config,
-            person_config=person_config,
-            trips_config=trips_config,
-        )
-        attributes, trips = process_source(attributes, trips, "CMAP")
-        all_attributes.append(attributes)
-        all_trips.append(trips)
-
-    # ------------------------------------------------------------------
-    # NHTS
-    # ------------------------------------------------------------------
-    if "nhts" in sources:
-        hh_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "nhts" / "hh_dictionary.yaml"
-        )
-        person_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "nhts" / "person_dictionary.yaml"
-        )
-        trips_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "nhts" / "trip_dictionary.yaml"
-        )
-
-        attributes, trips = nhts.load(
-            data_root=data_root / "NHTS",
-            years=[2022, 2017, 2009, 2001],
-            hh_config=hh_config,
-            person_config=person_config,
-            trips_config=trips_config,
-        )
-        attributes, trips = process_source(attributes, trips, "NHTS")
-        all_attributes.append(attributes)
-        all_trips.append(trips)
-
-    # ------------------------------------------------------------------
-    # NTS
-    # ------------------------------------------------------------------
-    if "nts" in sources:
-        hh_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "nts" / "hh_dictionary.yaml"
-        )
-        person_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "nts" / "person_dictionary.yaml"
-        )
-        trips_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "nts" / "trip_dictionary.yaml"
-        )
-        stages_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "nts" / "stage_dictionary.yaml"
-        )
-        days_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "nts" / "day_dictionary.yaml"
-        )
-
-        attributes, trips = nts.load(
-            data_root=data_root / "NTS",
-            hh_config=hh_config,
-            person_config=person_config,
-            trips_config=trips_config,
-            stages_config=stages_config,
-            days_config=days_config,
-        )
-        attributes, trips = process_source(attributes, trips, "NTS")
-        all_attributes.append(attributes)
-        all_trips.append(trips)
-
-    # ------------------------------------------------------------------
-    # ODIN
-    # ------------------------------------------------------------------
-    if "odin" in sources:
-        hh_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "odin" / "hh_dictionary.yaml"
-        )
-        person_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "odin" / "person_dictionary.yaml"
-        )
-        trips_config = utils.load_yaml_config(
-            CONFIGS_ROOT / "odin" / "trip_dictionary.yaml"
-        )
-
-        attributes, trips = odin.load(
-            data_root=data_root / "ODIN",
-            configs_root=CONFIGS_ROOT,
-            years=[2018, 2019, 2020, 2022, 2023, 2024],
-            hh_config=hh_config,
-            person_config=person_config,
-            trips_config=trips_config,
-        )
-        attributes, trips = process_source(attributes, trips, "ODIN")
-        all_attributes.append(attributes)
-        all_trips.append(trips)
+    # processed partitions, streamed to the outputs
+    spill = tempfile.TemporaryDirectory(prefix="foundata_")
+
+    if work_dir is None:
+        utils.resolved_files(reset=True)
+        fix.day_wrap_counts(reset=True)
+        for source in ordered:
+            attributes, trips = process_all(
+                source, data_root, use_cache, partitions, Path(spill.name)
+            )
+            all_attributes.append(attributes)
+            all_trips.append(trips)
+        resolved = utils.resolved_files()
+        day_wraps = fix.day_wrap_counts()
+    else:
+        todo = [
+            task
+            for source in ordered
+            for task in source_tasks(source, data_root, partitions)
+        ]
+        work_dir = Path(work_dir).expanduser()
+        print(f"Running {len(todo)} tasks in {work_dir}")
+        tasks.run_tasks(
+            todo,
+            partial(run_task, data_root, use_cache, partitions),
+            work_dir,
+            inputs=partial(task_inputs, data_root),
+            workers=workers,
+            executor=executor,
+            resume=resume,
+            options={"partitions": partitions},
+        )
+        for attributes, trips in tasks.merge(work_dir, todo).values():
+            all_attributes.append(utils.norm_weights(attributes).lazy())
+            all_trips.append(trips.lazy())
+        resolved, day_wraps = {}, {}
+        for task in todo:
+            meta = tasks.read_done(work_dir, task)["meta"]
+            resolved.update(meta.get("resolved_files", {}))
+            for source, counts in meta.get("day_wrap", {}).items():
+                totals = day_wraps.setdefault(source, dict.fromkeys(counts, 0))
+                for key, value in counts.items():
+                    totals[key] += value
+    for source, counts in day_wraps.items():
+        print(
+            f"{source}: day_wrap shifted {counts['midnight']} trips past "
+            f"midnight and {counts['overlap']} overlapping trips "
+            f"(of {counts['trips']})"
+        )
+    write_manifest(
+        output / "manifest.json", data_root, ordered, resolved, day_wraps
+    )
 
     # ------------------------------------------------------------------
     # Concat and write
     # ------------------------------------------------------------------
 
+    ingest.disable_cache()
     print("Concatenating and writing outputs...")
 
     all_attributes = pl.concat(all_attributes, how="vertical")
     all_trips = pl.concat(all_trips, how="vertical")
 
+    if home_based or fix_consecutive:
+        all_attributes, all_trips = pl.collect_all([all_attributes, all_trips])
+
     if home_based:
         print("Filtering to home-based trips only...")
         all_attributes, all_trips = filter.home_based(all_attributes, all_trips)
@@ -321,16 +342,23 @@ def runner(
             all_trips, non_consecutive_types=non_consecutive_types
         )
 
-    all_attributes.write_csv(output / "attributes.csv")
-    binned_attributes = post_process.discretise_numeric(
+    all_attributes.lazy().sink_csv(output / "attributes.csv")
+    all_trips.lazy().sink_csv(output / "trips.csv")
+    # binning and diagnostics need the merged outputs in memory
+    all_attributes, all_trips = pl.collect_all(
+        [all_attributes.lazy(), all_trips.lazy()]
+    )
+    spill.cleanup()
+    bin_spec = post_process.fit_bins(
         all_attributes,
         n_bins=5,
         method="quantile",
         exclude_cols=["year", "month", "weight", "vehicles", "hh_size"],
     )
+    post_process.save_bin_spec(bin_spec, output / "bin_spec.json")
+    binned_attributes = post_process.apply_bins(all_attributes, bin_spec)
     binned_attributes = post_process.fill_nulls(binned_attributes)
     binned_attributes.write_csv(output / "binned_attributes.csv")
-    all_trips.write_csv(output / "trips.csv")
 
     if not verify.trips_pids_subset_of_attributes(all_attributes, all_trips):
         raise ValueError("ERROR: Trips has pids not in attributes")
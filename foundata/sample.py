@@ -0,0 +1,121 @@
+"""Stratified and weight-aware sampling of plans.
+
+Samples are drawn over group IDs (e.g. `pid`) in one grouped pass: each ID
+gets a random key from a seeded hash of its value, and the IDs with the
+smallest keys are kept, overall or within each stratum. This is the
+bottom-k form of reservoir sampling, so Parquet inputs can be scanned
+lazily and only the ID, strata and weight columns are ever materialised.
+The selected IDs are then used to filter attributes, trips and activities
+alike, so all tables stay consistent.
+
+With a weight column (e.g. the normalised `weight` from
+`utils.norm_weights`) keys are drawn as `-log(u) / weight`
+(Efraimidis-Spirakis), giving a weighted sample without replacement in which
+IDs are picked with probability proportional to their weight.
+"""
+
+from pathlib import Path
+from typing import Optional, Sequence
+
+import polars as pl
+
+KEY = "_key"
+
+
+def uniform(group: str, seed: int) -> pl.Expr:
+    """Seeded pseudo-random Float64 in (0, 1] from a hash of `group`."""
+    bits = pl.col(group).cast(pl.String).hash(seed) // 2**11  # 53 bits
+    return (bits.cast(pl.Float64) + 1) / 2**53
+
+
+def sample_key(group: str, seed: int, weight: Optional[str] = None) -> pl.Expr:
+    """Sampling key per row; the smallest keys are sampled first."""
+    u = uniform(group, seed)
+    if weight is None:
+        return u.alias(KEY)
+    return (-u.log() / pl.col(weight).cast(pl.Float64)).alias(KEY)
+
+
+def _over(expr: pl.Expr, strata: Sequence[str]) -> pl.Expr:
+    return expr.over(strata) if strata else expr
+
+
+def sample_groups(
+    lf: pl.LazyFrame | pl.DataFrame,
+    group: str = "pid",
+    n: Optional[int] = None,
+    fraction: Optional[float] = None,
+    strata: Sequence[str] = (),
+    weight: Optional[str] = None,
+    seed: int = 0,
+) -> pl.LazyFrame:
+    """Select a sample of group IDs.
+
+    Args:
+        lf: Frame with one or more rows per group, e.g. attributes.
+        group: ID column to sample.
+        n: Number of IDs to sample. Exclusive with `fraction`.
+        fraction: Share of IDs to sample, in (0, 1].
+        strata: Columns to stratify on. Each stratum gets a share of `n`
+            proportional to its size (or total weight, when weighted), or
+            `fraction` of its own IDs; quotas are rounded per stratum.
+        weight: Optional weight column. IDs with null or non-positive
+            weight are never sampled.
+        seed: Seed for the hash keys, for reproducible samples.
+
+    Returns:
+        LazyFrame with the single column `group`, one row per sampled ID.
+    """
+    if (n is None) == (fraction is None):
+        raise ValueError("Exactly one of n or fraction is required")
+    if fraction is not None and not 0 < fraction <= 1:
+        raise ValueError(f"fraction must be in (0, 1], got {fraction}")
+    if n is not None and n < 0:
+        raise ValueError(f"n must be non-negative, got {n}")
+    strata = list(strata)
+    lf = lf.lazy()
+
+    if fraction is not None and not strata and weight is None:
+        # a pure hash filter: no ranking needed, fully streaming
+        return (
+            lf.select(group)
+            .drop_nulls()
+            .unique()
+            .filter(uniform(group, seed) <= fraction)
+        )
+
+    cols = [group, *strata] + ([weight] if weight else [])
+    ids = lf.select(cols).drop_nulls(group).unique(subset=[group])
+    if weight is not None:
+        ids = ids.filter(pl.col(weight) > 0)
+    ids = ids.with_columns(sample_key(group, seed, weight))
+
+    if n is not None and not strata:
+        return ids.sort(KEY).head(n).select(group)  # bottom-k
+
+    if fraction is not None:
+        quota = (_over(pl.len(), strata) * fraction).round()
+    else:
+        size = pl.col(weight).sum() if weight else pl.len()
+        quota = (size.over(strata) / size * n).round()
+    rank = _over(pl.col(KEY).rank(method="ordinal"), strata)
+    return ids.filter(rank <= quota).select(group)
+
+
+def per_group(
+    df: pl.DataFrame, on: str, max_per_group: int, seed: Optional[int] = None
+) -> pl.DataFrame:
+    """Up to `max_per_group` random rows per non-null `on` group."""
+    return df.filter(pl.col(on).is_not_null()).filter(
+        pl.int_range(pl.len()).shuffle(seed).over(on) < max_per_group
+    )
+
+
+def sink_sample(
+    lf: pl.LazyFrame, ids: pl.LazyFrame, group: str, path: Path
+) -> pl.LazyFrame:
+    """Lazy sink of the rows of `lf` whose `group` is in `ids`."""
+    part = lf.join(ids, on=group, how="semi")
+    if Path(path).suffix == ".parquet":
+        return part.sink_parquet(path, lazy=True)
+    return part.sink_csv(path, lazy=True)
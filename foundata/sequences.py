@@ -0,0 +1,149 @@
+"""Plan sequence fingerprints and deduplication index.
+
+Many plans share the same activity/mode sequence (e.g. home -> car ->
+work -> car -> home at similar times). Each plan is reduced to a readable
+sequence key of its activities, modes and coarse time bins, e.g.
+
+    home>car@8-9>work>car@17-18>home
+
+and each key is given a `seq_id` from a blake2b digest of it, so IDs are
+the same in every run and Polars version, and separately built indexes
+(e.g. per source) can be joined. `build_index` returns a table of unique
+sequences with plan counts and total weight, plus a pid -> (seq_id, key)
+index, so statistics can be computed once per unique sequence and
+weighted by its multiplicity, and all plans following a sequence can be
+looked up with `find`. IDs are 64-bit, so two keys may share one; lookups
+compare keys too. Plans without trips have the key "home".
+"""
+
+import hashlib
+from typing import Optional
+
+import polars as pl
+
+SEQ_ID = "seq_id"
+KEY = "key"
+STAY_HOME = "home"
+
+
+def seq_id(key: str) -> int:
+    """Stable 64-bit ID of a sequence key."""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _label(col: str) -> pl.Expr:
+    return pl.col(col).cast(pl.String).fill_null("null")
+
+
+def sequence_keys(
+    trips: pl.DataFrame | pl.LazyFrame, resolution: int = 60, on: str = "pid"
+) -> pl.DataFrame | pl.LazyFrame:
+    """One row per plan in `trips`: `on`, `key` and `n_trips`.
+
+    Args:
+        trips: Trips with `on`, seq, oact, dact, mode, tst and tet.
+        resolution: Width in minutes of the time bins in the key, so
+            plans with nearby times share a key.
+        on: Plan ID column.
+    """
+    if resolution <= 0:
+        raise ValueError(f"resolution must be positive, got {resolution}")
+    token = pl.concat_str(
+        _label("mode"),
+        pl.lit("@"),
+        (pl.col("tst") // resolution).cast(pl.String).fill_null("null"),
+        pl.lit("-"),
+        (pl.col("tet") // resolution).cast(pl.String).fill_null("null"),
+        pl.lit(">"),
+        _label("dact"),
+    )
+    return (
+        trips.sort(on, "seq")
+        .group_by(on, maintain_order=True)
+        .agg(
+            pl.concat_str(
+                _label("oact").first(), pl.lit(">"), token.str.join(">")
+            ).alias(KEY),
+            pl.len().alias("n_trips"),
+        )
+    )
+
+
+def build_index(
+    attributes: pl.DataFrame | pl.LazyFrame,
+    trips: pl.DataFrame | pl.LazyFrame,
+    resolution: int = 60,
+    weight: Optional[str] = "weight",
+    on: str = "pid",
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Unique sequences with multiplicities, and the plan -> sequence index.
+
+    Args:
+        attributes: One row per plan; plans without trips are "home".
+        trips: Trips for the plans, see `sequence_keys`.
+        resolution: Time bin width in minutes.
+        weight: Attributes weight column summed per sequence, if present.
+        on: Plan ID column.
+
+    Returns:
+        (sequences, index): sequences has seq_id, key, n_trips, n_plans and
+        weight (when available), sorted by n_plans descending; index has
+        `on`, seq_id and key in attributes order.
+    """
+    attributes = attributes.lazy()
+    has_weight = weight in attributes.collect_schema().names()
+    cols = [on, weight] if has_weight else [on]
+    plans = (
+        attributes.select(cols)
+        .join(
+            sequence_keys(trips.lazy(), resolution, on),
+            on=on,
+            how="left",
+            maintain_order="left",
+        )
+        .with_columns(
+            pl.col(KEY).fill_null(STAY_HOME),
+            pl.col("n_trips").fill_null(0),
+        )
+        .collect()
+    )
+    keys = plans[KEY].unique()
+    ids = pl.Series([seq_id(key) for key in keys], dtype=pl.UInt64)
+    plans = plans.with_columns(
+        pl.col(KEY).replace_strict(keys, ids).alias(SEQ_ID)
+    )
+
+    aggs = [pl.len().alias("n_plans")]
+    if has_weight:
+        aggs.append(pl.col(weight).sum().alias("weight"))
+    sequences = (
+        plans.group_by(SEQ_ID, KEY, "n_trips")
+        .agg(aggs)
+        .sort("n_plans", KEY, descending=[True, False])
+    )
+    shared = sequences.height - sequences[SEQ_ID].n_unique()
+    if shared:
+        print(
+            f"WARNING: {shared} sequence keys share a seq_id with another "
+            "key; compare keys when looking them up"
+        )
+    return sequences, plans.select(on, SEQ_ID, KEY)
+
+
+def find(
+    sequences: pl.DataFrame,
+    index: pl.DataFrame,
+    pattern: str,
+    regex: bool = False,
+) -> pl.DataFrame:
+    """Index rows of all plans whose sequence key matches `pattern`.
+
+    By default `pattern` must equal the whole key; with `regex=True` it is
+    a regular expression searched within keys (e.g. `">rail@"`).
+    """
+    if regex:
+        matched = sequences.filter(pl.col(KEY).str.contains(pattern))
+    else:
+        matched = sequences.filter(pl.col(KEY) == pattern)
+    return index.join(matched.select(SEQ_ID, KEY), on=[SEQ_ID, KEY], how="semi")
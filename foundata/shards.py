@@ -0,0 +1,161 @@
+"""Sharded, nested training export of the pipeline outputs.
+
+Each plan (pid) becomes one row holding its attributes as a struct and its
+trips (and optionally activities) as lists of structs, so a shard is
+self-contained and a worker never joins on `pid`. Plans are assigned to
+shards from a seeded hash of the pid (`split.fold_expr`), so assignment is
+deterministic and independent of input order, and rows within each shard
+are ordered by a second hash so shards are already shuffled. A
+`manifest.json` records the plans, trips, sources and years in each shard.
+"""
+
+import json
+import math
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import polars as pl
+
+from foundata import plans as pln
+from foundata import split
+
+SHARD = split.FOLD
+FORMATS = {"parquet": ".parquet", "ipc": ".arrow"}
+
+
+def nest_plans(
+    attributes: pl.LazyFrame | pl.DataFrame,
+    trips: pl.LazyFrame | pl.DataFrame,
+    activities: Optional[pl.LazyFrame | pl.DataFrame] = None,
+) -> pl.LazyFrame:
+    """One row per pid: `source`, `year`, `attributes` struct, `trips` list.
+
+    Persons without trips (or activities) get empty lists. `source` and
+    `year` are repeated at the top level so shards can be filtered without
+    unpacking the struct.
+    """
+    attributes = attributes.lazy()
+    names = attributes.collect_schema().names()
+    top = [c for c in ("source", "year") if c in names]
+    plans = attributes.select(
+        "pid", *top, pl.struct(pl.exclude("pid")).alias("attributes")
+    )
+    nested = [("trips", pln.nest(trips.lazy(), "trips"))]
+    if activities is not None:
+        nested.append(("activities", pln.nest(activities.lazy(), "activities")))
+    for name, lists in nested:
+        plans = plans.join(lists, on="pid", how="left")
+        dtype = plans.collect_schema()[name]
+        plans = plans.with_columns(pl.col(name).fill_null(pl.lit([], dtype)))
+    return plans
+
+
+def shard_manifest(shard: pl.DataFrame, path: Path) -> dict:
+    """Manifest entry for one written shard."""
+    entry = {"file": path.name, "plans": shard.height}
+    for name in ("trips", "activities"):
+        if name in shard.columns:
+            entry[name] = int(shard[name].list.len().sum())
+    for col in ("source", "year"):
+        if col in shard.columns:
+            counts = shard[col].cast(pl.String).value_counts(sort=True)
+            entry[f"{col}s"] = dict(counts.iter_rows())
+    return entry
+
+
+def export_shards(
+    plans: pl.LazyFrame | pl.DataFrame,
+    out_dir: str | Path,
+    n_shards: Optional[int] = None,
+    plans_per_shard: Optional[int] = None,
+    seed: int = 0,
+    fmt: str = "parquet",
+    workers: Optional[int] = None,
+) -> dict:
+    """Write nested plans to hash-assigned shards, in parallel.
+
+    `plans` is streamed to per-shard staging files in one pass, then each
+    shard is ordered and written on its own, so the full set of nested
+    plans is never held in memory.
+
+    Args:
+        plans: Output of `nest_plans`.
+        out_dir: Output directory for `shard-XXXXX` files and manifest.json.
+        n_shards: Number of shards. Exclusive with `plans_per_shard`.
+        plans_per_shard: Target plans per shard; the shard count is
+            derived from it (shard sizes vary a little with the hash).
+        seed: Seed for pid-to-shard assignment and within-shard order.
+        fmt: "parquet" or "ipc" (Arrow IPC).
+        workers: Writer threads (default: ThreadPoolExecutor's default);
+            each holds one shard in memory.
+
+    Returns:
+        The manifest, also written to `out_dir/manifest.json`.
+    """
+    if (n_shards is None) == (plans_per_shard is None):
+        raise ValueError(
+            "Exactly one of n_shards or plans_per_shard is required"
+        )
+    if fmt not in FORMATS:
+        raise ValueError(
+            f"Unknown format '{fmt}', expected one of {list(FORMATS)}"
+        )
+    plans = plans.lazy()
+    if n_shards is None:
+        n_plans = plans.select(pl.len()).collect().item()
+        n_shards = max(math.ceil(n_plans / plans_per_shard), 1)
+    if n_shards < 1:
+        raise ValueError(f"n_shards must be at least 1, got {n_shards}")
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    order = split.group_hash("pid", seed + 1)
+    width = max(len(str(n_shards - 1)), 5)
+    empty = pl.DataFrame(schema=plans.collect_schema())
+
+    with tempfile.TemporaryDirectory(dir=out_dir, prefix=".staging-") as tmp:
+        # stream the plans to unordered per-shard files in one pass, so at
+        # most one shard per writer is held in memory when ordering them
+        staging = Path(tmp)
+        plans.with_columns(
+            split.fold_expr("pid", seed, folds=n_shards)
+        ).sink_parquet(
+            pl.PartitionByKey(staging, by=SHARD, include_key=False),
+            mkdir=True,
+        )
+
+        def write(shard: int) -> dict:
+            staged = staging / f"{SHARD}={shard}"
+            if staged.exists():
+                part = (
+                    pl.scan_parquet(
+                        staged / "*.parquet", hive_partitioning=False
+                    )
+                    .sort(order)
+                    .collect()
+                )
+            else:
+                part = empty
+            path = out_dir / f"shard-{shard:0{width}d}{FORMATS[fmt]}"
+            if fmt == "ipc":
+                part.write_ipc(path, compression="zstd")
+            else:
+                part.write_parquet(path)
+            return shard_manifest(part, path)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(write, range(n_shards)))
+
+    manifest = {
+        "format": fmt,
+        "seed": seed,
+        "n_shards": n_shards,
+        "plans": sum(entry["plans"] for entry in shards),
+        "columns": empty.columns,
+        "shards": shards,
+    }
+    with open(out_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
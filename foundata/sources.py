@@ -0,0 +1,127 @@
+"""Registry of survey sources.
+
+Each source module (e.g. `foundata.nhts`) exposes a `SPEC` describing how
+to load it: its raw data directory, YAML configs, survey years and loader.
+The runner loads any source through `SourceSpec.load`, so adding a source
+means adding its module to `MODULES` (which `scripts/scaffold_source.py`
+does) rather than editing the runner. Specs defined elsewhere can be added
+with `register`.
+
+Source modules are imported on first lookup, so importing this module is
+cheap.
+"""
+
+import importlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import polars as pl
+
+from foundata import utils
+
+CONFIGS_ROOT = utils.get_config_path()
+
+# source modules in run order
+MODULES = (
+    "ktdb",
+    "ltds",
+    "vista",
+    "qhts",
+    "cmap",
+    "nhts",
+    "nts",
+    "odin",
+)
+
+_registered: dict[str, "SourceSpec"] = {}
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    """How to load one source.
+
+    Attributes:
+        name: Source name, also its directory under `configs/`.
+        data_dir: Subdirectory of the data root holding its raw data.
+        loader: Returns raw (attributes, trips). Called with `data_root`,
+            one parsed config per `configs` entry, `years` for multi-year
+            sources and any keyword arguments from `options`.
+        configs: {loader argument: YAML file under `configs/<name>/`}.
+        years: Years loaded by default, or None for single-year sources.
+            Each year is one task in partitioned runs.
+        raw_files: [(glob, parse options), ...] of raw files under
+            `data_dir`, for `ingest.ingest`.
+        options: Extra loader keyword arguments from the run options
+            (`use_cache`, `partition`).
+        partitions: `(data_dir, by, split_dir=None) -> [(label,
+            partition), ...]` for sources that can be loaded in household
+            partitions. Each partition is passed to the loader as
+            `partition`; with `split_dir`, the raw tables are first split
+            into it so each partition reads only its own rows.
+    """
+
+    name: str
+    data_dir: str
+    loader: Callable[..., tuple[pl.DataFrame, pl.DataFrame]]
+    configs: dict[str, str]
+    years: Optional[list] = None
+    raw_files: list = field(default_factory=list)
+    options: Optional[Callable[..., dict]] = None
+    partitions: Optional[Callable[..., list]] = None
+
+    @property
+    def config_dir(self) -> Path:
+        return CONFIGS_ROOT / self.name
+
+    def load(
+        self,
+        data_root: str | Path,
+        years: Optional[list] = None,
+        **options,
+    ) -> tuple[pl.DataFrame, pl.DataFrame]:
+        """Load raw attributes and trips.
+
+        Args:
+            data_root: Base data directory (containing `data_dir`).
+            years: Years to load for multi-year sources (default: all).
+            **options: Run options passed to `options`, e.g. use_cache.
+        """
+        kwargs = {
+            arg: utils.load_yaml_config(self.config_dir / name)
+            for arg, name in self.configs.items()
+        }
+        if self.years is not None:
+            kwargs["years"] = self.years if years is None else years
+        if self.options is not None:
+            kwargs.update(self.options(**options))
+        return self.loader(
+            data_root=Path(data_root).expanduser() / self.data_dir, **kwargs
+        )
+
+
+def register(spec: SourceSpec) -> SourceSpec:
+    """Add a spec to the registry, after the built-in sources."""
+    _registered[spec.name] = spec
+    return spec
+
+
+def names() -> list[str]:
+    """Registered source names, in run order."""
+    return list(MODULES) + [n for n in _registered if n not in MODULES]
+
+
+def get(name: str) -> SourceSpec:
+    if name in _registered:
+        return _registered[name]
+    if name not in MODULES:
+        raise ValueError(f"Unknown source '{name}', expected one of {names()}")
+    return importlib.import_module(f"foundata.{name}").SPEC
+
+
+def specs(selected: Optional[Iterable[str]] = None) -> list[SourceSpec]:
+    """Specs of the selected sources (default: all), in run order."""
+    selected = names() if selected is None else set(selected)
+    for name in selected:
+        get(name)  # raise on unknown names
+    return [get(name) for name in names() if name in selected]
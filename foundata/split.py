@@ -0,0 +1,130 @@
+"""Deterministic hash-based train/test and k-fold splits.
+
+Each group value (e.g. `pid`) is assigned to a fold from a seeded hash of the
+value, so every input file can be partitioned independently in a single
+streaming pass, and the same group always lands in the same fold for a given
+seed. Hashes come from `polars.Expr.hash`, which is stable for a given polars
+version but not guaranteed across versions.
+
+Folds are integers: for a train/test split 0 is train and 1 is test; for
+k-fold splits they run 0..k-1.
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import polars as pl
+
+FOLD = "_fold"
+BUCKETS = 1_000_000
+
+
+def group_hash(group: str, seed: int) -> pl.Expr:
+    """Seeded UInt64 hash of the group column (compared as strings)."""
+    return pl.col(group).cast(pl.String).hash(seed)
+
+
+def fold_expr(
+    group: str,
+    seed: int,
+    test_pct: Optional[float] = None,
+    folds: Optional[int] = None,
+) -> pl.Expr:
+    """Fold of each row from its group hash alone (no global pass needed).
+
+    With `test_pct`, a group is in the test fold (1) when its hash falls in
+    the first `test_pct`% of buckets, so the test share is approximate. With
+    `folds`, the fold is the hash modulo `folds`.
+    """
+    h = group_hash(group, seed)
+    if folds is not None:
+        return (h % folds).cast(pl.Int32).alias(FOLD)
+    if test_pct is None:
+        raise ValueError("One of test_pct or folds is required")
+    cutoff = round(BUCKETS * test_pct / 100)
+    return (h % BUCKETS < cutoff).cast(pl.Int32).alias(FOLD)
+
+
+def stratified_folds(
+    lf: pl.LazyFrame,
+    group: str,
+    strata: list[str],
+    seed: int,
+    test_pct: Optional[float] = None,
+    folds: Optional[int] = None,
+) -> pl.LazyFrame:
+    """Fold of each group, balanced within each stratum.
+
+    Groups are ordered by their hash within each combination of `strata`
+    columns. With `test_pct`, the first ceil(n * test_pct / 100) groups of
+    each stratum are test (1); with `folds`, groups are dealt round-robin.
+
+    Returns:
+        LazyFrame of (group, FOLD), one row per group.
+    """
+    if (test_pct is None) == (folds is None):
+        raise ValueError("Exactly one of test_pct or folds is required")
+    rank = (
+        group_hash(group, seed)
+        .rank(method="ordinal")
+        .over(strata)
+        .cast(pl.Int64)
+        - 1
+    )
+    if folds is not None:
+        fold = (rank % folds).cast(pl.Int32)
+    else:
+        n = pl.len().over(strata)
+        fold = (rank < (n * test_pct / 100).ceil()).cast(pl.Int32)
+    return (
+        lf.select(group, *strata)
+        .drop_nulls(group)
+        .unique(subset=[group], keep="first")
+        .select(group, fold.alias(FOLD))
+    )
+
+
+def fingerprint(lf: pl.LazyFrame, group: str, seed: int = 0) -> tuple:
+    """Cheap order-independent summary of the distinct group values.
+
+    Two inputs with the same set of group values have equal fingerprints.
+    """
+    unique = pl.col(group).drop_nulls().unique()
+    row = (
+        lf.select(
+            unique.len().alias("n"),
+            unique.cast(pl.String).hash(seed).bitwise_xor().alias("xor"),
+        )
+        .collect(engine="streaming")
+        .row(0)
+    )
+    return row
+
+
+def group_differences(
+    lhs: pl.LazyFrame, rhs: pl.LazyFrame, group: str, limit: int = 10
+) -> tuple[list, list]:
+    """Up to `limit` group values only in `lhs`, and only in `rhs`."""
+    left = lhs.select(pl.col(group).drop_nulls().unique())
+    right = rhs.select(pl.col(group).drop_nulls().unique())
+    only_lhs = left.join(right, on=group, how="anti").sort(group).head(limit)
+    only_rhs = right.join(left, on=group, how="anti").sort(group).head(limit)
+    lhs_df, rhs_df = pl.collect_all([only_lhs, only_rhs])
+    return lhs_df[group].to_list(), rhs_df[group].to_list()
+
+
+def sink_folds(lf: pl.LazyFrame, paths: dict[int, Path]) -> list[pl.LazyFrame]:
+    """Lazy sinks writing the rows of each fold to `paths[fold]`.
+
+    Rows must carry a FOLD column; it is dropped from the output. Run the
+    returned sinks together with `pl.collect_all` so the input is scanned
+    once for all outputs.
+    """
+    sinks = []
+    for fold, path in paths.items():
+        part = lf.filter(pl.col(FOLD) == fold).drop(FOLD)
+        if Path(path).suffix == ".parquet":
+            sinks.append(part.sink_parquet(path, lazy=True))
+        else:
+            sinks.append(part.sink_csv(path, lazy=True))
+    return sinks
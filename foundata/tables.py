@@ -2,6 +2,8 @@ from typing import Iterable, Optional
 
 import polars as pl
 
+from foundata.fix import unknown_to_null
+
 
 def render_markdown_table(
     headers: Iterable[str], rows: Iterable[Iterable[str]]
@@ -63,11 +65,7 @@ def group_null_pct(
         agg_exprs.append((pl.all().exclude(ignore).is_null().mean() * 100))
 
     if return_overall:
-        total_nulls_expr = pl.fold(
-            acc=pl.lit(0),
-            function=lambda acc, s: acc + s,
-            exprs=[pl.col(c).is_null().sum() for c in kept_cols],
-        )
+        total_nulls_expr = pl.sum_horizontal(pl.col(kept_cols).is_null().sum())
         agg_exprs.append(
             (total_nulls_expr / (pl.len() * pl.lit(k)) * 100).alias(
                 "overall_null_pct"
@@ -84,93 +82,69 @@ def group_null_pct(
 
 
 def summary_table(
-    attributes: pl.DataFrame, trips: pl.DataFrame, markdown: bool = False
+    attributes: pl.DataFrame | pl.LazyFrame,
+    trips: pl.DataFrame | pl.LazyFrame,
+    markdown: bool = False,
 ) -> pl.DataFrame | str:
     """Produce a per-source summary table (persons, nulls %, trips, kms).
 
+    Trips are reduced to one row per person and joined to attributes once;
+    the per-source rows (sorted by source) and the total row's persons and
+    nulls are aggregations over that same frame, evaluated in a single lazy
+    query. The total row's trips and kms count every trip, including any
+    whose pid is not in attributes. Inputs may be LazyFrames (e.g.
+    `pl.scan_parquet` of the outputs), so the table can be built without
+    loading the full dataset.
+
     If `markdown` is True, return a markdown-formatted string table (as
     used in the README) instead of a DataFrame.
     """
     # treat "unknown" as null for null-pct calculation
-    attributes = attributes.with_columns(
-        pl.when(pl.col(col) == "unknown")
-        .then(None)
-        .otherwise(pl.col(col))
-        .alias(col)
-        for col in attributes.columns
-        if attributes[col].dtype == pl.String
-    )
-
-    attribute_counts = attributes.group_by("source").agg(n_attributes=pl.len())
-
-    null_counts = group_null_pct(
-        attributes,
-        group_cols=["source"],
-        ignore=["hid", "pid", "source"],
-        return_per_column=False,
-        return_overall=True,
-    )
-
-    trip_counts = (
-        trips.join(attributes.select("pid", "source"), on="pid", how="left")
-        .group_by("source")
-        .agg(n_trips=pl.len())
-    )
-
-    distance_counts = (
-        trips.join(attributes.select("pid", "source"), on="pid", how="left")
-        .group_by("source")
-        .agg(total_distance=pl.col("distance").sum() / 1000000)
-    )
-
-    attributes_summary = (
-        attribute_counts.join(
-            null_counts.select("source", "overall_null_pct"),
-            on="source",
-            how="left",
-        )
-        .join(trip_counts, on="source", how="left")
-        .join(distance_counts, on="source", how="left")
-        .fill_null(0)
-        .rename(
-            {
-                "n_attributes": "persons",
-                "n_trips": "trips",
-                "overall_null_pct": "nulls",
-                "total_distance": "kms (millions)",
-            }
-        )
-    )
+    attributes = unknown_to_null(attributes.lazy())
+    kept = [
+        c
+        for c in attributes.collect_schema().names()
+        if c not in ("hid", "pid", "source")
+    ]
 
-    total_nulls = sum(
-        attributes[col].is_null().sum()
-        for col in attributes.select(
-            pl.all().exclude("hid", "pid", "source")
-        ).columns
+    per_person = attributes.select(
+        "pid",
+        "source",
+        pl.sum_horizontal(pl.col(kept).is_null()).alias("n_nulls"),
+    ).join(
+        trips.lazy()
+        .group_by("pid")
+        .agg(n_trips=pl.len(), distance=pl.col("distance").sum()),
+        on="pid",
+        how="left",
     )
 
-    total_row = pl.DataFrame(
-        {
-            "source": ["total"],
-            "persons": [attributes.height],
-            "trips": [trips.height],
-            "nulls": [
-                total_nulls / (attributes.height * (attributes.width - 3)) * 100
-            ],
-            "kms (millions)": [
-                trips.select(pl.col("distance").sum() / 1000000).item()
-            ],
-        },
-        schema={
-            "source": pl.String,
-            "persons": pl.UInt32,
-            "trips": pl.UInt32,
-            "nulls": attributes_summary["nulls"].dtype,
-            "kms (millions)": attributes_summary["kms (millions)"].dtype,
-        },
+    person_aggs = [
+        pl.len().alias("persons"),
+        (pl.col("n_nulls").sum() / (pl.len() * len(kept)) * 100).alias("nulls"),
+    ]
+    trip_aggs = [
+        pl.col("n_trips").sum().fill_null(0).cast(pl.UInt32).alias("trips"),
+        (pl.col("distance").sum() / 1000000).alias("kms (millions)"),
+    ]
+    total = pl.concat(
+        [
+            per_person.select(pl.lit("total").alias("source"), *person_aggs),
+            trips.lazy().select(
+                pl.len().cast(pl.UInt32).alias("trips"),
+                (pl.col("distance").sum() / 1000000).alias("kms (millions)"),
+            ),
+        ],
+        how="horizontal",
     )
-
-    table = pl.concat([attributes_summary, total_row], how="diagonal")
+    table = pl.concat(
+        [
+            per_person.group_by("source")
+            .agg(*person_aggs, *trip_aggs)
+            .sort("source"),
+            total,
+        ]
+    ).collect()
 
     if markdown:
         return _summary_table_to_markdown(table)
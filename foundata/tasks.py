@@ -0,0 +1,259 @@
+"""Partitioned, resumable execution of (source, year) tasks.
+
+Multi-year sources are loaded, processed and concatenated year by year
+inside one process, so adding a survey year or recovering from a failure
+means redoing every year. Here each (source, year) is an independent
+`Task`, run in turn or on a local thread or process pool. A task writes its outputs to its own
+directory under a work directory:
+
+    <work_dir>/<source>/<year>/attributes.parquet
+    <work_dir>/<source>/<year>/trips.parquet
+    <work_dir>/<source>/<year>/done.json
+
+`done.json` is written last and records a fingerprint of the task, its
+inputs, the run options and the package code (see `fingerprint`). A later
+run skips every task whose `done.json` matches its current fingerprint, so
+only new, changed or previously failed tasks are recomputed, and `merge`
+reads the per-task files back per source.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import traceback
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from functools import cache
+from pathlib import Path
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+
+import polars as pl
+
+DONE = "done.json"
+OUTPUTS = ("attributes", "trips")
+WHOLE = "all"  # directory name of tasks covering a whole source
+EXECUTORS = ("process", "thread", "serial")
+PACKAGE_ROOT = Path(__file__).parent
+
+# (attributes, trips), optionally followed by a metadata dict
+TaskResult = (
+    tuple[pl.DataFrame, pl.DataFrame] | tuple[pl.DataFrame, pl.DataFrame, dict]
+)
+
+
+class Task(NamedTuple):
+    source: str
+    year: Optional[str | int] = None
+
+    @property
+    def name(self) -> str:
+        return (
+            self.source if self.year is None else f"{self.source}-{self.year}"
+        )
+
+
+def task_dir(work_dir: str | Path, task: Task) -> Path:
+    """Output directory of a task."""
+    year = WHOLE if task.year is None else str(task.year).replace("/", "_")
+    return Path(work_dir) / task.source / year
+
+
+@cache
+def code_version() -> str:
+    """Digest of the package's source files, so code changes are seen as
+    changed inputs."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in sorted(PACKAGE_ROOT.rglob("*.py")):
+        digest.update(str(path.relative_to(PACKAGE_ROOT)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def fingerprint(
+    task: Task,
+    inputs: Iterable[str | Path],
+    options: Optional[dict[str, Any]] = None,
+) -> str:
+    """Digest of a task, its input files, run options and the package code.
+
+    Input files are recorded by size and mtime. Directories are expanded to
+    the files beneath them. Missing inputs are recorded as missing, so
+    creating them changes the fingerprint. `options` are the run options
+    that change a task's outputs, e.g. how sources are partitioned.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(code_version().encode())
+    header = {"task": task._asdict(), "options": options or {}}
+    digest.update(json.dumps(header, sort_keys=True, default=str).encode())
+    files = set()
+    for path in map(Path, inputs):
+        if path.is_dir():
+            files.update(p for p in path.rglob("*") if p.is_file())
+        else:
+            files.add(path)
+    for path in sorted(files):
+        if path.exists():
+            stat = path.stat()
+            entry = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+        else:
+            entry = f"{path}:missing"
+        digest.update(entry.encode())
+    return digest.hexdigest()
+
+
+def is_done(work_dir: str | Path, task: Task, key: str) -> bool:
+    """True if the task's outputs exist and were made from the same inputs."""
+    path = task_dir(work_dir, task)
+    try:
+        with open(path / DONE) as f:
+            done = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return done.get("fingerprint") == key and all(
+        (path / f"{name}.parquet").exists() for name in OUTPUTS
+    )
+
+
+def execute(
+    fn: Callable[[Task], TaskResult],
+    task: Task,
+    work_dir: str | Path,
+    key: str,
+) -> Task:
+    """Run one task and write its outputs, marking it done last.
+
+    `fn` may return a metadata dict after the frames, which is recorded
+    under "meta" in `done.json`.
+    """
+    path = task_dir(work_dir, task)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / DONE).unlink(missing_ok=True)
+    *frames, meta = fn(task)
+    if not isinstance(meta, dict):
+        frames, meta = [*frames, meta], {}
+    rows = {}
+    for name, frame in zip(OUTPUTS, frames):
+        frame.write_parquet(path / f"{name}.parquet")
+        rows[name] = frame.height
+    done = {"task": task.name, "fingerprint": key, "rows": rows, "meta": meta}
+    with open(path / DONE, "w") as f:
+        json.dump(done, f)
+    return task
+
+
+def read_done(work_dir: str | Path, task: Task) -> dict:
+    """Contents of a completed task's `done.json`."""
+    with open(task_dir(work_dir, task) / DONE) as f:
+        return json.load(f)
+
+
+def run_tasks(
+    tasks: list[Task],
+    fn: Callable[[Task], TaskResult],
+    work_dir: str | Path,
+    inputs: Optional[Callable[[Task], list[Path]]] = None,
+    workers: Optional[int] = None,
+    executor: str = "process",
+    resume: bool = True,
+    options: Optional[dict[str, Any]] = None,
+) -> list[Task]:
+    """Run tasks on a pool of workers, skipping those already done.
+
+    Args:
+        tasks: Tasks to run.
+        fn: Function returning (attributes, trips) for a task, optionally
+            followed by a metadata dict (see `execute`). For the process
+            executor it must be picklable (module-level), as it runs in a
+            fresh worker process.
+        work_dir: Directory for per-task outputs.
+        inputs: Input files of a task, for its fingerprint. Without it a
+            task is done once it has completed, whatever its inputs.
+        workers: Pool size (default: the executor's default, about the CPU
+            count). With 1, tasks run in this process, one at a time.
+        executor: "process" (a spawned process pool), "thread" (a thread
+            pool in this process) or "serial" (in turn, in this process).
+        resume: Skip tasks already done with a matching fingerprint.
+        options: Run options that change task outputs, for the
+            fingerprints; tasks done with other options are rerun.
+
+    Returns:
+        The tasks that were run (not skipped).
+
+    Raises:
+        RuntimeError: If any task failed. Completed tasks keep their
+            outputs, so re-running resumes from the failures.
+        ValueError: If the executor is unknown.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(
+            f"Unknown executor '{executor}', expected one of {EXECUTORS}"
+        )
+    keys = {
+        task: fingerprint(task, inputs(task) if inputs else [], options)
+        for task in tasks
+    }
+    todo = [t for t in tasks if not (resume and is_done(work_dir, t, keys[t]))]
+    for task in tasks:
+        if task not in todo:
+            print(f"Skipping {task.name} (done)")
+    failed = []
+
+    def report(task, error):
+        print(f"ERROR: task {task.name} failed: {error}")
+        failed.append(task)
+
+    if workers == 1 or executor == "serial":
+        for task in todo:
+            try:
+                execute(fn, task, work_dir, keys[task])
+            except Exception as error:
+                traceback.print_exc()
+                report(task, error)
+    elif todo:
+        if executor == "thread":
+            pool = ThreadPoolExecutor(workers)
+        else:
+            # spawn rather than fork: forking a process with Polars' thread
+            # pool running can deadlock
+            context = multiprocessing.get_context("spawn")
+            pool = ProcessPoolExecutor(workers, mp_context=context)
+        with pool:
+            futures = {
+                pool.submit(execute, fn, task, work_dir, keys[task]): task
+                for task in todo
+            }
+            for future in as_completed(futures):
+                try:
+                    print(f"Finished {future.result().name}")
+                except Exception as error:
+                    report(futures[future], error)
+
+    if failed:
+        names = ", ".join(t.name for t in failed)
+        raise RuntimeError(f"{len(failed)} task(s) failed: {names}")
+    return todo
+
+
+def merge(
+    work_dir: str | Path, tasks: list[Task]
+) -> dict[str, tuple[pl.DataFrame, pl.DataFrame]]:
+    """Concatenate per-task outputs into {source: (attributes, trips)}.
+
+    Tasks are read in the given order; sources keep first-seen order.
+    """
+    paths: dict[str, list[Path]] = {}
+    for task in tasks:
+        paths.setdefault(task.source, []).append(task_dir(work_dir, task))
+    return {
+        source: tuple(
+            pl.concat(
+                [pl.read_parquet(d / f"{name}.parquet") for d in dirs],
+                how="vertical_relaxed",
+            )
+            for name in OUTPUTS
+        )
+        for source, dirs in paths.items()
+    }
@@ -0,0 +1,57 @@
+"""Vectorised trip-time helpers shared by the loaders.
+
+Times in the template are integer minutes since midnight of the survey day.
+These helpers convert the encodings used by the raw surveys as polars
+expressions (or whole Series, for random sampling) so no per-row Python
+callbacks are needed.
+"""
+
+from typing import Optional
+
+import numpy as np
+import polars as pl
+
+
+def hhmm_to_minutes(expr: pl.Expr) -> pl.Expr:
+    """Convert HHMM clock integers (e.g. 1430) to minutes since midnight."""
+    return (expr // 100) * 60 + expr % 100
+
+
+def datetime_to_minutes(expr: pl.Expr) -> pl.Expr:
+    """Minutes since midnight of a datetime expression (seconds dropped)."""
+    return expr.dt.hour().cast(pl.Int32) * 60 + expr.dt.minute()
+
+
+def sample_minutes(
+    base: pl.Series,
+    width: int,
+    minimum: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> pl.Series:
+    """Sample a minute uniformly within each bucket `[base, base + width)`.
+
+    Used to jitter times and durations that surveys report in coarse
+    buckets (e.g. whole hours, or 5-minute duration bands).
+
+    Args:
+        base: Bucket start, in minutes. Nulls are kept as null.
+        width: Bucket width in minutes.
+        minimum: Optional lower bound applied to the bucket start, e.g. 1 so
+            that a zero-duration band never samples a zero duration.
+        seed: Seed for the numpy generator, for reproducible outputs.
+
+    Returns:
+        Int64 Series of sampled minutes, aligned with `base`.
+    """
+    rng = np.random.default_rng(seed)
+    values = base.cast(pl.Int64)
+    nulls = values.is_null().to_numpy()
+    high = values.fill_null(0).to_numpy() + width  # exclusive
+    low = high - width
+    if minimum is not None:
+        low = np.maximum(low, minimum)
+        high = np.maximum(high, low + 1)
+    sampled = pl.Series(base.name, rng.integers(low, high), dtype=pl.Int64)
+    if nulls.any():
+        sampled = sampled.scatter(np.flatnonzero(nulls), None)
+    return sampled
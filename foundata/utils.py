@@ -1,12 +1,12 @@
 import functools
 import random
+import threading
 from pathlib import Path
 from typing import Iterable
 
 import polars as pl
-import yaml
-from rapidfuzz import fuzz, process
 
+from foundata import config_cache, ingest
 from foundata.post_process import activities_to_trips, trips_to_activities
 
 DTYPE_MAP = {
@@ -28,23 +28,112 @@ DTYPE_MAP = {
 }
 
 
-def fuzzy_loader(path: str | Path, target: str, **kwargs) -> pl.DataFrame:
-    # look in given path for closest math to target
-    candidates = [f.name for f in path.iterdir()]
+# {directory: {target: resolved file name}} for every fuzzy match this run,
+# kept per thread so tasks on a thread pool record their own matches
+_local = threading.local()
+
+
+def _resolved() -> dict[str, dict[str, str]]:
+    return _local.__dict__.setdefault("resolved", {})
+
+
+@functools.lru_cache(maxsize=None)
+def _directory_files(path: Path, mtime_ns: int) -> tuple[str, ...]:
+    # keyed on the directory mtime, so adding or renaming files invalidates
+    return tuple(sorted(f.name for f in path.iterdir() if f.is_file()))
+
+
+def directory_index(path: str | Path) -> tuple[str, ...]:
+    """Sorted file names in a directory, memoised until it changes."""
+    path = Path(path).expanduser().resolve()
+    return _directory_files(path, path.stat().st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=None)
+def _match(
+    targets: tuple[str, ...], candidates: tuple[str, ...], score_cutoff: int
+) -> tuple[tuple[int, float], ...]:
+    from rapidfuzz import fuzz, process
+
+    # one pass scoring every target against every candidate
+    scores = process.cdist(targets, candidates, scorer=fuzz.ratio)
+    best = scores.argmax(axis=1)
+    return tuple(
+        (int(i), float(row[i])) if row[i] >= score_cutoff else (-1, row[i])
+        for i, row in zip(best, scores)
+    )
+
+
+def resolve_files(
+    path: str | Path, targets: Iterable[str], score_cutoff: int = 80
+) -> dict[str, Path]:
+    """Closest file in `path` to each target name, matched in one pass.
+
+    Matches use `rapidfuzz.fuzz.ratio` over a memoised index of the
+    directory, and are recorded for `resolved_files`.
+
+    Raises:
+        FileNotFoundError: If the directory is empty or a target has no
+            file scoring at least `score_cutoff`.
+    """
+    path = Path(path)
+    targets = tuple(targets)
+    candidates = directory_index(path)
     if not candidates:
         raise FileNotFoundError(f"No file found in {path}")
-    # fuzzy find best candidate
-    best_match, score, idx = process.extractOne(
-        target, candidates, scorer=fuzz.ratio, score_cutoff=80
-    )
-    if best_match is None:
-        raise FileNotFoundError(
-            f"No file found in {path} matching {target} (best match: {best_match} with score {score})"
+    matches = _match(targets, candidates, score_cutoff)
+    resolved = {}
+    for target, (idx, score) in zip(targets, matches):
+        if idx < 0:
+            raise FileNotFoundError(
+                f"No file found in {path} matching {target} (best score {int(score)})"
+            )
+        print(
+            f"Fuzzy match loading {candidates[idx]} from {path} (score: {int(score)}%)"
         )
-    print(
-        f"Fuzzy match loading {best_match} from {path} (score: {int(score)}%)"
+        resolved[target] = path / candidates[idx]
+    _resolved().setdefault(str(path), {}).update(
+        {target: p.name for target, p in resolved.items()}
     )
-    return pl.read_csv(path / candidates[idx], **kwargs)
+    return resolved
+
+
+def resolved_files(reset: bool = False) -> dict[str, dict[str, str]]:
+    """Files resolved by fuzzy matching so far in this thread, by directory
+    and target.
+
+    With `reset`, the record is cleared after reading it.
+    """
+    resolved = {path: dict(files) for path, files in _resolved().items()}
+    if reset:
+        _resolved().clear()
+    return resolved
+
+
+def fuzzy_scan(
+    path: str | Path, targets: dict[str, str], **columns: list[str]
+) -> dict[str, pl.LazyFrame]:
+    """Lazy projected scans of several fuzzily named files in a directory.
+
+    Args:
+        path: Directory to search.
+        targets: {name: target file name}, e.g. `{"trips": "Trip.csv"}`.
+        columns: Columns to project per name (all columns if omitted).
+
+    Returns:
+        {name: LazyFrame}, so the files can be collected together with
+        `pl.collect_all` and only the projected columns are read.
+    """
+    resolved = resolve_files(path, targets.values())
+    return {
+        name: ingest.scan_csv(resolved[target], columns=columns.get(name))
+        for name, target in targets.items()
+    }
+
+
+def fuzzy_loader(path: str | Path, target: str, **kwargs) -> pl.DataFrame:
+    """Read the file in `path` whose name is closest to `target`."""
+    return ingest.read_csv(resolve_files(path, [target])[target], **kwargs)
 
 
 def expand_root(root: str | Path) -> Path:
@@ -52,8 +141,7 @@ def expand_root(root: str | Path) -> Path:
 
 
 def load_yaml_config(path: str | Path) -> dict:
-    with open(path) as handle:
-        return yaml.safe_load(handle)
+    return config_cache.load(path)
 
 
 def check_overlap(
@@ -411,8 +499,7 @@ def assign_education_to_escort(trips: pl.DataFrame) -> pl.DataFrame:
 
 @functools.lru_cache(maxsize=1)
 def _load_template() -> dict:
-    with open(template()) as f:
-        return yaml.safe_load(f)
+    return config_cache.load(template())
 
 
 def get_template_attributes() -> dict:
@@ -424,44 +511,41 @@ def get_template_trips() -> dict:
 
 
 def norm_weights(
-    attributes: pl.DataFrame, weight_col: str = "weight"
-) -> pl.DataFrame:
-    # norm weights to average 1
-    if weight_col not in attributes.columns:
+    attributes: pl.DataFrame | pl.LazyFrame, weight_col: str = "weight"
+) -> pl.DataFrame | pl.LazyFrame:
+    # norm weights to average 1; lazy frames stay lazy, with the checks and
+    # mean computed in one pass over the weight column
+    if weight_col not in attributes.collect_schema().names():
         raise ValueError(
             f"Weight column '{weight_col}' not found in attributes"
         )
-    if (
-        not attributes.select(pl.col(weight_col).is_not_null())
-        .to_series()
-        .all()
-    ):
+    weight = pl.col(weight_col)
+    stats = (
+        attributes.lazy()
+        .select(
+            null=weight.is_null().any(),
+            non_positive=weight.fill_null(0).le(0).any(),
+            mean=weight.fill_null(0).clip(lower_bound=0).mean(),
+        )
+        .collect()
+        .row(0, named=True)
+    )
+    if stats["null"]:
         print(
             "Warning: Some weights are null — these will be treated as zero in normalization"
         )
     # check for non-positive weights to avoid skewing normalization
-    if (
-        not attributes.select(pl.col(weight_col).fill_null(0).gt(0))
-        .to_series()
-        .all()
-    ):
+    if stats["non_positive"]:
         print(
             "Warning: Some weights are non-positive (<= 0) — these will be treated as zero in normalization"
         )
-        attributes = attributes.with_columns(
-            pl.col(weight_col)
-            .fill_null(0)
-            .clip(lower_bound=0)
-            .alias(weight_col)
-        )
-    avg_weight = attributes[weight_col].fill_null(0).mean()
-    if avg_weight == 0:
+    if not stats["mean"]:
         print("Warning: Total weight is zero — returning all weights as 1")
         return attributes.with_columns(
             pl.lit(1, dtype=pl.Float32).alias(weight_col)
         )
     return attributes.with_columns(
-        (pl.col(weight_col).fill_null(0) / avg_weight)
+        (weight.fill_null(0).clip(lower_bound=0) / stats["mean"])
         .cast(pl.Float32)
         .alias(weight_col)
     )
@@ -1,3 +1,5 @@
+from typing import Iterable
+
 import polars as pl
 
 from foundata import utils
@@ -16,8 +18,8 @@ def null_pids(
 
 
 def columns(
-    attributes: pl.DataFrame,
-    trips: pl.DataFrame,
+    attributes: pl.DataFrame | pl.LazyFrame,
+    trips: pl.DataFrame | pl.LazyFrame,
     template_attributes: dict | None = None,
     template_trips: dict | None = None,
 ) -> bool:
@@ -30,8 +32,8 @@ def columns(
     expected_trips = template_trips.keys()
 
     # ckeck for missing columns
-    actual_attributes = set(attributes.columns)
-    actual_trips = set(trips.columns)
+    actual_attributes = set(attributes.collect_schema().names())
+    actual_trips = set(trips.collect_schema().names())
 
     missing_attributes = expected_attributes - actual_attributes
     missing_trips = expected_trips - actual_trips
@@ -77,47 +79,71 @@ def check_dtype(expected_dtype: str, actual_dtype: pl.DataType) -> bool:
     raise ValueError(f"Unknown expected dtype: {expected_dtype}")
 
 
-def check_no_default(actual: pl.Series) -> bool:
-    if actual.dtype.is_numeric():
-        return actual.null_count() == 0
-    elif actual.dtype == pl.String:
-        return "unknown" not in set(actual.unique())
-    else:
-        raise ValueError(
-            f"Unsupported dtype for col: {actual.name}, default value check: {actual.dtype}"
-        )
+def _defaults(col: str, dtype: pl.DataType) -> pl.Expr:
+    """Count of default values in `col`: nulls if numeric, else "unknown"."""
+    c = pl.col(col)
+    if dtype.is_numeric():
+        return c.null_count()
+    if dtype == pl.String:
+        return (c == "unknown").sum()
+    raise ValueError(
+        f"Unsupported dtype for col: {col}, default value check: {dtype}"
+    )
 
 
-def check_min(expected_min: float, actual_series: pl.Series) -> bool:
-    if actual_series.dtype.is_numeric():
-        return actual_series.fill_null(expected_min).min() >= expected_min
-    else:
-        raise ValueError(
-            f"Expected numeric series '{actual_series.name}', got {actual_series.dtype}"
-        )
+def _bound(col: str, bound: str, dtype: pl.DataType) -> pl.Expr:
+    """Min or max (`bound`) of a numeric `col`."""
+    if not dtype.is_numeric():
+        raise ValueError(f"Expected numeric series '{col}', got {dtype}")
+    return getattr(pl.col(col), bound)()
 
 
-def check_max(expected_max: float, actual_series: pl.Series) -> bool:
-    if actual_series.dtype.is_numeric():
-        return actual_series.fill_null(expected_max).max() <= expected_max
-    else:
-        raise ValueError(
-            f"Expected numeric series '{actual_series.name}', got {actual_series.dtype}"
-        )
+def _set_values(col: str, expected: Iterable) -> tuple[pl.Expr, pl.Expr]:
+    """Distinct values of `col` inside and outside the `expected` set."""
+    c = pl.col(col)
+    in_set = c.is_in(list(expected))
+    return (
+        c.filter(in_set).unique().implode().alias(f"{col}:present"),
+        c.filter(~in_set).unique().implode().alias(f"{col}:extra"),
+    )
 
 
-def check_set(expected_set: set, actual_series: pl.Series) -> bool:
-    actual_set = set(actual_series.unique())
-    missing = expected_set - actual_set
-    extra = actual_set - expected_set
+def _set_ok(col: str, expected: set, present: list, extra: list) -> bool:
+    missing = expected - set(present)
+    extra = {v for v in extra if v is not None}
     if missing:
-        print(f"Warning: Missing values in '{actual_series.name}': {missing}")
+        print(f"Warning: Missing values in '{col}': {missing}")
     if extra:
-        print(f"Unexpected values in '{actual_series.name}': {extra}")
+        print(f"Unexpected values in '{col}': {extra}")
         return False
     return True
 
 
+def check_no_default(actual: pl.Series) -> bool:
+    expr = _defaults(actual.name, actual.dtype)
+    return actual.to_frame().select(expr).item() == 0
+
+
+def check_min(expected_min: float, actual_series: pl.Series) -> bool:
+    expr = _bound(actual_series.name, "min", actual_series.dtype)
+    actual_min = actual_series.to_frame().select(expr).item()
+    return actual_min is None or actual_min >= expected_min
+
+
+def check_max(expected_max: float, actual_series: pl.Series) -> bool:
+    expr = _bound(actual_series.name, "max", actual_series.dtype)
+    actual_max = actual_series.to_frame().select(expr).item()
+    return actual_max is None or actual_max <= expected_max
+
+
+def check_set(expected_set: set, actual_series: pl.Series) -> bool:
+    name = actual_series.name
+    present, extra = (
+        actual_series.to_frame().select(_set_values(name, expected_set)).row(0)
+    )
+    return _set_ok(name, set(expected_set), present, extra)
+
+
 def activity_consistency(trips: pl.DataFrame) -> bool:
     inconsistent = (
         trips.sort("pid", "seq")
@@ -204,53 +230,79 @@ def activities_pids_match_attributes(
     return ok
 
 
-def check_col_cnfg(actual: pl.DataFrame, template: dict) -> None:
-    actual_cols = set(actual.columns)
-    template_cols = set(template.keys())
+def _col_checks(col: str, cnfg: dict, dtype: pl.DataType) -> list[pl.Expr]:
+    """Aggregations needed to check `col` against its template `cnfg`.
 
-    fails = 0
-    for col in actual_cols & template_cols:
-        cnfg = template[col]
+    The same expressions back the single-series `check_*` functions.
+    """
+    exprs = []
+    if not cnfg.get("default"):
+        exprs.append(_defaults(col, dtype).alias(f"{col}:defaults"))
+    for bound in ("min", "max"):
+        if bound in cnfg:
+            exprs.append(_bound(col, bound, dtype).alias(f"{col}:{bound}"))
+    if "set" in cnfg:
+        exprs.extend(_set_values(col, cnfg["set"]))
+    return exprs
+
+
+def check_col_cnfg(actual: pl.DataFrame | pl.LazyFrame, template: dict) -> bool:
+    """Check columns of `actual` against their template configs.
+
+    Dtypes are checked from the schema; default usage, min, max and set
+    membership for every column are computed in a single aggregated
+    `select`, so a LazyFrame (e.g. a scanned CSV or Parquet dataset) is
+    verified in one streaming scan without loading it.
+    """
+    schema = actual.collect_schema()
+    cols = [col for col in template if col in schema]
 
-        expected_dtype = cnfg["dtype"]
-        actual_dtype = actual[col].dtype
-        good_dtype = check_dtype(expected_dtype, actual_dtype)
-        if not good_dtype:
+    fails = 0
+    aggs = []
+    for col in cols:
+        expected_dtype = template[col]["dtype"]
+        if not check_dtype(expected_dtype, schema[col]):
             print(
-                f"ERROR: Column '{col}' has dtype {actual_dtype} but expected {expected_dtype}"
+                f"ERROR: Column '{col}' has dtype {schema[col]} but expected {expected_dtype}"
             )
             fails += 1
+        aggs.extend(_col_checks(col, template[col], schema[col]))
+
+    if not aggs:
+        return fails == 0
+    stats = (
+        actual.lazy()
+        .select(aggs)
+        .collect(engine="streaming")
+        .row(0, named=True)
+    )
 
-        if "default" not in cnfg or not cnfg["default"]:
-            good_default = check_no_default(actual[col])
-            if not good_default:
-                print(
-                    f"ERROR: Column '{col}' appears to be using default values but expected none."
-                )
-                fails += 1
+    for col in cols:
+        cnfg = template[col]
+        if stats.get(f"{col}:defaults"):
+            print(
+                f"ERROR: Column '{col}' appears to be using default values but expected none."
+            )
+            fails += 1
 
-        if "min" in cnfg:
-            expected_min = cnfg["min"]
-            good_min = check_min(expected_min, actual[col])
-            if not good_min:
-                print(
-                    f"ERROR: Column '{col}' has min {actual[col].min()} but expected at least {expected_min}"
-                )
-                fails += 1
+        actual_min = stats.get(f"{col}:min")
+        if actual_min is not None and actual_min < cnfg["min"]:
+            print(
+                f"ERROR: Column '{col}' has min {actual_min} but expected at least {cnfg['min']}"
+            )
+            fails += 1
 
-        if "max" in cnfg:
-            expected_max = cnfg["max"]
-            good_max = check_max(expected_max, actual[col])
-            if not good_max:
-                print(
-                    f"ERROR: Column '{col}' has max {actual[col].max()} but expected at most {expected_max}"
-                )
-                fails += 1
+        actual_max = stats.get(f"{col}:max")
+        if actual_max is not None and actual_max > cnfg["max"]:
+            print(
+                f"ERROR: Column '{col}' has max {actual_max} but expected at most {cnfg['max']}"
+            )
+            fails += 1
 
         if "set" in cnfg:
             expected_set = set(cnfg["set"])
-            good_set = check_set(expected_set, actual[col].drop_nulls())
-            if not good_set:
+            present = stats[f"{col}:present"]
+            if not _set_ok(col, expected_set, present, stats[f"{col}:extra"]):
                 print(
                     f"ERROR: Column '{col}' expected set {expected_set} but found ^."
                 )
@@ -2,6 +2,7 @@ from pathlib import Path
 
 import polars as pl
 
+from . import ingest, sources
 from .fix import day_wrap
 from .utils import (
     bounds_from_list,
@@ -13,6 +14,15 @@ from .utils import (
 AUD_TO_EURO = 0.6
 
 SOURCE = "vista"
+YEARS = ["2012-2020", "2022-2023", "2023-2024"]
+
+HH_OPTIONS = {"null_values": "Missing/Refused"}
+TRIPS_OPTIONS = {"null_values": "Missing"}
+RAW_FILES = [
+    ("*/household*.csv", HH_OPTIONS),
+    ("*/person*.csv", {}),
+    ("*/trips*.csv", TRIPS_OPTIONS),
+]
 
 
 def load_years(
@@ -22,31 +32,32 @@ def load_years(
     person_config: dict,
     trips_config: dict,
 ) -> tuple[pl.DataFrame, pl.DataFrame]:
-    hhs_names = [
-        "households_vista_2012_2020_lga_v1.csv",
-        "household_vista_2022_2023.csv",
-        "household_vista_2023_2024.csv",
-    ]
-    persons_names = [
-        "persons_vista_2012_2020_lga_v1.csv",
-        "person_vista_2022_2023.csv",
-        "person_vista_2023_2024.csv",
-    ]
-
-    trips_names = [
-        "trips_vista_2012_2020_lga_v1.csv",
-        "trips_vista_2022_2023.csv",
-        "trips_vista_2023_2024.csv",
-    ]
+    # raw file names (households, persons, trips) by survey year
+    names = {
+        "2012-2020": (
+            "households_vista_2012_2020_lga_v1.csv",
+            "persons_vista_2012_2020_lga_v1.csv",
+            "trips_vista_2012_2020_lga_v1.csv",
+        ),
+        "2022-2023": (
+            "household_vista_2022_2023.csv",
+            "person_vista_2022_2023.csv",
+            "trips_vista_2022_2023.csv",
+        ),
+        "2023-2024": (
+            "household_vista_2023_2024.csv",
+            "person_vista_2023_2024.csv",
+            "trips_vista_2023_2024.csv",
+        ),
+    }
 
     all_attributes = []
     all_trips = []
 
     print("Loading VISTA...")
 
-    for year, hh_name, persons_name, trips_name in zip(
-        years, hhs_names, persons_names, trips_names
-    ):
+    for year in years:
+        hh_name, persons_name, trips_name = names[year]
         print(f"Loading {year}...")
         yr = year[2:4] + year[5:7]
 
@@ -58,27 +69,27 @@ def load_years(
         person_columns = list(person_config_year["column_mappings"].keys())
         trips_columns = list(trips_config_year["column_mappings"].keys())
 
-        hhs = pl.read_csv(
+        hhs = ingest.read_csv(
             data_root / year / hh_name,
             columns=hh_columns,
-            null_values="Missing/Refused",
+            **HH_OPTIONS,
         )
         hhs = preprocess_households(hhs, hh_config_year, year=year)
 
-        persons = pl.read_csv(
+        persons = ingest.read_csv(
             data_root / year / persons_name, columns=person_columns
         )
         persons = preprocess_persons(persons, person_config_year, year=year)
 
         attributes = table_joiner(hhs, persons, on="hid")
 
-        trips = pl.read_csv(
+        trips = ingest.read_csv(
             data_root / year / trips_name,
             columns=trips_columns,
-            null_values="Missing",
+            **TRIPS_OPTIONS,
         )
         trips = preprocess_trips(trips, trips_config_year, year=year)
-        trips = day_wrap(trips)
+        trips = day_wrap(trips, SOURCE)
 
         attributes = attributes.with_columns(
             pid=pl.lit(SOURCE) + pl.lit(yr) + pl.col("pid").cast(pl.String),
@@ -98,6 +109,20 @@ def load_years(
     return attributes, trips
 
 
+SPEC = sources.SourceSpec(
+    name=SOURCE,
+    data_dir="VISTA",
+    loader=load_years,
+    configs={
+        "hh_config": "hh_dictionary.yaml",
+        "person_config": "person_dictionary.yaml",
+        "trips_config": "trip_dictionary.yaml",
+    },
+    years=YEARS,
+    raw_files=RAW_FILES,
+)
+
+
 def preprocess_households(
     hhs: pl.DataFrame, config: dict, year: str
 ) -> pl.DataFrame:
@@ -0,0 +1,365 @@
+"""Local daily weather store, filled concurrently from Open-Meteo.
+
+Daily weather (max temperature and precipitation) is kept in one Parquet
+store, `configs/weather/store.parquet`, keyed by (lat, lon, date) with
+coordinates rounded to `PRECISION` decimal places. Loaders read their
+locations from the store (`daily`, `regional`) rather than from per-source
+CSVs.
+
+`update` fills the store for a set of locations and a date range. Only the
+contiguous missing date ranges of each location are requested, so adding a
+region or a year fetches just the new data. Locations with the same
+missing range are batched into one Open-Meteo request, and requests run
+concurrently on an asyncio loop under a token-bucket rate limit, backing
+off (honouring `Retry-After`) when throttled. `base_url` can point at any
+server speaking the Open-Meteo archive API, e.g. a local stub in tests.
+"""
+
+import asyncio
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable, Optional
+
+import polars as pl
+
+from foundata import utils
+
+API_URL = "https://archive-api.open-meteo.com/v1/archive"
+STORE = utils.get_config_path("weather", "store.parquet")
+PRECISION = 4  # ~10 m, far finer than the ~9 km reanalysis grid
+KEY = ["lat", "lon", "date"]
+# Open-Meteo daily variable -> store column
+VARIABLES = {
+    "temperature_2m_max": "max_temp_c",
+    "precipitation_sum": "precipitation_mm",
+}
+SCHEMA = {
+    "lat": pl.Float64,
+    "lon": pl.Float64,
+    "date": pl.Date,
+    "max_temp_c": pl.Float64,
+    "precipitation_mm": pl.Float64,
+}
+
+Location = tuple[float, float]
+
+
+def _key(lat: float, lon: float) -> Location:
+    return round(float(lat), PRECISION), round(float(lon), PRECISION)
+
+
+def read_store(path: str | Path = STORE) -> pl.DataFrame:
+    """The whole store (empty, with the store schema, if it does not exist)."""
+    path = Path(path)
+    if not path.exists():
+        return pl.DataFrame(schema=SCHEMA)
+    return pl.read_parquet(path)
+
+
+def write_store(rows: pl.DataFrame, path: str | Path = STORE) -> pl.DataFrame:
+    """Merge rows into the store, replacing existing rows with the same key.
+
+    Returns the merged store, which is written atomically.
+    """
+    path = Path(path)
+    rows = rows.with_columns(pl.col("lat", "lon").round(PRECISION)).select(
+        SCHEMA.keys()
+    )
+    store = (
+        pl.concat([read_store(path).cast(SCHEMA), rows.cast(SCHEMA)])
+        .unique(KEY, keep="last", maintain_order=True)
+        .sort(KEY)
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    store.write_parquet(tmp)
+    tmp.replace(path)
+    return store
+
+
+def missing_ranges(
+    store: pl.DataFrame,
+    locations: Iterable[Location],
+    start: date,
+    end: date,
+) -> list[tuple[Location, date, date]]:
+    """Contiguous date ranges (inclusive) in [start, end] missing per location."""
+    locations = pl.DataFrame(
+        [_key(lat, lon) for lat, lon in locations],
+        schema={"lat": pl.Float64, "lon": pl.Float64},
+        orient="row",
+    ).unique(maintain_order=True)
+    days = pl.DataFrame({"date": pl.date_range(start, end, eager=True)})
+    missing = (
+        locations.join(days, how="cross")
+        .join(store.select(KEY), on=KEY, how="anti")
+        .sort(KEY)
+        .with_columns(
+            run=((pl.col("date").diff() != timedelta(days=1)).fill_null(True))
+            .cum_sum()
+            .over("lat", "lon")
+        )
+        .group_by("lat", "lon", "run", maintain_order=True)
+        .agg(start=pl.col("date").first(), end=pl.col("date").last())
+    )
+    return [
+        ((lat, lon), first, last)
+        for lat, lon, _, first, last in missing.iter_rows()
+    ]
+
+
+class TokenBucket:
+    """Asyncio token bucket: `rate` requests per second, bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0 or burst < 1:
+            raise ValueError(
+                f"Invalid token bucket: rate={rate}, burst={burst}"
+            )
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available, then take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.burst, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class RateLimited(Exception):
+    def __init__(self, reason: str, retry_after: Optional[float] = None):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+def _get(url: str, timeout: float) -> list[dict]:
+    """GET an Open-Meteo URL; one result dict per requested location."""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            data = json.load(response)
+    except urllib.error.HTTPError as err:
+        if err.code == 429 or err.code >= 500:
+            retry_after = err.headers.get("Retry-After")
+            raise RateLimited(
+                f"HTTP {err.code}",
+                float(retry_after) if retry_after else None,
+            ) from err
+        raise
+    results = data if isinstance(data, list) else [data]
+    if not all("daily" in r for r in results):
+        # Open-Meteo reports throttling as an error body
+        reason = next((r["reason"] for r in results if "reason" in r), data)
+        raise RateLimited(str(reason))
+    return results
+
+
+async def fetch_batch(
+    locations: list[Location],
+    start: date,
+    end: date,
+    bucket: TokenBucket,
+    base_url: str = API_URL,
+    retries: int = 5,
+    backoff: float = 5.0,
+    timeout: float = 60.0,
+) -> pl.DataFrame:
+    """Fetch one date range for several locations in one request.
+
+    Throttled requests are retried after `Retry-After` when given, else
+    after an exponential backoff starting at `backoff` seconds.
+    """
+    query = {
+        "latitude": ",".join(str(lat) for lat, _ in locations),
+        "longitude": ",".join(str(lon) for _, lon in locations),
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "daily": ",".join(VARIABLES),
+        "timezone": "auto",
+    }
+    url = f"{base_url}?{urllib.parse.urlencode(query, safe=',')}"
+    for attempt in range(retries):
+        await bucket.acquire()
+        try:
+            results = await asyncio.to_thread(_get, url, timeout)
+            break
+        except RateLimited as err:
+            if attempt == retries - 1:
+                raise RuntimeError(
+                    f"Open-Meteo request failed after {retries} attempts "
+                    f"({err}): {url}"
+                ) from err
+            wait = err.retry_after or backoff * 2**attempt
+            print(f"    throttled ({err}), retrying in {wait:.0f}s...")
+            await asyncio.sleep(wait)
+    return pl.concat(
+        [
+            pl.DataFrame(
+                {
+                    "lat": lat,
+                    "lon": lon,
+                    "date": result["daily"]["time"],
+                    **{
+                        column: result["daily"][variable]
+                        for variable, column in VARIABLES.items()
+                    },
+                }
+            )
+            .with_columns(pl.col("date").str.to_date())
+            .cast(SCHEMA)
+            for (lat, lon), result in zip(locations, results)
+        ]
+    )
+
+
+async def fetch_missing(
+    locations: Iterable[Location],
+    start: date,
+    end: date,
+    path: str | Path = STORE,
+    base_url: str = API_URL,
+    rate: float = 0.5,
+    burst: int = 2,
+    concurrency: int = 4,
+    batch_size: int = 10,
+    **kwargs,
+) -> int:
+    """Fetch the store's missing days for `locations` and add them.
+
+    Args:
+        locations: (lat, lon) pairs.
+        start, end: Inclusive date range required.
+        path: Store path.
+        base_url: Open-Meteo archive endpoint (or a stub of it).
+        rate: Requests per second allowed on average.
+        burst: Requests allowed back to back.
+        concurrency: Requests in flight at once.
+        batch_size: Locations per request.
+        **kwargs: Passed to `fetch_batch` (retries, backoff, timeout).
+
+    Returns:
+        The number of rows added. Completed batches are stored even if
+        another batch fails.
+    """
+    ranges = missing_ranges(read_store(path), locations, start, end)
+    by_range: dict[tuple[date, date], list[Location]] = {}
+    for location, first, last in ranges:
+        by_range.setdefault((first, last), []).append(location)
+    batches = [
+        (group[i : i + batch_size], first, last)
+        for (first, last), group in by_range.items()
+        for i in range(0, len(group), batch_size)
+    ]
+    print(
+        f"Fetching {len(ranges)} missing ranges for "
+        f"{len({loc for loc, _, _ in ranges})} locations in "
+        f"{len(batches)} requests..."
+    )
+    if not batches:
+        return 0
+
+    bucket = TokenBucket(rate, burst)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run(batch, first, last):
+        async with slots:
+            rows = await fetch_batch(
+                batch, first, last, bucket, base_url, **kwargs
+            )
+            print(f"  {len(batch)} locations, {first} → {last}")
+            return rows
+
+    results = await asyncio.gather(
+        *(run(*batch) for batch in batches), return_exceptions=True
+    )
+    fetched = [r for r in results if isinstance(r, pl.DataFrame)]
+    if fetched:
+        write_store(pl.concat(fetched), path)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        raise errors[0]
+    return sum(len(rows) for rows in fetched)
+
+
+def update(
+    locations: Iterable[Location], start: date, end: date, **kwargs
+) -> int:
+    """Synchronous wrapper around `fetch_missing`."""
+    return asyncio.run(fetch_missing(list(locations), start, end, **kwargs))
+
+
+def _with_rain(weather: pl.DataFrame) -> pl.DataFrame:
+    return weather.with_columns(
+        date=pl.col("date").dt.strftime("%Y-%m-%d"),
+        rain=pl.col("precipitation_mm") > 0,
+    ).drop("precipitation_mm")
+
+
+def daily(lat: float, lon: float, path: str | Path = STORE) -> pl.DataFrame:
+    """Weather at one location: date (YYYY-MM-DD), max_temp_c and rain."""
+    lat, lon = _key(lat, lon)
+    weather = read_store(path).filter(
+        pl.col("lat") == lat, pl.col("lon") == lon
+    )
+    return _with_rain(weather.drop("lat", "lon"))
+
+
+def regional(regions: pl.DataFrame, path: str | Path = STORE) -> pl.DataFrame:
+    """Weather per region: date, region_code, max_temp_c and rain.
+
+    `regions` has region_code, lat and lon (e.g. region centroids).
+    """
+    regions = regions.select(
+        pl.col("region_code").cast(pl.String),
+        pl.col("lat", "lon").cast(pl.Float64).round(PRECISION),
+    )
+    weather = regions.join(read_store(path), on=["lat", "lon"], how="inner")
+    return _with_rain(
+        weather.select("date", "region_code", "max_temp_c", "precipitation_mm")
+    )
+
+
+def import_csv(
+    csv: str | Path,
+    regions: Optional[pl.DataFrame] = None,
+    location: Optional[Location] = None,
+    path: str | Path = STORE,
+) -> int:
+    """Add a legacy `fetch_weather.py` CSV to the store.
+
+    Regional CSVs (with region_code) need `regions` for coordinates;
+    single-location CSVs need `location`. Returns the rows imported.
+    """
+    weather = pl.read_csv(csv, schema_overrides={"region_code": pl.String})
+    if "region_code" in weather.columns:
+        if regions is None:
+            raise ValueError(f"{csv} is regional; regions are required")
+        weather = weather.join(
+            regions.select(pl.col("region_code").cast(pl.String), "lat", "lon"),
+            on="region_code",
+            how="inner",
+        )
+    elif location is not None:
+        weather = weather.with_columns(
+            lat=pl.lit(location[0]), lon=pl.lit(location[1])
+        )
+    else:
+        raise ValueError(f"{csv} has no region_code; a location is required")
+    weather = weather.with_columns(pl.col("date").str.to_date())
+    write_store(weather, path)
+    return weather.height
@@ -0,0 +1,65 @@
+"""Benchmark `foundata` CLI startup time.
+
+Runs each command in a fresh interpreter several times and reports the
+median and worst wall-clock time, so regressions from module-level imports
+of heavy dependencies (matplotlib, the source loaders) are easy to spot.
+Lightweight commands should start well under a second.
+
+Usage:
+    uv run python scripts/benchmark_startup.py
+    uv run python scripts/benchmark_startup.py --repeats 20 --budget 0.5
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+ENTRY = "import sys; from foundata.cli import cli; cli(sys.argv[1:])"
+
+COMMANDS = [
+    ["--help"],
+    ["split", "--help"],
+    ["sample", "--help"],
+    ["filter", "--help"],
+    ["bin", "--help"],
+    ["validate-config", "--help"],
+    ["run", "--help"],
+]
+
+
+def time_command(args: list[str], repeats: int) -> list[float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", ENTRY, *args],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(repeats: int, budget: float) -> int:
+    slow = []
+    for args in COMMANDS:
+        timings = time_command(args, repeats)
+        median = statistics.median(timings)
+        name = " ".join(args)
+        print(f"{name:<26} median {median:.3f}s  max {max(timings):.3f}s")
+        if median > budget:
+            slow.append(name)
+    if slow:
+        print(f"WARNING: over {budget:.2f}s budget: {', '.join(slow)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=1.0)
+    args = parser.parse_args()
+    sys.exit(main(args.repeats, args.budget))
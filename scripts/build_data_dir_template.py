@@ -369,8 +369,8 @@ def generate_ktdb():
     )
     # force zone-code columns to string: the real (much larger) trips.csv
     # infers these as string, but a small sample of purely-numeric-looking
-    # codes would otherwise infer as int64 and break the strict-typed join
-    # against configs/ktdb/zone_distances.parquet (which stores them as str)
+    # codes would otherwise infer as int64 and no longer match the string
+    # zone codes of configs/ktdb/zone_centroids.csv
     zone_cols = ["sTP1_1_5", "TP1_1_5"]
     trips = pl.read_csv(
         src / "trips.csv",
@@ -419,8 +419,7 @@ def generate_ktdb():
     # The real trips.csv is large enough that some rows have a blank
     # sTP1_1_5/TP1_1_5 zone code, which makes polars infer those columns as
     # string. Our tiny sample only has real 10-digit codes, so it would
-    # infer as int64 instead and break the strict-typed join against
-    # configs/ktdb/zone_distances.parquet (stored as str). Add one throwaway
+    # infer as int64 instead of matching production. Add one throwaway
     # row (th_seq=0) reproducing that real-world blank-code case — the
     # loader's `seq > 0` filter drops it immediately, but its presence in
     # the file is enough to make schema inference match production.
@@ -8,9 +8,13 @@ Creates:
     configs/<source>/hh_dictionary.yaml
     configs/<source>/person_dictionary.yaml
     configs/<source>/trip_dictionary.yaml
-    foundata/<source>.py
+    foundata/<source>.py (with the source's registry `SPEC`)
+
+and adds the source to `MODULES` in foundata/sources.py, so `foundata run`
+and `foundata ingest` pick it up.
 """
 
+import re
 import sys
 from pathlib import Path
 
@@ -20,6 +24,7 @@ REPO_ROOT = Path(__file__).resolve().parent.parent
 CONFIGS_ROOT = REPO_ROOT / "configs"
 FOUNDATA_ROOT = REPO_ROOT / "foundata"
 TEMPLATE_PATH = CONFIGS_ROOT / "core" / "template.yaml"
+REGISTRY_PATH = FOUNDATA_ROOT / "sources.py"
 
 
 def load_template() -> dict:
@@ -138,11 +143,14 @@ def build_python_module(source_name: str) -> str:
 
 import polars as pl
 
-from foundata import fix, utils
+from foundata import fix, sources, utils
 from foundata.utils import table_joiner
 
 SOURCE = "{source_name}"
 
+# TODO: Update to the raw file layout: [(glob, polars read_csv options)].
+RAW_FILES = [("*.csv", {{}})]
+
 
 def load(
     data_root: str | Path,
@@ -178,6 +186,9 @@ def load(
     return attributes, trips
 
 
+{build_spec(source_name)}
+
+
 def load_households(
     root: str | Path,
     config: dict,
@@ -257,12 +268,43 @@ def load_trips(
     # TODO: Convert distance to km (e.g. * 1.60934 for miles).
 
     # Handle midnight-crossing trips
-    data = fix.day_wrap(data)
+    data = fix.day_wrap(data, SOURCE)
 
     return data
 '''
 
 
+def build_spec(source_name: str) -> str:
+    """Registry entry of a new single-year source (see foundata/sources.py)."""
+    return f"""# TODO: For a multi-year source, set years=[...] (subdirectories of
+# data_dir) and add a `years` argument to load().
+SPEC = sources.SourceSpec(
+    name=SOURCE,
+    data_dir="{source_name.upper()}",
+    loader=load,
+    configs={{
+        "hh_config": "hh_dictionary.yaml",
+        "person_config": "person_dictionary.yaml",
+        "trips_config": "trip_dictionary.yaml",
+    }},
+    raw_files=RAW_FILES,
+)"""
+
+
+def register_source(source_name: str, registry: Path = REGISTRY_PATH) -> None:
+    """Append a source module to `MODULES` in foundata/sources.py."""
+    text = registry.read_text()
+    match = re.search(r"^MODULES = \((.*?)^\)", text, re.M | re.S)
+    if match is None:
+        print(f"ERROR: No MODULES tuple found in {registry}")
+        sys.exit(1)
+    if f'"{source_name}"' in match.group(1):
+        return
+    end = match.end() - 1
+    text = text[:end] + f'    "{source_name}",\n' + text[end:]
+    registry.write_text(text)
+
+
 def scaffold_source(source_name: str) -> None:
     template = load_template()
     template_attributes = template["attributes"]
@@ -290,18 +332,21 @@ def scaffold_source(source_name: str) -> None:
         print(f"ERROR: Python module already exists: {py_path}")
         sys.exit(1)
     py_path.write_text(build_python_module(source_name))
+    register_source(source_name)
 
     print(f"Scaffolded new source: {source_name!r}")
     print(f"  {config_dir}/hh_dictionary.yaml")
     print(f"  {config_dir}/person_dictionary.yaml")
     print(f"  {config_dir}/trip_dictionary.yaml")
     print(f"  {py_path}")
+    print(f"  registered in {REGISTRY_PATH}")
     print()
     print("Next steps:")
     print("  1. Fill in column_mappings in each YAML (raw col -> template field)")
     print("  2. Add value mappings for categorical fields")
     print("  3. Implement load_households/load_persons/load_trips in the .py module")
-    print(f"  4. Run: python -c \"from foundata.config_validator import validate_source; validate_source('{source_name}')\"")
+    print("  4. Set RAW_FILES and the SPEC data_dir/years to the raw data layout")
+    print(f"  5. Run: python -c \"from foundata.config_validator import validate_source; validate_source('{source_name}')\"")
 
 
 if __name__ == "__main__":
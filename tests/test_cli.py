@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY = ("matplotlib", "rapidfuzz", "foundata.run", "foundata.plots")
+
+
+def _loaded_after(code: str) -> set[str]:
+    script = (
+        f"import sys\n{code}\n"
+        "print('loaded:' + ','.join(m for m in "
+        f"{HEAVY!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    loaded = out.rsplit("loaded:", 1)[1].strip()
+    return set(loaded.split(",")) - {""}
+
+
+def test_cli_import_is_lightweight():
+    assert _loaded_after("import foundata.cli") == set()
+
+
+@pytest.mark.parametrize(
+    "args",
+    [["--help"], ["split", "--help"], ["filter", "--help"], ["bin", "--help"]],
+)
+def test_light_commands_skip_heavy_imports(args):
+    code = (
+        "from foundata.cli import cli\n"
+        f"try:\n    cli.main({args!r}, standalone_mode=False)\n"
+        "except SystemExit:\n    pass"
+    )
+    assert _loaded_after(code) == set()
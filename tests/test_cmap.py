@@ -33,3 +33,27 @@ def test_cmap_load():
     attrs, trips = filter.columns(attrs, trips)
     attrs, trips = fix.fix_types(attrs, trips)
     assert verify.columns(attrs, trips)
+
+
+def test_location_index_home_and_trip_lookups():
+    index = cmap.load_location_index(Path(DATA_ROOT), CONFIGS_ROOT)
+    assert index.columns == ["sampno", "locno", "hh_zone", "home"]
+    assert index["hh_zone"].null_count() == 0
+    homes = cmap.home_locations(index)
+    assert homes["hid"].is_unique().all()
+    assert set(homes["hid"]) <= set(index.filter("home")["sampno"])
+
+
+def test_location_index_cached_next_to_rurality(tmp_path):
+    configs_root = tmp_path / "configs"
+    (configs_root / "cmap").mkdir(parents=True)
+    rurality_csv = CONFIGS_ROOT / "cmap" / "RuralSubUrban_T.csv"
+    (configs_root / "cmap" / rurality_csv.name).write_bytes(
+        rurality_csv.read_bytes()
+    )
+
+    built = cmap.load_location_index(Path(DATA_ROOT), configs_root, cache=True)
+    path = cmap.location_index_path(Path(DATA_ROOT), configs_root)
+    assert path.exists()
+    cached = cmap.load_location_index(Path(DATA_ROOT), configs_root, cache=True)
+    assert cached.equals(built)
@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import yaml
+
+from foundata import config_cache, utils
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "person_dictionary.yaml"
+    path.write_text(
+        yaml.safe_dump(
+            {
+                "column_mappings": {"A": "age", "S": "sex"},
+                "sex": {1: "male", 2: "female", 3: "alien"},
+            }
+        )
+    )
+    return path
+
+
+def test_load_compiles_once(config_path, monkeypatch, capsys):
+    first = config_cache.load(config_path)
+    assert first == yaml.safe_load(config_path.read_text())
+    assert config_cache.compiled_path(config_path).exists()
+    # the invalid mapped value is reported once, at compile time
+    assert "alien" in capsys.readouterr().out
+
+    def fail(*args, **kwargs):
+        raise AssertionError("YAML re-parsed")
+
+    monkeypatch.setattr(config_cache, "parse", fail)
+    assert config_cache.load(config_path) == first
+    assert capsys.readouterr().out == ""
+
+
+def test_edited_yaml_is_recompiled(config_path):
+    config_cache.load(config_path)
+    config_path.write_text(yaml.safe_dump({"sex": {1: "female"}}))
+    assert config_cache.load(config_path) == {"sex": {1: "female"}}
+    compiled = list((config_path.parent / config_cache.COMPILED_DIR).iterdir())
+    assert len(compiled) == 1
+
+
+def test_concurrent_compiles_all_load(config_path):
+    expected = yaml.safe_load(config_path.read_text())
+    with ThreadPoolExecutor(8) as pool:
+        loaded = list(
+            pool.map(
+                lambda _: config_cache.load(config_path, check=False), range(32)
+            )
+        )
+    assert all(config == expected for config in loaded)
+    compiled = list((config_path.parent / config_cache.COMPILED_DIR).iterdir())
+    assert compiled == [config_cache.compiled_path(config_path)]
+
+
+def test_bad_pickle_falls_back_to_yaml(config_path):
+    target = config_cache.compile_config(config_path, check=False)
+    target.write_bytes(b"not a pickle")
+    assert config_cache.load(config_path) == yaml.safe_load(
+        config_path.read_text()
+    )
+
+
+def test_template_section_from_file_name():
+    assert config_cache.template_section("hh_dictionary.yaml") == "attributes"
+    assert config_cache.template_section("stage_dictionary.yaml") == "trips"
+    assert config_cache.template_section("template.yaml") is None
+
+
+def test_repo_configs_match_plain_yaml():
+    for path in sorted(utils.get_config_path().rglob("*.yaml")):
+        with open(path) as handle:
+            assert config_cache.load(path, check=False) == yaml.safe_load(
+                handle
+            )
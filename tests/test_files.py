@@ -0,0 +1,33 @@
+import pytest
+
+from foundata import files
+
+
+def test_atomic_write_replaces_on_success(tmp_path):
+    path = tmp_path / "out.json"
+    path.write_text("old")
+    with files.atomic_write(path) as handle:
+        handle.write("new")
+        assert path.read_text() == "old"
+    assert path.read_text() == "new"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_atomic_write_keeps_original_on_error(tmp_path):
+    path = tmp_path / "out.bin"
+    path.write_bytes(b"old")
+    with pytest.raises(RuntimeError):
+        with files.atomic_write(path, "wb") as handle:
+            handle.write(b"partial")
+            raise RuntimeError("interrupted")
+    assert path.read_bytes() == b"old"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_file_digest_tracks_content(tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.write_text("same")
+    b.write_text("same")
+    assert files.file_digest(a) == files.file_digest(b)
+    b.write_text("changed")
+    assert files.file_digest(a) != files.file_digest(b)
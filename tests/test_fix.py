@@ -69,3 +69,61 @@ def test_day_wrap_does_not_cascade_beyond_one_day():
     # beyond +2880 would mean a second (cascading) shift was applied
     assert result["tst"].max() < 1000 + 2 * 1440
     assert result["tet"].max() < 900 + 2 * 1440
+
+
+def test_day_wrap_interleaved_pids_match_grouped():
+    trips = pl.DataFrame(
+        {
+            "pid": ["p1", "p2", "p1", "p2", "p3"],
+            "seq": [1, 1, 2, 2, 1],
+            "tst": [1380, 100, 100, 150, 600],
+            "tet": [30, 200, 200, 250, 660],
+        }
+    )
+    result = fix.day_wrap(trips)
+    assert result["pid"].to_list() == trips["pid"].to_list()
+    grouped = fix.day_wrap(trips.sort("pid", "seq"))
+    assert result.sort("pid", "seq").equals(grouped)
+    assert result["tst"].to_list() == [1380, 100, 1540, 1590, 600]
+    assert result["tet"].to_list() == [1470, 200, 1640, 1690, 660]
+
+
+def test_day_wrap_keeps_dtypes_and_nulls():
+    trips = pl.DataFrame(
+        {"pid": ["p1", "p1"], "tst": [None, 100], "tet": [30, 150]},
+        schema={"pid": pl.String, "tst": pl.Int32, "tet": pl.Int32},
+    )
+    result = fix.day_wrap(trips)
+    assert result.schema == trips.schema
+    assert result["tst"].to_list() == [None, 100]
+    assert result["tet"].to_list() == [30, 150]
+
+
+def test_day_wrap_counts_by_source():
+    fix.day_wrap_counts(reset=True)
+    trips = pl.DataFrame(
+        {
+            "pid": ["p1", "p1", "p2", "p2"],
+            "tst": [1380, 100, 100, 150],
+            "tet": [30, 200, 200, 250],
+        }
+    )
+    fix.day_wrap(trips, "a")
+    fix.day_wrap(trips, "a")
+    fix.day_wrap(trips.head(1))
+    counts = fix.day_wrap_counts(reset=True)
+    assert counts == {
+        "a": {"trips": 8, "midnight": 4, "overlap": 2},
+        "unknown": {"trips": 1, "midnight": 1, "overlap": 0},
+    }
+    assert fix.day_wrap_counts() == {}
+
+
+def test_unknown_to_null_string_columns_only():
+    df = pl.DataFrame(
+        {"mode": ["car", "unknown", None], "n": [1, 2, 3], "a": ["x", "y", "z"]}
+    )
+    result = fix.unknown_to_null(df)
+    assert result["mode"].to_list() == ["car", None, None]
+    assert result["a"].to_list() == ["x", "y", "z"]
+    assert fix.unknown_to_null(df.lazy()).collect().equals(result)
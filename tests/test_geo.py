@@ -0,0 +1,81 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from foundata import geo
+
+ZONES = ["a", "b", "c"]
+LAT = np.array([37.5, 37.6, 35.1])
+LON = np.array([127.0, 127.1, 129.0])
+
+
+def test_haversine_known_distance():
+    # London to Paris, roughly 344 km
+    d = geo.haversine(
+        np.array([51.5074]),
+        np.array([-0.1278]),
+        np.array([48.8566]),
+        np.array([2.3522]),
+    )
+    assert d.dtype == np.float32
+    assert d[0] == pytest.approx(343.5, abs=1.0)
+
+
+def test_haversine_matrix_symmetric_zero_diagonal():
+    m = geo.haversine_matrix(LAT, LON)
+    assert m.shape == (3, 3)
+    assert np.allclose(m, m.T)
+    assert np.all(np.diag(m) == 0)
+
+
+def test_distances_on_the_fly_match_matrix():
+    ozone = pl.Series(["a", "b", "c", "a", "x", None])
+    dzone = pl.Series(["b", "a", "a", "a", "a", "c"])
+    computed = geo.ZoneDistances(ZONES, LAT, LON).distances(ozone, dzone)
+    gathered = geo.ZoneDistances(
+        ZONES, LAT, LON, matrix=geo.haversine_matrix(LAT, LON)
+    ).distances(ozone, dzone)
+    assert computed[:4].to_list() == pytest.approx(gathered[:4].to_list())
+    assert computed[0] == pytest.approx(computed[1])
+    assert computed[3] == 0
+    assert computed[4] is None and computed[5] is None
+    assert gathered[4] is None and gathered[5] is None
+
+
+def test_pair_cache_is_reused(monkeypatch):
+    distances = geo.ZoneDistances(ZONES, LAT, LON, cache_size=4, batch_size=1)
+    o = np.array([0, 1, 0, 2])
+    d = np.array([1, 0, 2, 0])
+    first = distances.pair_distances(o, d)
+    assert len(distances._keys) == 2
+
+    def fail(*args):
+        raise AssertionError("cached pair recomputed")
+
+    monkeypatch.setattr(geo, "haversine", fail)
+    assert np.array_equal(distances.pair_distances(o, d), first)
+
+
+def test_pair_cache_evicts_least_recently_used():
+    distances = geo.ZoneDistances(ZONES, LAT, LON, cache_size=2)
+    distances.pair_distances(np.array([0]), np.array([1]))  # a-b
+    distances.pair_distances(np.array([0]), np.array([2]))  # a-c
+    distances.pair_distances(np.array([1]), np.array([0]))  # b-a, reused
+    distances.pair_distances(np.array([1]), np.array([2]))  # b-c, evicts a-c
+    n = len(ZONES)
+    assert distances._keys.tolist() == [0 * n + 1, 1 * n + 2]
+
+
+def test_large_batches_bypass_pair_cache():
+    distances = geo.ZoneDistances(ZONES, LAT, LON, cache_size=2, batch_size=2)
+    o = np.array([0, 1, 0, 2, 1])
+    d = np.array([1, 0, 2, 0, 2])
+    result = distances.pair_distances(o, d)
+    assert len(distances._keys) == 0
+    expected = geo.haversine(LAT[o], LON[o], LAT[d], LON[d])
+    assert np.array_equal(result, expected)
+
+
+def test_matrix_shape_must_match_zones():
+    with pytest.raises(ValueError):
+        geo.ZoneDistances(ZONES, LAT, LON, matrix=np.zeros((2, 2)))
@@ -0,0 +1,219 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import polars as pl
+import pytest
+from click.testing import CliRunner
+
+from foundata import ingest, nts
+from foundata.cli import cli
+
+
+@pytest.fixture
+def raw_root(tmp_path):
+    root = tmp_path / "data"
+    (root / "SRC").mkdir(parents=True)
+    pl.DataFrame(
+        {"a": [1, 2, 3], "b": ["x", "y", "z"], "c": [0.5, 1.5, 2.5]}
+    ).write_csv(root / "SRC" / "table.tab", separator="\t")
+    yield root
+    ingest.disable_cache()
+
+
+def test_read_csv_without_cache_matches_polars(raw_root):
+    path = raw_root / "SRC" / "table.tab"
+    result = ingest.read_csv(path, columns=["c", "a"], separator="\t")
+    expected = pl.read_csv(path, columns=["c", "a"], separator="\t")
+    assert result.equals(expected)
+    assert not ingest.cache_root_for(raw_root).exists()
+
+
+def test_read_csv_populates_and_hits_cache(raw_root, monkeypatch):
+    path = raw_root / "SRC" / "table.tab"
+    cache_root = ingest.enable_cache(raw_root)
+    first = ingest.read_csv(path, separator="\t")
+    cached = list(cache_root.rglob("*.parquet"))
+    assert len(cached) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("text file re-parsed")
+
+    monkeypatch.setattr(ingest.pl, "read_csv", fail)
+    second = ingest.read_csv(path, separator="\t")
+    assert first.equals(second)
+
+
+def test_read_csv_projection_keeps_file_order(raw_root):
+    path = raw_root / "SRC" / "table.tab"
+    ingest.enable_cache(raw_root)
+    result = ingest.read_csv(path, columns=["c", "a"], separator="\t")
+    assert result.columns == ["a", "c"]
+    with pytest.raises(pl.exceptions.ColumnNotFoundError):
+        ingest.read_csv(path, columns=["a", "missing"], separator="\t")
+
+
+def test_read_csv_where_filters_with_and_without_cache(raw_root):
+    path = raw_root / "SRC" / "table.tab"
+    where = pl.col("a") >= 2
+    plain = ingest.read_csv(path, columns=["b"], separator="\t", where=where)
+    assert plain["b"].to_list() == ["y", "z"]
+    assert plain.columns == ["b"]
+    ingest.enable_cache(raw_root)
+    cached = ingest.read_csv(path, columns=["b"], separator="\t", where=where)
+    assert cached.equals(plain)
+
+
+def test_scan_csv_matches_read_csv(raw_root):
+    path = raw_root / "SRC" / "table.tab"
+    for cache in (False, True):
+        if cache:
+            ingest.enable_cache(raw_root)
+        lazy = ingest.scan_csv(
+            path, columns=["c", "b"], where=pl.col("a") > 1, separator="\t"
+        )
+        assert isinstance(lazy, pl.LazyFrame)
+        expected = ingest.read_csv(
+            path, columns=["c", "b"], where=pl.col("a") > 1, separator="\t"
+        )
+        assert lazy.collect().equals(expected)
+
+
+def test_options_are_part_of_cache_key(raw_root):
+    path = raw_root / "SRC" / "table.tab"
+    cache_root = ingest.enable_cache(raw_root)
+    ingest.read_csv(path, separator="\t")
+    ingest.read_csv(path, separator="\t", infer_schema_length=0)
+    assert len(list(cache_root.rglob("*.parquet"))) == 2
+
+
+def test_changed_file_is_retranscoded(raw_root):
+    path = raw_root / "SRC" / "table.tab"
+    ingest.enable_cache(raw_root)
+    ingest.read_csv(path, separator="\t")
+    pl.DataFrame({"a": [9], "b": ["q"], "c": [0.0]}).write_csv(
+        path, separator="\t"
+    )
+    result = ingest.read_csv(path, separator="\t")
+    assert result["a"].to_list() == [9]
+
+
+def test_touched_file_matches_on_digest(raw_root):
+    path = raw_root / "SRC" / "table.tab"
+    cache_root = ingest.enable_cache(raw_root)
+    cache_path = ingest.ingest_file(path, separator="\t")
+    written = cache_path.stat().st_mtime_ns
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert ingest.ingest_file(path, separator="\t") == cache_path
+    assert cache_path.stat().st_mtime_ns == written
+    manifest = ingest._load_manifest(cache_root)
+    (entry,) = manifest.values()
+    assert entry["mtime_ns"] == path.stat().st_mtime_ns
+
+
+def test_ingest_nts_fixture(tmp_path):
+    fixtures = Path(__file__).parent / "fixtures"
+    cache_root = tmp_path / "cache"
+    written = ingest.ingest(
+        fixtures, {"nts": ("nts", nts.RAW_FILES)}, cache_root=cache_root
+    )
+    assert len(written) == 5
+    assert all(p.suffix == ".parquet" for p in written)
+    assert (cache_root / ingest.MANIFEST_NAME).exists()
+    assert ingest._cache_root is None
+
+
+def test_cli_ingest(raw_root, tmp_path):
+    (raw_root / "NTS" / "tab").mkdir(parents=True)
+    pl.DataFrame({"a": [1]}).write_csv(
+        raw_root / "NTS" / "tab" / "x.tab", separator="\t"
+    )
+    cache_dir = tmp_path / "cache"
+    result = CliRunner().invoke(
+        cli,
+        [
+            "ingest",
+            "-d",
+            str(raw_root),
+            "-s",
+            "nts",
+            "--cache-dir",
+            str(cache_dir),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert "1 files cached" in result.output
+    assert len(list(cache_dir.rglob("*.parquet"))) == 1
+
+
+def test_read_header_with_and_without_cache(raw_root):
+    path = raw_root / "SRC" / "table.tab"
+    assert ingest.read_header(path, separator="\t") == ["a", "b", "c"]
+    ingest.enable_cache(raw_root)
+    assert ingest.read_header(path, separator="\t") == ["a", "b", "c"]
+
+
+def test_text_projection_is_lazy_scan(raw_root, monkeypatch):
+    path = raw_root / "SRC" / "table.tab"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("eager read used for projection")
+
+    monkeypatch.setattr(ingest.pl, "read_csv", fail)
+    result = ingest.read_csv(path, columns=["c", "a"], separator="\t")
+    assert result.columns == ["a", "c"]
+    with pytest.raises(pl.exceptions.ColumnNotFoundError):
+        ingest.read_csv(path, columns=["a", "missing"], separator="\t")
+
+
+def test_ingest_streams_without_eager_read(raw_root, monkeypatch):
+    path = raw_root / "SRC" / "table.tab"
+    expected = pl.read_csv(path, separator="\t")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("text file read eagerly")
+
+    monkeypatch.setattr(ingest.pl, "read_csv", fail)
+    cache_root = ingest.enable_cache(raw_root)
+    assert ingest.scan_csv(path, separator="\t").collect().equals(expected)
+    assert len(list(cache_root.rglob("*.parquet"))) == 1
+    assert not list(cache_root.rglob("*.tmp"))
+
+
+def test_unparseable_file_is_read_from_text(raw_root, capsys):
+    # "a" is inferred as an int from the first 100 rows, then fails to parse
+    path = raw_root / "SRC" / "mixed.csv"
+    pl.DataFrame(
+        {"a": [str(i) for i in range(200)] + ["oops"], "b": range(201)}
+    ).write_csv(path)
+    cache_root = ingest.enable_cache(raw_root)
+    for _ in range(2):
+        result = ingest.read_csv(path, columns=["b"])
+        assert result["b"].to_list() == list(range(201))
+    assert not list(cache_root.rglob("*.parquet"))
+    assert capsys.readouterr().out.count("Ingesting") == 1
+    manifest = ingest._load_manifest(cache_root)
+    (entry,) = manifest.values()
+    assert "error" in entry and "cache" not in entry
+
+
+def test_concurrent_caching_keeps_every_manifest_entry(raw_root):
+    for i in range(16):
+        pl.DataFrame({"a": [i]}).write_csv(raw_root / "SRC" / f"t{i}.csv")
+    cache_root = ingest.enable_cache(raw_root)
+    paths = sorted((raw_root / "SRC").glob("t*.csv"))
+    with ThreadPoolExecutor(8) as pool:
+        frames = list(pool.map(ingest.read_csv, paths))
+    assert [f["a"].item() for f in frames] == [int(p.stem[1:]) for p in paths]
+    assert len(ingest._load_manifest(cache_root)) == 16
+    assert not list(cache_root.rglob("*.tmp"))
+
+
+def test_unreadable_manifest_is_treated_as_empty(raw_root):
+    path = raw_root / "SRC" / "table.tab"
+    cache_root = ingest.enable_cache(raw_root)
+    cache_root.mkdir(parents=True)
+    (cache_root / ingest.MANIFEST_NAME).write_text('{"half": ')
+    assert ingest.read_csv(path, separator="\t").height == 3
+    assert len(ingest._load_manifest(cache_root)) == 1
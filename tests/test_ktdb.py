@@ -1,9 +1,12 @@
+import json
 import os
 from pathlib import Path
 
+import numpy as np
 import polars as pl
+import pytest
 
-from foundata import filter, fix, ktdb, verify
+from foundata import filter, fix, geo, ktdb, verify
 from foundata.utils import (
     get_config_path,
     load_yaml_config,
@@ -58,3 +61,52 @@ def test_ktdb_load_persons_hh_income_not_truncated_to_zero(monkeypatch):
     known = persons.filter(pl.col("hh_income").is_not_null())
     assert known.height > 0
     assert (known["hh_income"] > 0).all()
+
+
+def test_zone_distances_symmetric_gather():
+    lat = np.array([37.5, 37.6, 35.1])
+    lon = np.array([127.0, 127.1, 129.0])
+    distances = geo.ZoneDistances(
+        ["a", "b", "c"], lat, lon, matrix=geo.haversine_matrix(lat, lon)
+    )
+    result = distances.distances(
+        pl.Series(["a", "b", "a", "x", None]),
+        pl.Series(["b", "a", "a", "a", "c"]),
+    )
+    assert result[0] == pytest.approx(result[1])
+    assert result[0] > 0
+    assert result[2] == 0
+    assert result[3] is None
+    assert result[4] is None
+
+
+def test_load_distances_uses_memmapped_matrix(tmp_path, monkeypatch):
+    (tmp_path / "ktdb").mkdir()
+    pl.DataFrame(
+        {"zone": ["1", "2"], "lat": [37.5, 37.6], "lon": [127.0, 127.1]}
+    ).write_csv(tmp_path / "ktdb" / "zone_centroids.csv")
+    monkeypatch.setattr(
+        ktdb.utils, "get_config_path", lambda *p: tmp_path.joinpath(*p)
+    )
+
+    distances = ktdb.load_distances()
+    assert distances.index == {"1": 0, "2": 1}
+    assert distances.matrix is None
+    computed = distances.distances(pl.Series(["1", "2"]), pl.Series(["2", "1"]))
+
+    matrix = np.array([[0.0, 5.0], [5.0, 0.0]], dtype=np.float32)
+    np.save(tmp_path / "ktdb" / "zone_distances.npy", matrix)
+    (tmp_path / "ktdb" / "zone_distances.json").write_text(
+        json.dumps({"zones": ["1", "2"], "centroids": distances.fingerprint()})
+    )
+    distances = ktdb.load_distances()
+    assert isinstance(distances.matrix, np.memmap)
+    gathered = distances.distances(pl.Series(["1", "2"]), pl.Series(["2", "1"]))
+    assert gathered.to_list() == [5.0, 5.0]
+    assert computed[0] == pytest.approx(computed[1])
+
+    # same zones, moved centroid: the matrix is stale
+    pl.DataFrame(
+        {"zone": ["1", "2"], "lat": [37.5, 37.7], "lon": [127.0, 127.1]}
+    ).write_csv(tmp_path / "ktdb" / "zone_centroids.csv")
+    assert ktdb.load_distances().matrix is None
@@ -1,7 +1,10 @@
 import os
 from pathlib import Path
 
-from foundata import filter, fix, nts, verify
+import polars as pl
+import pytest
+
+from foundata import filter, fix, nts, run, verify
 from foundata.utils import (
     get_config_path,
     load_yaml_config,
@@ -37,3 +40,93 @@ def test_nts_load():
     attrs, trips = filter.columns(attrs, trips)
     attrs, trips = fix.fix_types(attrs, trips)
     assert verify.columns(attrs, trips)
+
+
+def _configs():
+    return [
+        load_yaml_config(CONFIGS_ROOT / "nts" / f"{name}_dictionary.yaml")
+        for name in ("hh", "person", "trip", "stage", "day")
+    ]
+
+
+@pytest.fixture
+def consistent_root(tmp_path):
+    """Fixture copy whose day/trip/stage HouseholdIDs match the persons."""
+    opts = {"separator": "\t", "infer_schema_length": 0}
+    src = FIXTURE_ROOT / "nts" / "tab"
+    (tmp_path / "tab").mkdir()
+    key = pl.read_csv(src / "individual_eul_2002-2024.tab", **opts).select(
+        "IndividualID", "HouseholdID"
+    )
+    for path in src.iterdir():
+        table = pl.read_csv(path, **opts)
+        if path.name.startswith(("day", "trip", "stage")):
+            table = table.drop("HouseholdID").join(
+                key, on="IndividualID", how="inner"
+            )
+        table.write_csv(tmp_path / "tab" / path.name, separator="\t")
+    return tmp_path
+
+
+def test_nts_partitions_by_year_cover_households():
+    parts = nts.partitions(Path(DATA_ROOT), "year")
+    households = pl.read_csv(
+        Path(DATA_ROOT) / "tab" / nts.HOUSEHOLD_FILE,
+        separator="\t",
+        columns=["HouseholdID", "SurveyYear"],
+    )
+    labels = [label for label, _ in parts]
+    assert labels == sorted(households["SurveyYear"].cast(pl.String).unique())
+    counts = [households.filter(where).height for _, where in parts]
+    assert sum(counts) == households.height
+
+
+def test_nts_partitions_by_hash_are_disjoint():
+    households = pl.read_csv(
+        Path(DATA_ROOT) / "tab" / nts.HOUSEHOLD_FILE,
+        separator="\t",
+        columns=["HouseholdID"],
+    )
+    parts = nts.partitions(Path(DATA_ROOT), 3)
+    assert [label for label, _ in parts] == ["1/3", "2/3", "3/3"]
+    masks = households.select(
+        where.alias(label) for label, where in parts
+    ).sum_horizontal()
+    assert (masks == 1).all()
+    with pytest.raises(ValueError):
+        nts.partitions(Path(DATA_ROOT), 0)
+
+
+def test_nts_split_partitions_match_predicates(tmp_path):
+    split = nts.partitions(Path(DATA_ROOT), 3, tmp_path / "split")
+    predicates = nts.partitions(Path(DATA_ROOT), 3)
+    assert [label for label, _ in split] == [label for label, _ in predicates]
+    columns = ["HouseholdID", "IndividualID"]
+    for (_, part), (_, where) in zip(split, predicates):
+        for name in nts.TABLES[1:]:
+            assert nts._read_table(DATA_ROOT, name, columns, part).equals(
+                nts._read_table(DATA_ROOT, name, columns, where)
+            )
+
+
+@pytest.mark.parametrize("by", ["year", 3])
+def test_process_all_partitioned_matches_whole(consistent_root, tmp_path, by):
+    data_root = tmp_path / "data"
+    data_root.mkdir()
+    (data_root / "NTS").symlink_to(consistent_root)
+    whole = pl.collect_all(run.process_all("nts", data_root))
+    parts = pl.collect_all(
+        run.process_all(
+            "nts", data_root, partitions={"nts": by}, spill_dir=tmp_path
+        )
+    )
+    assert not (tmp_path / "nts" / "raw").exists()
+    for expected, result in zip(whole, parts):
+        # income and age (so child employment) are sampled, and weights are
+        # normalised after filtering when partitioned, so are excluded
+        excluded = ["hh_income", "age", "employment", "weight"]
+        result = result.drop(excluded, strict=False)
+        expected = expected.drop(excluded, strict=False)
+        assert result.sort(result.columns).equals(
+            expected.sort(expected.columns)
+        )
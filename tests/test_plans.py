@@ -0,0 +1,86 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from foundata import filter as flt
+from foundata import plans, utils
+
+ACTS = ["home", "work", "shop", None]
+
+
+@pytest.fixture
+def attributes():
+    return pl.DataFrame(
+        {"pid": [f"p{i}" for i in range(300)], "age": list(range(300))}
+    )
+
+
+@pytest.fixture
+def trips():
+    rng = np.random.default_rng(0)
+    rows = []
+    for i in range(280):  # the last 20 persons have no trips
+        for seq in range(int(rng.integers(1, 5))):
+            rows.append(
+                {
+                    "pid": f"p{i}",
+                    "seq": seq,
+                    "oact": ACTS[rng.integers(0, 4)],
+                    "dact": ACTS[rng.integers(0, 4)],
+                    "tst": seq * 100,
+                }
+            )
+    # shuffled, so nothing relies on input order
+    return pl.DataFrame(rows).sample(fraction=1.0, shuffle=True, seed=1)
+
+
+def _pids(df):
+    return sorted(df["pid"].unique().to_list())
+
+
+def test_round_trip(attributes, trips):
+    nested = plans.to_plans(attributes, trips)
+    assert nested.height == attributes.height
+    assert nested.columns == ["pid", "age", "trips"]
+    attrs_out, trips_out = plans.from_plans(nested)
+    assert attrs_out.equals(attributes)
+    assert trips_out.sort("pid", "seq").equals(
+        trips.sort("pid", "seq").select(trips_out.columns)
+    )
+    assert nested.filter(pl.col("pid") == "p299")["trips"].list.len()[0] == 0
+
+
+def test_lazy_round_trip(attributes, trips):
+    nested = plans.to_plans(attributes.lazy(), trips.lazy())
+    assert nested.collect().equals(plans.to_plans(attributes, trips))
+
+
+def test_home_based_matches_filter(attributes, trips):
+    expected, _ = flt.home_based(attributes, trips)
+    nested = plans.to_plans(attributes, trips).filter(plans.home_based())
+    assert _pids(nested) == _pids(expected)
+
+
+def test_activity_consistent_matches_filter(attributes, trips):
+    expected, _ = flt.activity_consistency(attributes, trips)
+    nested = plans.to_plans(attributes, trips).filter(
+        plans.activity_consistent()
+    )
+    assert _pids(nested) == _pids(expected)
+
+
+def test_merge_consecutive_matches_utils(attributes, trips):
+    expected = utils.combine_consecutive_acts(trips).sort("pid", "seq")
+    nested = plans.to_plans(attributes, trips).with_columns(
+        plans.merge_consecutive()
+    )
+    _, merged = plans.from_plans(nested)
+    assert merged.sort("pid", "seq").equals(expected.select(merged.columns))
+
+
+def test_n_trips(attributes, trips):
+    counts = plans.to_plans(None, trips).select("pid", plans.n_trips())
+    expected = trips.group_by("pid").len("n_trips")
+    assert counts.sort("pid").equals(
+        expected.sort("pid").cast({"n_trips": pl.UInt32})
+    )
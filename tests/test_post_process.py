@@ -2,8 +2,10 @@ from pathlib import Path
 
 import polars as pl
 import pytest
+from click.testing import CliRunner
 
 from foundata import post_process
+from foundata.cli import cli
 
 FIXTURE_DIR = Path(__file__).parent / "fixtures" / "post_process"
 TRIPS_CSV = FIXTURE_DIR / "trips.csv"
@@ -1283,6 +1285,90 @@ def test_discretise_numeric_label_format():
     )
 
 
+def test_fit_bins_reused_on_other_data():
+    train = pl.DataFrame({"age": [10, 20, 30, 40, 50], "pid": list("abcde")})
+    spec = post_process.fit_bins(train, n_bins=2)
+    assert list(spec) == ["age"]
+    assert spec["age"]["breaks"] == [30.0]
+    assert spec["age"]["labels"] == ["≤30", ">30"]
+
+    test = pl.DataFrame({"age": [5, 35, None], "other": [1, 2, 3]})
+    result = post_process.apply_bins(test.lazy(), spec).collect()
+    assert result["age"].to_list() == ["≤30", ">30", None]
+    assert result["other"].to_list() == [1, 2, 3]
+
+
+def test_fit_bins_lazy_matches_eager():
+    df = pl.DataFrame(
+        {"age": list(range(100)), "weight": [i / 7 for i in range(100)]}
+    )
+    for method in ("quantile", "uniform"):
+        eager = post_process.fit_bins(df, n_bins=4, method=method)
+        lazy = post_process.fit_bins(df.lazy(), n_bins=4, method=method)
+        assert eager == lazy
+        assert len(eager["age"]["breaks"]) == 3
+
+
+def test_fit_bins_skips_constant_and_excluded_columns():
+    df = pl.DataFrame({"a": [1, 1, 1], "b": [1, 2, 3], "c": [4, 5, 6]})
+    spec = post_process.fit_bins(df, exclude_cols=["c"])
+    assert list(spec) == ["b"]
+
+
+def test_bin_spec_round_trip(tmp_path):
+    df = pl.DataFrame({"age": [10, 20, 30, 40, 50]})
+    spec = post_process.fit_bins(df, n_bins=2)
+    post_process.save_bin_spec(spec, tmp_path / "bins.json")
+    loaded = post_process.load_bin_spec(tmp_path / "bins.json")
+    assert loaded == spec
+    assert post_process.discretise_numeric(df, spec=loaded).equals(
+        post_process.discretise_numeric(df, n_bins=2)
+    )
+
+
+def test_load_bin_spec_rejects_mismatched_labels(tmp_path):
+    path = tmp_path / "bins.json"
+    path.write_text('{"age": {"breaks": [1, 2], "labels": ["a", "b"]}}')
+    with pytest.raises(ValueError, match="Invalid bin spec"):
+        post_process.load_bin_spec(path)
+
+
+def test_cli_bin_fit_then_apply(tmp_path):
+    train = tmp_path / "train.csv"
+    test = tmp_path / "test.parquet"
+    pl.DataFrame({"age": [10, 20, 30, 40, 50], "pid": list("abcde")}).write_csv(
+        train
+    )
+    pl.DataFrame({"age": [5, 45], "pid": ["f", "g"]}).write_parquet(test)
+    spec = tmp_path / "bins.json"
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["bin", str(train), "--fit", str(spec), "--default", "2"]
+    )
+    assert result.exit_code == 0, result.output
+    assert spec.exists()
+    assert not (tmp_path / "train_binned.csv").exists()
+
+    result = runner.invoke(cli, ["bin", str(test), "--apply", str(spec)])
+    assert result.exit_code == 0, result.output
+    binned = pl.read_parquet(tmp_path / "test_binned.parquet")
+    assert binned["age"].to_list() == ["≤30", ">30"]
+    assert binned["pid"].to_list() == ["f", "g"]
+
+    result = runner.invoke(
+        cli, ["bin", str(train), "--fit", str(spec), "--apply", str(spec)]
+    )
+    assert result.exit_code == 1
+
+    for extra in (["--select", "age"], ["--default", "3"], ["--age", "3"]):
+        result = runner.invoke(
+            cli, ["bin", str(test), "--apply", str(spec), *extra]
+        )
+        assert result.exit_code == 2
+        assert f"combined with {extra[0]}" in result.output
+
+
 def test_fill_nulls_string_cols():
     df = pl.DataFrame(
         {
@@ -1322,6 +1408,39 @@ def test_fill_nulls_boolean_col():
     assert result["rain"].to_list() == ["true", "unknown", "false"]
 
 
+def test_fill_nulls_lazy_leaves_no_nulls():
+    df = pl.DataFrame(
+        {
+            "mode": ["walk", "", None],
+            "vehicles": pl.Series([1, None, 3], dtype=pl.Int32),
+            "rain": pl.Series([True, None, False], dtype=pl.Boolean),
+            "empty": pl.Series([None, None, None], dtype=pl.Null),
+        }
+    )
+    result = post_process.fill_nulls(df.lazy()).collect()
+    assert result.null_count().sum_horizontal().item() == 0
+    assert result["mode"].to_list() == ["walk", "unknown", "unknown"]
+    assert result["empty"].to_list() == ["unknown"] * 3
+
+
+def test_fill_nulls_keeps_dtypes_without_nulls():
+    df = pl.DataFrame(
+        {
+            "rain": [True, False],
+            "date": pl.Series(["2024-01-01", None]).str.to_date(),
+            "stops": pl.Series([[1], None], dtype=pl.List(pl.Int64)),
+        }
+    )
+    for result in (
+        post_process.fill_nulls(df),
+        post_process.fill_nulls(df.lazy()).collect(),
+    ):
+        assert result.schema["rain"] == pl.Boolean
+        assert result["date"].to_list() == ["2024-01-01", "unknown"]
+        # nested columns are left unfilled
+        assert result["stops"].to_list() == [[1], None]
+
+
 def test_discretise_numeric_invalid_method():
     df = pl.DataFrame({"age": [10, 20, 30]})
     with pytest.raises(ValueError, match="method must be"):
@@ -0,0 +1,103 @@
+import numpy as np
+import polars as pl
+import pytest
+from click.testing import CliRunner
+
+from foundata import post_process, raster
+from foundata.cli import cli
+
+
+@pytest.fixture
+def trips():
+    return pl.DataFrame(
+        {
+            "pid": ["p1", "p1", "p2"],
+            "seq": [0, 1, 0],
+            "oact": ["home", "work", "home"],
+            "dact": ["work", "home", "shop"],
+            "ozone": ["urban", "rural", "urban"],
+            "dzone": ["rural", "urban", "urban"],
+            "mode": ["car", "bus", "walk"],
+            "tst": [480, 1020, 600],
+            "tet": [540, 1080, 615],
+            "distance": [10.0, 10.0, 1.0],
+        }
+    )
+
+
+@pytest.fixture
+def attributes():
+    return pl.DataFrame(
+        {"pid": ["p1", "p2", "p3"], "hh_zone": ["urban", "urban", "rural"]}
+    )
+
+
+def test_rasterise_codes_and_shape(attributes, trips):
+    activities = post_process.trips_to_activities(attributes, trips)
+    arrays = raster.rasterise(activities, trips, resolution=60)
+    vocab = raster.vocabularies()
+    code = {
+        k: {v: i + 1 for i, v in enumerate(vals)} for k, vals in vocab.items()
+    }
+
+    assert arrays["acts"].shape == (3, 24)
+    assert arrays["pids"].tolist() == ["p1", "p2", "p3"]
+    p1_acts = arrays["acts"][0]
+    assert p1_acts[7] == code["acts"]["home"]
+    assert p1_acts[9] == code["acts"]["work"]
+    assert p1_acts[16] == code["acts"]["work"]
+    assert p1_acts[17] == 0  # travelling
+    assert p1_acts[18] == code["acts"]["home"]
+    assert arrays["zones"][0, 9] == code["zones"]["rural"]
+    # p1 is driving at 08:00 (bin 8) and not travelling at 12:00
+    assert arrays["modes"][0, 8] == code["modes"]["car"]
+    assert arrays["modes"][0, 12] == 0
+    # p3 has no trips: home all day
+    assert (arrays["acts"][2] == code["acts"]["home"]).all()
+    assert (arrays["modes"][2] == 0).all()
+
+
+def test_paint_chunks_match_single_pass():
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, 50, 500)
+    first = rng.integers(0, 100, 500)
+    last = first + rng.integers(0, 40, 500)
+    codes = rng.integers(1, 9, 500).astype(np.uint8)
+    whole = np.zeros((50, 140), dtype=np.uint8)
+    chunked = np.zeros((50, 140), dtype=np.uint8)
+    raster.paint(whole, rows, first, last, codes)
+    raster.paint(chunked, rows, first, last, codes, chunk_size=7)
+    assert np.array_equal(whole, chunked)
+
+
+def test_resolution_must_divide_day(trips):
+    with pytest.raises(ValueError, match="must divide"):
+        raster.rasterise(trips.rename({"tst": "start"}), resolution=7)
+
+
+def test_cli_export_raster_round_trip(tmp_path, attributes, trips):
+    activities = post_process.trips_to_activities(attributes, trips)
+    activities.write_csv(tmp_path / "activities.csv")
+    trips.write_parquet(tmp_path / "trips.parquet")
+    out = tmp_path / "raster"
+    result = CliRunner().invoke(
+        cli,
+        [
+            "export-raster",
+            str(tmp_path / "activities.csv"),
+            "-t",
+            str(tmp_path / "trips.parquet"),
+            "-o",
+            str(out),
+            "-r",
+            "15",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    loaded = raster.load_raster(out)
+    expected = raster.rasterise(activities, trips, resolution=15)
+    assert isinstance(loaded["acts"], np.memmap)
+    for name in raster.ARRAYS:
+        assert np.array_equal(loaded[name], expected[name])
+    assert loaded["pids"].to_list() == ["p1", "p2", "p3"]
+    assert loaded["meta"]["resolution"] == 15
@@ -0,0 +1,119 @@
+import polars as pl
+import pytest
+from click.testing import CliRunner
+
+from foundata import sample
+from foundata.cli import cli
+
+
+@pytest.fixture
+def attributes():
+    n = 4000
+    return pl.DataFrame(
+        {
+            "pid": [f"p{i}" for i in range(n)],
+            "source": ["a" if i % 4 else "b" for i in range(n)],
+            "weight": [3.0 if i % 2 else 1.0 for i in range(n)],
+        }
+    )
+
+
+def _sampled(attributes, **kwargs):
+    ids = sample.sample_groups(attributes.lazy(), seed=1, **kwargs).collect()
+    return attributes.join(ids, on="pid", how="semi")
+
+
+def test_sample_groups_size_is_deterministic(attributes):
+    first = _sampled(attributes, n=100)
+    assert first.height == 100
+    assert first.equals(_sampled(attributes, n=100))
+
+
+def test_sample_groups_fraction_hash_filter(attributes):
+    result = _sampled(attributes, fraction=0.25)
+    assert 800 < result.height < 1200
+
+
+def test_sample_groups_stratified_quotas(attributes):
+    result = _sampled(attributes, n=400, strata=["source"])
+    counts = dict(result.group_by("source").len().iter_rows())
+    assert counts == {"a": 300, "b": 100}
+    result = _sampled(attributes, fraction=0.1, strata=["source"])
+    counts = dict(result.group_by("source").len().iter_rows())
+    assert counts == {"a": 300, "b": 100}
+
+
+def test_sample_groups_weighted_prefers_heavy(attributes):
+    result = _sampled(attributes, n=1000, weight="weight")
+    heavy = result.filter(pl.col("weight") == 3.0).height
+    assert heavy > 650
+
+
+def test_sample_groups_weighted_fraction(attributes):
+    result = _sampled(attributes, fraction=0.1, weight="weight")
+    assert result.height == 400
+    assert result.filter(pl.col("weight") == 3.0).height > 260
+
+
+def test_sample_groups_skips_non_positive_weights(attributes):
+    attributes = attributes.with_columns(
+        pl.when(pl.col("source") == "b")
+        .then(0.0)
+        .otherwise("weight")
+        .alias("weight")
+    )
+    result = _sampled(attributes, n=500, weight="weight")
+    assert result.filter(pl.col("source") == "b").is_empty()
+
+
+def test_sample_groups_requires_one_size(attributes):
+    with pytest.raises(ValueError):
+        sample.sample_groups(attributes, n=10, fraction=0.1)
+    with pytest.raises(ValueError):
+        sample.sample_groups(attributes)
+
+
+def test_per_group_caps_each_group():
+    df = pl.DataFrame({"g": ["a"] * 50 + ["b"] * 3 + [None], "x": range(54)})
+    result = sample.per_group(df, "g", 5, seed=0)
+    assert dict(result.group_by("g").len().iter_rows()) == {"a": 5, "b": 3}
+
+
+def test_cli_sample_keeps_tables_consistent(tmp_path, attributes):
+    attributes.write_parquet(tmp_path / "attributes.parquet")
+    trips = attributes.select("pid").join(
+        pl.DataFrame({"seq": [0, 1]}), how="cross"
+    )
+    trips.write_csv(tmp_path / "trips.csv")
+    out = tmp_path / "out"
+    result = CliRunner().invoke(
+        cli,
+        [
+            "sample",
+            str(tmp_path / "attributes.parquet"),
+            str(tmp_path / "trips.csv"),
+            "-n",
+            "200",
+            "--stratify",
+            "source",
+            "-w",
+            "weight",
+            "-o",
+            str(out),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    attrs = pl.read_parquet(out / "attributes_sample.parquet")
+    trips_out = pl.read_csv(out / "trips_sample.csv")
+    assert attrs.height == 200
+    assert set(trips_out["pid"]) == set(attrs["pid"])
+    assert trips_out.height == 400
+
+
+def test_cli_sample_requires_size_or_fraction(tmp_path, attributes):
+    attributes.write_csv(tmp_path / "attributes.csv")
+    result = CliRunner().invoke(
+        cli, ["sample", str(tmp_path / "attributes.csv")]
+    )
+    assert result.exit_code != 0
+    assert "--size or --fraction" in result.output
@@ -0,0 +1,104 @@
+import polars as pl
+import pytest
+from click.testing import CliRunner
+
+from foundata import sequences
+from foundata.cli import cli
+
+
+@pytest.fixture
+def attributes():
+    return pl.DataFrame(
+        {"pid": ["p1", "p2", "p3", "p4"], "weight": [1.0, 2.0, 0.5, 1.5]}
+    )
+
+
+@pytest.fixture
+def trips():
+    # p1 and p2 commute at the same hours; p3 commutes later; p4 stays home
+    return pl.DataFrame(
+        {
+            "pid": ["p1", "p1", "p2", "p2", "p3", "p3"],
+            "seq": [1, 0, 0, 1, 0, 1],
+            "oact": ["work", "home", "home", "work", "home", "work"],
+            "dact": ["home", "work", "work", "home", "work", "home"],
+            "mode": ["car", "car", "car", "car", "car", None],
+            "tst": [1020, 480, 490, 1030, 600, 1100],
+            "tet": [1050, 510, 530, 1070, 640, 1130],
+        }
+    )
+
+
+def test_sequence_keys(trips):
+    keys = sequences.sequence_keys(trips).sort("pid")
+    assert keys["key"].to_list() == [
+        "home>car@8-8>work>car@17-17>home",
+        "home>car@8-8>work>car@17-17>home",
+        "home>car@10-10>work>null@18-18>home",
+    ]
+    assert keys["n_trips"].to_list() == [2, 2, 2]
+
+
+def test_build_index(attributes, trips):
+    seqs, index = sequences.build_index(attributes, trips)
+    assert seqs.height == 3
+    top = seqs.row(0, named=True)
+    assert top["n_plans"] == 2
+    assert top["weight"] == 3.0
+    assert index["pid"].to_list() == ["p1", "p2", "p3", "p4"]
+    ids = index["seq_id"].to_list()
+    assert ids[0] == ids[1] != ids[2]
+    home = seqs.filter(pl.col("key") == "home").row(0, named=True)
+    assert home["n_trips"] == 0 and home["n_plans"] == 1
+
+
+def test_seq_ids_are_stable_digests(attributes, trips):
+    seqs, _ = sequences.build_index(attributes, trips)
+    subset, _ = sequences.build_index(attributes.tail(2), trips)
+    joined = subset.join(seqs, on="key", suffix="_all")
+    assert joined.height == 2
+    assert joined["seq_id"].to_list() == joined["seq_id_all"].to_list()
+    home = seqs.filter(pl.col("key") == "home")["seq_id"].item()
+    assert home == sequences.seq_id("home") == 12061509474730920595
+
+
+def test_shared_seq_ids_are_kept_apart(attributes, trips, monkeypatch):
+    monkeypatch.setattr(sequences, "seq_id", lambda key: 1)
+    seqs, index = sequences.build_index(attributes, trips)
+    assert seqs.height == 3
+    assert seqs["seq_id"].unique().to_list() == [1]
+    found = sequences.find(seqs, index, r"^home>car@10", regex=True)
+    assert found["pid"].to_list() == ["p3"]
+
+
+def test_build_index_without_weight(attributes, trips):
+    seqs, _ = sequences.build_index(attributes.drop("weight"), trips)
+    assert "weight" not in seqs.columns
+
+
+def test_find(attributes, trips):
+    seqs, index = sequences.build_index(attributes, trips)
+    exact = sequences.find(seqs, index, "home>car@8-8>work>car@17-17>home")
+    assert exact["pid"].to_list() == ["p1", "p2"]
+    found = sequences.find(seqs, index, r"^home>car@10", regex=True)
+    assert found["pid"].to_list() == ["p3"]
+
+
+def test_cli_fingerprint(tmp_path, attributes, trips):
+    attributes.write_csv(tmp_path / "attributes.csv")
+    trips.write_parquet(tmp_path / "trips.parquet")
+    result = CliRunner().invoke(
+        cli,
+        [
+            "fingerprint",
+            "-a",
+            str(tmp_path / "attributes.csv"),
+            "-t",
+            str(tmp_path / "trips.parquet"),
+            "-o",
+            str(tmp_path / "out"),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert "4 plans share 3 unique sequences" in result.output
+    assert pl.read_parquet(tmp_path / "out" / "index.parquet").height == 4
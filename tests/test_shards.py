@@ -0,0 +1,104 @@
+import json
+
+import polars as pl
+import pytest
+from click.testing import CliRunner
+
+from foundata import shards
+from foundata.cli import cli
+
+
+@pytest.fixture
+def attributes():
+    n = 200
+    return pl.DataFrame(
+        {
+            "pid": [f"p{i}" for i in range(n)],
+            "source": ["a" if i % 2 else "b" for i in range(n)],
+            "year": [2020 + i % 3 for i in range(n)],
+            "age": list(range(n)),
+        }
+    )
+
+
+@pytest.fixture
+def trips(attributes):
+    # every person except p0 makes two trips
+    return (
+        attributes.select("pid")
+        .filter(pl.col("pid") != "p0")
+        .join(pl.DataFrame({"seq": [1, 0]}), how="cross")
+        .with_columns(mode=pl.lit("car"))
+    )
+
+
+def test_nest_plans(attributes, trips):
+    plans = shards.nest_plans(attributes, trips).collect()
+    assert plans.height == attributes.height
+    assert plans.columns == ["pid", "source", "year", "attributes", "trips"]
+    p1 = plans.filter(pl.col("pid") == "p1").row(0, named=True)
+    assert [t["seq"] for t in p1["trips"]] == [0, 1]
+    assert p1["attributes"]["age"] == 1
+    p0 = plans.filter(pl.col("pid") == "p0").row(0, named=True)
+    assert p0["trips"] == []
+
+
+def test_export_shards_deterministic_and_complete(tmp_path, attributes, trips):
+    plans = shards.nest_plans(attributes, trips)
+    manifest = shards.export_shards(plans, tmp_path / "a", n_shards=4, seed=1)
+    shuffled = attributes.sample(fraction=1.0, shuffle=True, seed=0)
+    shards.export_shards(
+        shards.nest_plans(shuffled, trips), tmp_path / "b", n_shards=4, seed=1
+    )
+    seen = []
+    for entry in manifest["shards"]:
+        a = pl.read_parquet(tmp_path / "a" / entry["file"])
+        b = pl.read_parquet(tmp_path / "b" / entry["file"])
+        assert a.equals(b)
+        assert a.height == entry["plans"]
+        assert entry["trips"] == a["trips"].list.len().sum()
+        assert sum(entry["sources"].values()) == a.height
+        seen.extend(a["pid"])
+    assert sorted(seen) == sorted(attributes["pid"])
+    assert sum(e["trips"] for e in manifest["shards"]) == trips.height
+
+
+def test_export_shards_plans_per_shard_and_ipc(tmp_path, attributes, trips):
+    plans = shards.nest_plans(attributes, trips)
+    manifest = shards.export_shards(
+        plans, tmp_path, plans_per_shard=50, fmt="ipc"
+    )
+    assert manifest["n_shards"] == 4
+    assert manifest["plans"] == attributes.height
+    assert not list(tmp_path.glob(".staging-*"))
+    first = manifest["shards"][0]["file"]
+    assert first.endswith(".arrow")
+    assert pl.read_ipc(tmp_path / first).columns == manifest["columns"]
+
+
+def test_cli_export_shards(tmp_path, attributes, trips):
+    attributes.write_csv(tmp_path / "attributes.csv")
+    trips.write_parquet(tmp_path / "trips.parquet")
+    trips.rename({"mode": "act"}).write_csv(tmp_path / "activities.csv")
+    out = tmp_path / "shards"
+    result = CliRunner().invoke(
+        cli,
+        [
+            "export-shards",
+            "-a",
+            str(tmp_path / "attributes.csv"),
+            "-t",
+            str(tmp_path / "trips.parquet"),
+            "--activities",
+            str(tmp_path / "activities.csv"),
+            "-o",
+            str(out),
+            "-n",
+            "3",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    manifest = json.loads((out / "manifest.json").read_text())
+    assert manifest["plans"] == 200
+    assert "activities" in manifest["columns"]
+    assert len(list(out.glob("shard-*.parquet"))) == 3
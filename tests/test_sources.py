@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from foundata import nhts, sources
+
+FIXTURE_ROOT = Path(__file__).parent / "fixtures"
+
+
+def test_specs_cover_modules_in_order():
+    specs = sources.specs()
+    assert [spec.name for spec in specs] == list(sources.MODULES)
+    for spec in specs:
+        assert spec.raw_files
+        for name in spec.configs.values():
+            assert (spec.config_dir / name).is_file(), (spec.name, name)
+    assert sources.get("nhts") is nhts.SPEC
+    assert sources.get("nts").partitions is not None
+
+
+def test_specs_select_in_run_order():
+    names = [spec.name for spec in sources.specs({"odin", "ktdb"})]
+    assert names == ["ktdb", "odin"]
+    with pytest.raises(ValueError, match="Unknown source 'atlantis'"):
+        sources.specs({"ktdb", "atlantis"})
+
+
+@pytest.fixture
+def toy():
+    calls = []
+
+    def loader(**kwargs):
+        calls.append(kwargs)
+        return pl.DataFrame({"pid": ["toy1"]}), pl.DataFrame({"pid": ["toy1"]})
+
+    spec = sources.register(
+        sources.SourceSpec(
+            name="toy",
+            data_dir="TOY",
+            loader=loader,
+            configs={"trips_config": "trip_dictionary.yaml"},
+            years=[2001, 2002],
+            options=lambda use_cache=False, **_: {"cached": use_cache},
+        )
+    )
+    yield spec, calls
+    sources._registered.pop("toy")
+
+
+def test_registered_spec_loads_generically(toy, tmp_path, monkeypatch):
+    spec, calls = toy
+    monkeypatch.setattr(sources, "CONFIGS_ROOT", tmp_path)
+    (tmp_path / "toy").mkdir()
+    (tmp_path / "toy" / "trip_dictionary.yaml").write_text("a: 1\n")
+
+    assert sources.names()[-1] == "toy"
+    assert sources.get("toy") is spec
+    spec.load(tmp_path / "data", use_cache=True)
+    spec.load(tmp_path / "data", years=[2002])
+    assert calls[0] == {
+        "data_root": tmp_path / "data" / "TOY",
+        "trips_config": {"a": 1},
+        "years": [2001, 2002],
+        "cached": True,
+    }
+    assert calls[1]["years"] == [2002]
+    assert not calls[1]["cached"]
+
+
+def test_spec_load_reads_data_dir(tmp_path):
+    (tmp_path / "NHTS").symlink_to(FIXTURE_ROOT / "nhts")
+    attributes, trips = nhts.SPEC.load(tmp_path, years=[2022])
+    assert attributes.height > 0
+    assert attributes["pid"].str.starts_with("nhts").all()
+    assert set(trips["pid"]) <= set(attributes["pid"])
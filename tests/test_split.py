@@ -0,0 +1,117 @@
+import polars as pl
+import pytest
+from click.testing import CliRunner
+
+from foundata import split
+from foundata.cli import cli
+
+
+@pytest.fixture
+def people():
+    n = 2000
+    return pl.DataFrame(
+        {
+            "pid": [f"p{i}" for i in range(n)],
+            "source": ["a" if i % 4 else "b" for i in range(n)],
+        }
+    )
+
+
+def test_fold_expr_is_deterministic_and_approximate(people):
+    folds = people.select(split.fold_expr("pid", 1, test_pct=20))[split.FOLD]
+    again = people.select(split.fold_expr("pid", 1, test_pct=20))[split.FOLD]
+    assert folds.equals(again)
+    assert 0.15 < folds.mean() < 0.25
+    other = people.select(split.fold_expr("pid", 2, test_pct=20))[split.FOLD]
+    assert not folds.equals(other)
+
+
+def test_fold_expr_kfold(people):
+    folds = people.select(split.fold_expr("pid", 0, folds=4))[split.FOLD]
+    assert set(folds.unique()) == {0, 1, 2, 3}
+
+
+def test_stratified_folds_exact_per_stratum(people):
+    result = (
+        split.stratified_folds(people.lazy(), "pid", ["source"], 0, test_pct=20)
+        .collect()
+        .join(people, on="pid")
+    )
+    counts = result.group_by("source").agg(
+        pl.len().alias("n"), pl.col(split.FOLD).sum().alias("test")
+    )
+    for n, test in counts.select("n", "test").iter_rows():
+        assert test == -(-n * 20 // 100)
+
+
+def test_fingerprint_and_differences(people):
+    lf = people.lazy()
+    shuffled = people.sample(fraction=1.0, shuffle=True, seed=3).lazy()
+    assert split.fingerprint(lf, "pid") == split.fingerprint(shuffled, "pid")
+    fewer = people.head(1990).lazy()
+    assert split.fingerprint(lf, "pid") != split.fingerprint(fewer, "pid")
+    only_lhs, only_rhs = split.group_differences(lf, fewer, "pid", limit=3)
+    assert len(only_lhs) == 3 and only_rhs == []
+
+
+def _write_inputs(tmp_path, people, suffix):
+    trips = people.select("pid").join(
+        pl.DataFrame({"seq": [0, 1, 2]}), how="cross"
+    )
+    paths = []
+    for name, df in (("attributes", people), ("trips", trips)):
+        path = tmp_path / f"{name}{suffix}"
+        if suffix == ".parquet":
+            df.write_parquet(path)
+        else:
+            df.write_csv(path)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_cli_hash_split_keeps_groups_together(tmp_path, people, suffix):
+    inputs = _write_inputs(tmp_path, people, suffix)
+    out = tmp_path / "out"
+    result = CliRunner().invoke(
+        cli, ["split", *inputs, "--method", "hash", "-o", str(out)]
+    )
+    assert result.exit_code == 0, result.output
+    read = pl.read_parquet if suffix == ".parquet" else pl.read_csv
+    train = read(out / f"attributes_train{suffix}")
+    test = read(out / f"attributes_test{suffix}")
+    trips_test = read(out / f"trips_test{suffix}")
+    assert train.height + test.height == people.height
+    assert set(train["pid"]).isdisjoint(test["pid"])
+    assert set(trips_test["pid"]) == set(test["pid"])
+    assert trips_test.height == 3 * test.height
+
+
+def test_cli_hash_split_stratified_folds(tmp_path, people):
+    inputs = _write_inputs(tmp_path, people, ".csv")
+    result = CliRunner().invoke(
+        cli,
+        ["split", *inputs, "--method", "hash", "-k", "4"]
+        + ["--stratify", "source", "-o", str(tmp_path / "out")],
+    )
+    assert result.exit_code == 0, result.output
+    sizes = [
+        pl.read_csv(tmp_path / "out" / f"attributes_fold{i}.csv").height
+        for i in range(4)
+    ]
+    assert sizes == [500] * 4
+
+
+def test_cli_hash_split_mismatched_groups(tmp_path, people):
+    inputs = _write_inputs(tmp_path, people, ".csv")
+    people.head(10).write_csv(inputs[0])
+    result = CliRunner().invoke(cli, ["split", *inputs, "--method", "hash"])
+    assert result.exit_code == 1
+    assert "differ across inputs" in result.output
+
+
+def test_cli_folds_require_hash(tmp_path, people):
+    inputs = _write_inputs(tmp_path, people, ".csv")
+    result = CliRunner().invoke(cli, ["split", *inputs, "-k", "3"])
+    assert result.exit_code != 0
+    assert "--method hash" in result.output
@@ -1,7 +1,9 @@
 import polars as pl
 import pytest
+from click.testing import CliRunner
 
 from foundata import post_process, tables
+from foundata.cli import cli
 
 TRIPS_SCHEMA = {
     "pid": pl.String,
@@ -77,6 +79,63 @@ def trips():
     )
 
 
+# ---------------------------------------------------------------------------
+# summary_table
+# ---------------------------------------------------------------------------
+
+
+def test_summary_table_values(attrs, trips):
+    attrs = attrs.with_columns(
+        hh_zone=pl.Series(["urban", "unknown", None, "rural"])
+    )
+    trips = pl.concat([trips, trips.head(1)])
+    table = tables.summary_table(attrs, trips)
+    assert table["source"].to_list() == ["a", "b", "total"]
+    assert table["persons"].to_list() == [2, 2, 4]
+    assert table["trips"].to_list() == [3, 2, 5]
+    assert table["nulls"].to_list() == [50.0, 50.0, 50.0]
+    assert table["kms (millions)"].to_list() == pytest.approx(
+        [12e-6, 51e-6, 63e-6]
+    )
+
+
+def test_summary_table_lazy_matches_eager(attrs, trips):
+    eager = tables.summary_table(attrs, trips)
+    lazy = tables.summary_table(attrs.lazy(), trips.lazy())
+    assert eager.equals(lazy)
+
+
+def test_summary_table_person_without_trips(attrs, trips):
+    table = tables.summary_table(attrs, trips.filter(pl.col("pid") != "p1"))
+    assert table["trips"].to_list() == [1, 2, 3]
+
+
+def test_summary_table_total_counts_all_trips(attrs, trips):
+    orphan = trips.head(1).with_columns(pid=pl.lit("ghost"))
+    table = tables.summary_table(attrs.reverse(), pl.concat([trips, orphan]))
+    assert table["source"].to_list() == ["a", "b", "total"]
+    assert table["trips"].to_list() == [2, 2, 5]
+    total = table.row(2, named=True)
+    assert total["kms (millions)"] == pytest.approx(
+        trips["distance"].sum() / 1e6 + orphan["distance"].sum() / 1e6
+    )
+
+
+def test_cli_summary_reads_parquet(tmp_path, attrs, trips):
+    attrs.write_parquet(tmp_path / "attributes.parquet")
+    trips.write_parquet(tmp_path / "trips.parquet")
+    result = CliRunner().invoke(
+        cli,
+        [
+            "summary",
+            str(tmp_path / "attributes.parquet"),
+            str(tmp_path / "trips.parquet"),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert "**total**" in result.output
+
+
 # ---------------------------------------------------------------------------
 # activity_summary_table
 # ---------------------------------------------------------------------------
@@ -0,0 +1,172 @@
+import json
+from functools import partial
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from foundata import run, sources, tasks
+
+FIXTURE_ROOT = Path(__file__).parent / "fixtures"
+
+
+def make_frames(inputs: Path, task: tasks.Task):
+    """Toy task: one plan per task, failing if a `fail-<name>` file exists."""
+    if (inputs / f"fail-{task.name}").exists():
+        raise ValueError(f"cannot process {task.name}")
+    pid = f"{task.source}{task.year}"
+    attributes = pl.DataFrame({"pid": [pid], "weight": [2.0]})
+    trips = pl.DataFrame({"pid": [pid, pid], "seq": [0, 1]})
+    return attributes, trips
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    path = tmp_path / "inputs"
+    path.mkdir()
+    for year in (2001, 2002):
+        (path / str(year)).write_text("raw")
+    return path
+
+
+def input_files(inputs: Path, task: tasks.Task):
+    return [inputs / str(task.year)]
+
+
+TASKS = [tasks.Task("a", 2001), tasks.Task("a", 2002), tasks.Task("b")]
+
+
+def run_toy(inputs, work_dir, **kwargs):
+    return tasks.run_tasks(
+        TASKS,
+        partial(make_frames, inputs),
+        work_dir,
+        inputs=partial(input_files, inputs),
+        **kwargs,
+    )
+
+
+def test_task_names_and_dirs(tmp_path):
+    assert tasks.Task("nhts", 2022).name == "nhts-2022"
+    assert tasks.Task("ktdb").name == "ktdb"
+    assert tasks.task_dir(tmp_path, tasks.Task("ktdb")) == tmp_path / "ktdb/all"
+    assert tasks.task_dir(tmp_path, tasks.Task("nts", "1/3")).parent == (
+        tmp_path / "nts"
+    )
+
+
+def test_run_tasks_writes_outputs_and_resumes(inputs, tmp_path):
+    work_dir = tmp_path / "work"
+    assert run_toy(inputs, work_dir, workers=1) == TASKS
+    done = json.loads(
+        (tasks.task_dir(work_dir, TASKS[0]) / "done.json").read_text()
+    )
+    assert done["task"] == "a-2001"
+    assert done["rows"] == {"attributes": 1, "trips": 2}
+
+    assert run_toy(inputs, work_dir, workers=1) == []
+    assert run_toy(inputs, work_dir, workers=1, resume=False) == TASKS
+
+    # changing one year's input reruns only that year
+    (inputs / "2002").write_text("revised")
+    assert run_toy(inputs, work_dir, workers=1) == [TASKS[1]]
+
+
+def test_changed_options_or_code_rerun_tasks(inputs, tmp_path, monkeypatch):
+    work_dir = tmp_path / "work"
+    assert run_toy(inputs, work_dir, workers=1, options={"by": 3}) == TASKS
+    assert run_toy(inputs, work_dir, workers=1, options={"by": 3}) == []
+    assert run_toy(inputs, work_dir, workers=1, options={"by": 4}) == TASKS
+
+    monkeypatch.setattr(tasks, "code_version", lambda: "edited")
+    assert run_toy(inputs, work_dir, workers=1, options={"by": 4}) == TASKS
+
+
+def test_failed_task_is_rerun_on_resume(inputs, tmp_path):
+    work_dir = tmp_path / "work"
+    (inputs / "fail-a-2002").touch()
+    with pytest.raises(RuntimeError, match="a-2002"):
+        run_toy(inputs, work_dir, workers=1)
+    assert tasks.is_done(
+        work_dir,
+        TASKS[0],
+        tasks.fingerprint(TASKS[0], input_files(inputs, TASKS[0])),
+    )
+    (inputs / "fail-a-2002").unlink()
+    assert run_toy(inputs, work_dir, workers=1) == [TASKS[1]]
+
+
+def test_run_tasks_on_process_pool(inputs, tmp_path):
+    work_dir = tmp_path / "work"
+    (inputs / "fail-b").touch()
+    with pytest.raises(RuntimeError, match="1 task"):
+        run_toy(inputs, work_dir, workers=2)
+    (inputs / "fail-b").unlink()
+    assert run_toy(inputs, work_dir, workers=2) == [TASKS[2]]
+
+    merged = tasks.merge(work_dir, TASKS)
+    assert list(merged) == ["a", "b"]
+    attributes, trips = merged["a"]
+    assert attributes["pid"].to_list() == ["a2001", "a2002"]
+    assert trips.height == 4
+
+
+def test_run_tasks_on_thread_pool(inputs, tmp_path):
+    work_dir = tmp_path / "work"
+    assert run_toy(inputs, work_dir, workers=2, executor="thread") == TASKS
+    assert run_toy(inputs, work_dir, executor="serial") == []
+    with pytest.raises(ValueError, match="executor"):
+        run_toy(inputs, work_dir, executor="cluster")
+
+
+def test_source_tasks():
+    assert run.source_tasks("nhts", Path("data")) == [
+        tasks.Task("nhts", year) for year in sources.get("nhts").years
+    ]
+    assert run.source_tasks("ktdb", Path("data")) == [tasks.Task("ktdb")]
+    assert run.source_tasks("nts", Path("data")) == [tasks.Task("nts")]
+    # partitions only apply to sources with a partitioner
+    assert run.source_tasks("ktdb", Path("data"), {"ktdb": 2}) == [
+        tasks.Task("ktdb")
+    ]
+
+
+def test_task_inputs_are_year_scoped(tmp_path):
+    (tmp_path / "NHTS" / "2022").mkdir(parents=True)
+    paths = run.task_inputs(tmp_path, tasks.Task("nhts", 2022))
+    assert paths[-1] == tmp_path / "NHTS" / "2022"
+    assert all(".compiled" not in p.parts for p in paths[:-1])
+    assert run.CONFIGS_ROOT / "nhts" / "hh_dictionary.yaml" in paths
+
+
+@pytest.mark.parametrize("executor", ["serial", "thread"])
+def test_run_task_on_fixtures(tmp_path, executor):
+    data_root = tmp_path / "data"
+    data_root.mkdir()
+    (data_root / "NHTS").symlink_to(FIXTURE_ROOT / "nhts")
+    (data_root / "VISTA").symlink_to(FIXTURE_ROOT / "vista")
+    (data_root / "LTDS").symlink_to(FIXTURE_ROOT / "ltds")
+    todo = [
+        tasks.Task("nhts", 2022),
+        tasks.Task("vista", "2012-2020"),
+        tasks.Task("ltds", "LTDS2425"),
+    ]
+    tasks.run_tasks(
+        todo,
+        partial(run.run_task, data_root, False, None),
+        tmp_path / "work",
+        inputs=partial(run.task_inputs, data_root),
+        executor=executor,
+    )
+    merged = tasks.merge(tmp_path / "work", todo)
+    for source, (attributes, trips) in merged.items():
+        assert attributes.height > 0
+        assert attributes["pid"].str.starts_with(source).all()
+        assert set(trips["pid"]) <= set(attributes["pid"])
+
+    meta = tasks.read_done(tmp_path / "work", todo[2])["meta"]
+    (files,) = meta["resolved_files"].values()
+    assert files["Stage.csv"] == "Stage.csv"
+    meta = tasks.read_done(tmp_path / "work", todo[0])["meta"]
+    assert meta["resolved_files"] == {}
+    assert list(meta["day_wrap"]) == ["nhts"]
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import polars as pl
+
+from foundata import times
+
+
+def test_hhmm_to_minutes():
+    df = pl.DataFrame({"tst": [0, 5, 130, 1430, 2359, None]})
+    result = df.select(times.hhmm_to_minutes(pl.col("tst")))["tst"]
+    assert result.to_list() == [0, 5, 90, 870, 1439, None]
+
+
+def test_datetime_to_minutes():
+    df = pl.DataFrame(
+        {"t": [datetime(2020, 1, 1, 0, 0, 59), datetime(2020, 1, 2, 13, 45)]}
+    )
+    result = df.select(times.datetime_to_minutes(pl.col("t")))["t"]
+    assert result.to_list() == [0, 825]
+
+
+def test_sample_minutes_within_bucket_and_seeded():
+    base = pl.Series("duration", [0, 5, 10, None, 60] * 200)
+    a = times.sample_minutes(base, width=5, minimum=1, seed=1)
+    b = times.sample_minutes(base, width=5, minimum=1, seed=1)
+    assert a.equals(b)
+    assert a.name == "duration"
+    assert a.null_count() == base.null_count()
+    df = pl.DataFrame({"base": base, "sampled": a}).drop_nulls()
+    lower = pl.max_horizontal(pl.col("base"), pl.lit(1))
+    assert df.filter(
+        (pl.col("sampled") < lower) | (pl.col("sampled") > pl.col("base") + 4)
+    ).is_empty()
+    assert df.filter(pl.col("base") == 60)["sampled"].n_unique() == 5
+
+
+def test_sample_minutes_minimum_above_bucket():
+    result = times.sample_minutes(pl.Series([-10]), width=5, minimum=1, seed=0)
+    assert result.to_list() == [1]
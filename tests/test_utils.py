@@ -395,3 +395,60 @@ def test_do_not_assign_education_to_escort():
     result = utils.assign_education_to_escort(trips)
     assert result["oact"].to_list() == ["home", "education"]
     assert result["dact"].to_list() == ["education", "home"]
+
+
+# --- fuzzy file resolution ---
+
+
+@pytest.fixture
+def survey_dir(tmp_path):
+    pl.DataFrame({"hid": [1, 2], "size": [3, 4], "zone": ["a", "b"]}).write_csv(
+        tmp_path / "Households.csv"
+    )
+    pl.DataFrame({"pid": [1], "hid": [1]}).write_csv(tmp_path / "Person.csv")
+    utils.resolved_files(reset=True)
+    return tmp_path
+
+
+def test_resolve_files_matches_all_targets(survey_dir):
+    resolved = utils.resolve_files(survey_dir, ["Household.csv", "person.csv"])
+    assert resolved == {
+        "Household.csv": survey_dir / "Households.csv",
+        "person.csv": survey_dir / "Person.csv",
+    }
+    assert utils.resolved_files(reset=True) == {
+        str(survey_dir): {
+            "Household.csv": "Households.csv",
+            "person.csv": "Person.csv",
+        }
+    }
+    assert utils.resolved_files() == {}
+
+
+def test_resolve_files_without_match_raises(survey_dir):
+    with pytest.raises(FileNotFoundError, match="Trip.csv"):
+        utils.resolve_files(survey_dir, ["Trip.csv"])
+
+
+def test_directory_index_is_memoised_until_changed(survey_dir):
+    first = utils.directory_index(survey_dir)
+    assert utils.directory_index(survey_dir) is first
+    (survey_dir / "Trip.csv").write_text("tid\n1\n")
+    assert "Trip.csv" in utils.directory_index(survey_dir)
+
+
+def test_fuzzy_scan_is_lazy_and_projected(survey_dir):
+    scans = utils.fuzzy_scan(
+        survey_dir,
+        {"hhs": "Household.csv", "persons": "person.csv"},
+        hhs=["zone", "hid"],
+    )
+    assert all(isinstance(scan, pl.LazyFrame) for scan in scans.values())
+    hhs, persons = pl.collect_all(scans.values())
+    assert hhs.columns == ["hid", "zone"]
+    assert persons.columns == ["pid", "hid"]
+
+
+def test_fuzzy_loader_reads_best_match(survey_dir):
+    hhs = utils.fuzzy_loader(survey_dir, "Household.csv", columns=["size"])
+    assert hhs["size"].to_list() == [3, 4]
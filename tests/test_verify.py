@@ -154,6 +154,39 @@ def test_columns_extra(sample_attributes_df, sample_trips_df, capsys):
     assert "extra_col" in captured.out
 
 
+def test_columns_lazy_parquet(sample_attributes_df, sample_trips_df, tmp_path):
+    sample_attributes_df.write_parquet(tmp_path / "attributes.parquet")
+    sample_trips_df.write_parquet(tmp_path / "trips.parquet")
+    result = verify.columns(
+        pl.scan_parquet(tmp_path / "attributes.parquet"),
+        pl.scan_parquet(tmp_path / "trips.parquet"),
+    )
+    assert result is True
+
+
+def test_check_col_cnfg_reports_all_failures(capsys):
+    template = {
+        "age": {"dtype": "int", "min": 0, "max": 120},
+        "sex": {"dtype": "str", "set": ["male", "female"]},
+        "mode": {"dtype": "str"},
+    }
+    df = pl.DataFrame(
+        {
+            "age": [-1, 30, 130, None],
+            "sex": ["male", "other", None, "male"],
+            "mode": ["car", "unknown", "walk", "bus"],
+        }
+    )
+    assert verify.check_col_cnfg(df.lazy(), template) is False
+    out = capsys.readouterr().out
+    assert "'age' has min -1" in out
+    assert "'age' has max 130" in out
+    assert "'age' appears to be using default values" in out
+    assert "Missing values in 'sex': {'female'}" in out
+    assert "Unexpected values in 'sex': {'other'}" in out
+    assert "'mode' appears to be using default values" in out
+
+
 # --- verify.activity_consistency ---
 
 
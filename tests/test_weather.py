@@ -0,0 +1,196 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import polars as pl
+import pytest
+
+from foundata import cmap, ktdb, weather
+
+
+class StubOpenMeteo(BaseHTTPRequestHandler):
+    """Open-Meteo archive stub: temperature is the latitude plus the day of
+    month, and it is wet on even days. Set `server.throttle` to 429 the next N requests."""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        self.server.requests.append(query)
+        if self.server.throttle:
+            self.server.throttle -= 1
+            self.send_response(429)
+            self.send_header("Retry-After", "0.05")
+            self.end_headers()
+            self.wfile.write(b'{"error": true, "reason": "limit"}')
+            return
+        first = date.fromisoformat(query["start_date"][0])
+        last = date.fromisoformat(query["end_date"][0])
+        days = [
+            first + timedelta(days=i) for i in range((last - first).days + 1)
+        ]
+        results = [
+            {
+                "latitude": float(lat),
+                "daily": {
+                    "time": [d.isoformat() for d in days],
+                    "temperature_2m_max": [float(lat) + d.day for d in days],
+                    "precipitation_sum": [float(d.day % 2 == 0) for d in days],
+                },
+            }
+            for lat in query["latitude"][0].split(",")
+        ]
+        body = json.dumps(results if len(results) > 1 else results[0])
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenMeteo)
+    server.requests = []
+    server.throttle = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/v1/archive"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+SEOUL = (37.5665, 126.978)
+BUSAN = (35.1796, 129.0756)
+
+
+def update(stub, store, locations, start, end, **kwargs):
+    return weather.update(
+        locations,
+        start,
+        end,
+        path=store,
+        base_url=stub.url,
+        rate=100,
+        **kwargs,
+    )
+
+
+def test_update_fetches_only_missing_days(stub, tmp_path):
+    store = tmp_path / "store.parquet"
+    jan = (date(2021, 1, 1), date(2021, 1, 10))
+    assert update(stub, store, [SEOUL, BUSAN], *jan) == 20
+    # both locations share a range, so one batched request
+    assert len(stub.requests) == 1
+    lats = stub.requests[0]["latitude"][0].split(",")
+    assert sorted(lats) == ["35.1796", "37.5665"]
+
+    assert update(stub, store, [SEOUL, BUSAN], *jan) == 0
+    assert len(stub.requests) == 1
+
+    # extending the range fetches only the new days
+    assert update(stub, store, [SEOUL], date(2021, 1, 5), date(2021, 1, 12))
+    assert stub.requests[-1]["start_date"] == ["2021-01-11"]
+    assert stub.requests[-1]["end_date"] == ["2021-01-12"]
+
+    rows = weather.read_store(store)
+    assert rows.height == 22
+    assert rows.select(weather.KEY).is_unique().all()
+    # each location got its own result
+    offset = pl.col("max_temp_c") - pl.col("date").dt.day() - pl.col("lat")
+    assert (rows.select(offset.abs().max()).item()) < 1e-9
+
+
+def test_update_batches_and_runs_concurrently(stub, tmp_path):
+    locations = [(float(i), float(i)) for i in range(7)]
+    update(
+        stub,
+        tmp_path / "store.parquet",
+        locations,
+        date(2020, 1, 1),
+        date(2020, 1, 3),
+        batch_size=3,
+        concurrency=3,
+    )
+    sizes = sorted(len(q["latitude"][0].split(",")) for q in stub.requests)
+    assert sizes == [1, 3, 3]
+
+
+def test_update_retries_when_throttled(stub, tmp_path):
+    stub.throttle = 2
+    store = tmp_path / "store.parquet"
+    assert update(stub, store, [SEOUL], date(2021, 1, 1), date(2021, 1, 2)) == 2
+    assert len(stub.requests) == 3
+
+    stub.throttle = 5
+    with pytest.raises(RuntimeError, match="after 2 attempts"):
+        update(
+            stub, store, [BUSAN], date(2021, 1, 1), date(2021, 1, 2), retries=2
+        )
+
+
+def test_missing_ranges_are_contiguous_runs(tmp_path):
+    store = weather.write_store(
+        pl.DataFrame(
+            {
+                "lat": [SEOUL[0]] * 2,
+                "lon": [SEOUL[1]] * 2,
+                "date": [date(2021, 1, 3), date(2021, 1, 4)],
+                "max_temp_c": [1.0, 2.0],
+                "precipitation_mm": [0.0, 0.0],
+            }
+        ),
+        tmp_path / "store.parquet",
+    )
+    ranges = weather.missing_ranges(
+        store, [SEOUL], date(2021, 1, 1), date(2021, 1, 6)
+    )
+    assert ranges == [
+        (SEOUL, date(2021, 1, 1), date(2021, 1, 2)),
+        (SEOUL, date(2021, 1, 5), date(2021, 1, 6)),
+    ]
+
+
+def test_token_bucket_limits_rate():
+    async def take(n):
+        bucket = weather.TokenBucket(rate=50, burst=2)
+        start = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(n)))
+        return time.monotonic() - start
+
+    # 2 burst tokens, then 4 more at 50/s take at least 80ms
+    assert asyncio.run(take(6)) >= 0.07
+    with pytest.raises(ValueError):
+        weather.TokenBucket(rate=0)
+
+
+def test_regional_and_daily_views(stub, tmp_path):
+    store = tmp_path / "store.parquet"
+    update(stub, store, [SEOUL, BUSAN], date(2021, 1, 1), date(2021, 1, 2))
+    regions = pl.DataFrame(
+        {
+            "region_code": ["11", "26"],
+            "lat": [SEOUL[0], 35.17960001],
+            "lon": [SEOUL[1], BUSAN[1]],
+        }
+    )
+    regional = weather.regional(regions, store).sort("region_code", "date")
+    assert regional.columns == ["date", "region_code", "max_temp_c", "rain"]
+    assert regional["region_code"].to_list() == ["11", "11", "26", "26"]
+    assert regional["rain"].to_list() == [False, True, False, True]
+
+    daily = weather.daily(*SEOUL, path=store)
+    assert daily["date"].to_list() == ["2021-01-01", "2021-01-02"]
+    assert daily["max_temp_c"].to_list() == [SEOUL[0] + 1, SEOUL[0] + 2]
+
+
+def test_store_covers_source_weather():
+    regional = ktdb.load_weather()
+    assert regional["region_code"].n_unique() == 17
+    assert regional.group_by("region_code").len()["len"].min() == 365
+    assert cmap.load_weather().height == 3 * 365